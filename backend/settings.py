@@ -1,6 +1,5 @@
 import os
 from pathlib import Path
-import django_heroku
 import dj_database_url
 from decouple import config
 
@@ -10,10 +9,14 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 DEBUG = os.environ.get('DJANGO_ENV') != 'production'
 
+# Arranque diferido: el admin se descubre con su primera petición y no se importa django_heroku.
+# Comparar con el arranque normal con `python manage.py profile_boot`.
+LAZY_STARTUP = os.environ.get('LAZY_STARTUP', 'false').lower() == 'true'
+
 ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig' if LAZY_STARTUP else 'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -23,6 +26,8 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'corsheaders',
     'drf_spectacular',
+    # Se quedan también con LAZY_STARTUP: marketplace.models importa el SDK por CloudinaryField
+    # y sus AppConfig no cargan nada más; quitarlas no cambia el arranque medido con profile_boot
     'cloudinary',
     'cloudinary_storage',
     'marketplace',
@@ -128,8 +133,25 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'marketplace.throttling.CheapEndpointThrottle',
+    ],
+    # Token buckets: capacidad/periodo. Los endpoints costosos tienen su propio presupuesto.
+    'DEFAULT_THROTTLE_RATES': {
+        'cheap_anon': os.environ.get('THROTTLE_CHEAP_ANON', '120/min'),
+        'cheap_user': os.environ.get('THROTTLE_CHEAP_USER', '300/min'),
+        'expensive_anon': os.environ.get('THROTTLE_EXPENSIVE_ANON', '20/min'),
+        'expensive_user': os.environ.get('THROTTLE_EXPENSIVE_USER', '60/min'),
+    },
+    # Proxies delante de la app (el router de Heroku): la IP del cliente para el throttling
+    # anónimo se toma de X-Forwarded-For saltando ese número de saltos, no del primer valor,
+    # que el cliente puede falsificar
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
 }
 
+# Alias de caché compartida para los contadores de throttling; None = memoria del proceso
+THROTTLE_CACHE_ALIAS = os.environ.get('THROTTLE_CACHE_ALIAS') or None
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Findout Marketplace API',
     'DESCRIPTION': 'Documentación de la API para el Marketplace de Findout',
@@ -137,6 +159,122 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Feed precalculado de la pantalla de inicio (segundos entre reconstrucciones). Lo reconstruye
+# el proceso feed del Procfile; cada HOME_FEED_POLL_INTERVAL segundos comprueba si una escritura
+# cambió la versión del feed para adelantarse
+HOME_FEED_REFRESH_INTERVAL = int(os.environ.get('HOME_FEED_REFRESH_INTERVAL', 300))
+HOME_FEED_POLL_INTERVAL = 5
+HOME_FEED_FEATURED_LIMIT = 12
+
+# Rangos de precio para las facetas del catálogo y duración de su caché (segundos)
+PRODUCT_PRICE_BUCKETS = (0, 5, 10, 25, 50, 100)
+PRODUCT_FACETS_TIMEOUT = 600
+
+# Caché de la primera página del feed de promociones (segundos)
+PROMOTION_FEED_TIMEOUT = 300
+
+# Caché de respuestas de detalle y listado de empresas (segundos)
+COMPANY_CACHE_TIMEOUT = 600
+
+# Catálogos por país de /api/{country_code}/companies/ y /products/ (segundos)
+COUNTRY_CACHE_TIMEOUT = 600
+
+# Caché compartida entre workers (Redis en Heroku). Sin REDIS_URL, p. ej. en tests y desarrollo,
+# se usa una caché en memoria que hace de sustituto local.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'marketplace-shared',
+        }
+    }
+
+# Nivel local (LRU por proceso) delante de la caché compartida
+CACHE_LOCAL_MAX_ENTRIES = 1000
+CACHE_LOCAL_TIMEOUT = 5
+# Entradas de cada partición local (una por país), aparte del tope general
+CACHE_PARTITION_MAX_ENTRIES = 50
+# Tiempo que un valor caducado se sigue sirviendo mientras se recalcula en segundo plano
+CACHE_STALE_TIMEOUT = 60
+# Variación aleatoria (±10 %) de los TTL y espera máxima por un cálculo en curso (segundos)
+CACHE_TTL_JITTER = 0.1
+CACHE_LOCK_TIMEOUT = 10
+
+# Caché de las secciones de top burgers (segundos)
+TOP_BURGERS_TIMEOUT = 300
+# URL pública canónica del API (definirla en producción): base de las URLs absolutas de las
+# respuestas cacheadas compartidas, ya que con ALLOWED_HOSTS = ['*'] el Host lo elige el cliente
+PUBLIC_API_URL = os.environ.get('PUBLIC_API_URL', 'http://localhost:8000')
+
+# Recomendaciones "comprados juntos": vecinos guardados por producto y pedidos por lote
+RECOMMENDATIONS_TOP_K = 10
+RECOMMENDATIONS_BATCH_SIZE = 1000
+# Pedidos confirmados fuera de orden de id: segundos que se sigue buscando un id que faltaba
+# por debajo del checkpoint y máximo de huecos abiertos por checkpoint
+CHECKPOINT_GAP_TIMEOUT = 600
+CHECKPOINT_MAX_GAPS = 10000
+
+# Puntuación de tendencia de las secciones automáticas: vida media (horas), umbral por debajo
+# del cual se descarta y vidas medias de historial que se leen en la primera ejecución
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_MIN_SCORE = 0.01
+TRENDING_INITIAL_WINDOW_HALF_LIVES = 4
+
+# Contadores de impresiones y clics: segundos entre volcados a la base de datos
+COUNTER_FLUSH_INTERVAL = 5
+# Cada cliente (usuario o IP) cuenta una vez por objeto y tipo de evento en esta ventana (segundos)
+COUNTER_DEDUPE_WINDOW = 60
+
+# Frontend al que redirigen los clics de top burgers hacia perfiles de empresa
+FRONTEND_BASE_URL = os.environ.get('FRONTEND_BASE_URL', 'https://findout.store')
+
+# Búsqueda semántica (?mode=semantic): embedder enchufable e índice NumPy mapeado en memoria.
+# El embedder local (hashing) no necesita red; OpenAIEmbedder usa OPENAI_API_KEY.
+SEMANTIC_SEARCH_EMBEDDER = os.environ.get('SEMANTIC_SEARCH_EMBEDDER', 'marketplace.embeddings.HashingEmbedder')
+SEMANTIC_SEARCH_DIMENSIONS = 512
+SEMANTIC_SEARCH_INDEX_ROOT = os.path.join(BASE_DIR, 'vector_index')
+SEMANTIC_SEARCH_UPDATE_ON_SAVE = True
+# El índice vive en el disco de cada dyno (vacío tras cada despliegue): se reconstruye en segundo
+# plano al arrancar los workers, con la primera búsqueda si falta y cuando tiene más de estos
+# segundos, para recoger los cambios guardados desde otros dynos
+SEMANTIC_SEARCH_MAX_AGE = 900
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
+OPENAI_EMBEDDING_MODEL = 'text-embedding-ada-002'
+
+# Asistente del catálogo (/api/assistant/, SSE). ASSISTANT_LLM_BASE_URL admite cualquier API
+# compatible con /chat/completions de OpenAI, p. ej. el stub local de assistant_stub_server.
+ASSISTANT_LLM_CLIENT = 'marketplace.assistant.OpenAICompatibleClient'
+ASSISTANT_LLM_BASE_URL = os.environ.get('ASSISTANT_LLM_BASE_URL', 'https://api.openai.com/v1')
+ASSISTANT_LLM_MODEL = os.environ.get('ASSISTANT_LLM_MODEL', 'gpt-3.5-turbo')
+ASSISTANT_LLM_TIMEOUT = 60
+ASSISTANT_CACHE_TIMEOUT = 3600
+ASSISTANT_GROUNDING_LIMIT = 8
+ASSISTANT_MAX_PROMPT_LENGTH = 500
+ASSISTANT_TIME_ZONE = 'America/Costa_Rica'
+
+# Esquema OpenAPI precalculado: se regenera cuando cambia la versión del código (commit del slug
+# si Heroku lo expone; si no, un hash de los módulos) y los clientes lo cachean API_SCHEMA_MAX_AGE s
+API_SCHEMA_ROOT = os.path.join(BASE_DIR, 'api_schema')
+API_SCHEMA_VERSION = os.environ.get('API_SCHEMA_VERSION') or os.environ.get('HEROKU_SLUG_COMMIT') or None
+API_SCHEMA_MAX_AGE = 3600
+
+# Precalentado al arrancar (gunicorn.conf.py y /api/ready/): presupuesto en segundos, hilos y
+# respuestas a precalcular. WARMUP_HOST debe ser el host público, que forma parte de algunas claves.
+WARMUP_TIME_BUDGET = int(os.environ.get('WARMUP_TIME_BUDGET', 10))
+WARMUP_THREADS = 4
+# /api/ready/ reintenta un precalentado fallido como mucho una vez cada estos segundos
+WARMUP_RETRY_INTERVAL = 30
+WARMUP_PATHS = ('/api/top-burgers/', '/api/reference-data/', '/api/companies/')
+WARMUP_HOST = os.environ.get('WARMUP_HOST', 'localhost')
+WARMUP_SECURE = os.environ.get('DJANGO_ENV') == 'production'
+
 # Configuración de archivos estáticos
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -152,9 +290,23 @@ CLOUDINARY_STORAGE = {
     'API_SECRET': config('CLOUDINARY_API_SECRET'),
 }
 
+# Solo una ruta: el storage no se importa al arrancar (las imágenes van por CloudinaryField)
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
 MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Subidas de imágenes diferidas: los bytes se guardan en la base de datos (ImageUploadTask) y el
+# proceso worker del Procfile (process_image_uploads) los sube con IMAGE_UPLOAD_BACKEND.
+# En pruebas puede usarse 'marketplace.uploads.LocalFileSystemUploadBackend'.
+# PENDING_UPLOADS_ROOT solo lo usan las tareas encoladas antes de guardar los bytes en la base.
+DEFERRED_IMAGE_UPLOADS = os.environ.get('DEFERRED_IMAGE_UPLOADS', 'true').lower() == 'true'
+IMAGE_UPLOAD_BACKEND = os.environ.get('IMAGE_UPLOAD_BACKEND', 'marketplace.uploads.CloudinaryUploadBackend')
+PENDING_UPLOADS_ROOT = os.path.join(BASE_DIR, 'pending_uploads')
+IMAGE_UPLOAD_MAX_ATTEMPTS = 5
+
+# Anchuras (px) que se derivan con Pillow para cover_photo y featured_image
+IMAGE_VARIANT_WIDTHS = (320, 640, 1024)
 
 
 
@@ -165,4 +317,49 @@ if os.environ.get('DJANGO_ENV') == 'production':
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
 
-django_heroku.settings(locals(), staticfiles=False)
\ No newline at end of file
+# Misma configuración de logging que aplicaba django_heroku.settings(); se define aquí para que
+# no se pierda con LAZY_STARTUP, que no lo llama
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': (
+                '%(asctime)s [%(process)d] [%(levelname)s] pathname=%(pathname)s lineno=%(lineno)s '
+                'funcname=%(funcName)s %(message)s'
+            ),
+            'datefmt': '%Y-%m-%d %H:%M:%S'
+        },
+        'simple': {
+            'format': '%(levelname)s %(message)s'
+        }
+    },
+    'handlers': {
+        'null': {
+            'level': 'DEBUG',
+            'class': 'logging.NullHandler',
+        },
+        'console': {
+            'level': 'DEBUG',
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose'
+        }
+    },
+    'loggers': {
+        'testlogger': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        }
+    }
+}
+
+if LAZY_STARTUP:
+    # De django_heroku.settings() solo hace falta la base de datos con SSL (ALLOWED_HOSTS,
+    # SECRET_KEY y LOGGING ya están arriba); importarlo arrastra django.test por su test runner
+    # de Heroku CI
+    if 'DATABASE_URL' in os.environ:
+        DATABASES['default'] = dj_database_url.config(conn_max_age=600, ssl_require=True)
+else:
+    import django_heroku
+
+    django_heroku.settings(locals(), staticfiles=False, logging=False)
\ No newline at end of file
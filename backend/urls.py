@@ -2,20 +2,29 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from marketplace.startup import lazy_admin_urls, lazy_view
+from marketplace.views import api_schema
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('admin/', lazy_admin_urls(admin.site) if settings.LAZY_STARTUP else admin.site.urls),
     path('api/', include('marketplace.urls')),
 
-    # Schema view
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    # Schema view (precalculado por versión del código, ver marketplace.api_schema)
+    path('api/schema/', api_schema, name='schema'),
     
     # Swagger UI
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path(
+        'api/schema/swagger-ui/',
+        lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'),
+        name='swagger-ui'
+    ),
 
     # Redoc UI
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path(
+        'api/schema/redoc/',
+        lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'),
+        name='redoc'
+    ),
 ]
 
 # Agregar esta configuración para servir archivos multimedia en desarrollo
@@ -0,0 +1,39 @@
+# Configuración de gunicorn (Procfile). Con preload_app el maestro carga Django una sola vez y
+# precalienta conexiones, SDK y cachés antes de crear los workers, que heredan la memoria.
+# Lo usan el proceso web (WSGI, workers síncronos) y assistant (ASGI, workers de uvicorn).
+
+preload_app = True
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    from marketplace.warmup import state, warm_up
+
+    # warm_up espera a sus hilos: no se puede hacer fork con hilos en curso
+    status = warm_up(join=True)
+    # Un socket compartido entre procesos se corrompe: los workers heredan las cachés, no las
+    # conexiones, y su estado lo refleja (warm_caches)
+    connections.close_all()
+    state.connections_closed()
+    server.log.info(f'Warm-up before forking workers: {status}, database connections closed before fork')
+
+
+def post_worker_init(worker):
+    # Sin preload cada worker se precalienta en segundo plano; /api/ready/ responde 503 hasta entonces
+    if not worker.cfg.preload_app:
+        from marketplace.warmup import start_warm_up
+
+        start_warm_up()
+
+    # El disco del dyno empieza vacío tras cada despliegue: el índice semántico se construye en
+    # segundo plano (uno de los workers, el resto lo encuentra al día). Con LAZY_STARTUP espera a
+    # la primera búsqueda para no importar NumPy al arrancar
+    from django.conf import settings
+
+    if not settings.LAZY_STARTUP:
+        from marketplace.semantic_search import refresh_in_background
+
+        refresh_in_background()
@@ -1,6 +1,32 @@
 from django.contrib import admin
-from .models import Company, Category, Product, BusinessHours, Promotion, Order, OrderItem, TopBurgerSection, TopBurgerItem, CompanyCategory, Country
+from .models import Company, Category, Product, BusinessHours, Promotion, Order, OrderItem, TopBurgerSection, TopBurgerItem, CompanyCategory, Country, ImageUploadTask
+from django import forms
+from django.contrib.admin.helpers import ActionForm
 from django.utils.html import format_html
+from .bulk import change_product_prices, extend_promotions, set_promotions_active
+from .uploads import defer_image_upload, deferred_uploads_enabled, pop_pending_images, upload_image
+from .admin_filters import AutocompleteFilter, AutocompleteFilterMediaMixin, EstimatedCountPaginator
+
+
+class DeferredImageUploadAdminMixin:
+    """
+    Evita que el guardado desde el admin suba las imágenes a Cloudinary dentro de la
+    petición: se encolan y las sube el worker process_image_uploads. Con
+    DEFERRED_IMAGE_UPLOADS desactivado se suben al guardar, también con variantes y LQIP.
+    """
+    deferred_image_fields = ()
+
+    def save_model(self, request, obj, form, change):
+        uploads = pop_pending_images(obj, self.deferred_image_fields)
+        super().save_model(request, obj, form, change)
+        deferred = deferred_uploads_enabled()
+        for field_name, uploaded_file in uploads.items():
+            if deferred:
+                defer_image_upload(obj, field_name, uploaded_file)
+            else:
+                upload_image(obj, field_name, uploaded_file)
+        if uploads and deferred:
+            self.message_user(request, "Las imágenes se están subiendo en segundo plano.")
 
 class BusinessHoursInline(admin.StackedInline):
     model = BusinessHours
@@ -30,10 +56,31 @@ class BusinessHoursInline(admin.StackedInline):
         }),
     )
 
+class PriceChangeActionForm(ActionForm):
+    percentage = forms.DecimalField(
+        required=False,
+        max_digits=5,
+        decimal_places=2,
+        min_value=-99,
+        label="Cambio de precio (%)"
+    )
+
+
+class ExtendPromotionsActionForm(ActionForm):
+    days = forms.IntegerField(required=False, min_value=1, max_value=365, label="Días a extender")
+
+
 @admin.register(Company)
-class CompanyAdmin(admin.ModelAdmin):
+class CompanyAdmin(DeferredImageUploadAdminMixin, admin.ModelAdmin):
+    deferred_image_fields = ('profile_picture', 'cover_photo')
     inlines = [BusinessHoursInline]
     list_display = ['name', 'get_business_hours']
+    # Evita una consulta de horarios por fila
+    list_select_related = ['business_hours']
+    # También lo usa el autocompletado de los filtros y formularios que apuntan a Company
+    search_fields = ['name']
+    ordering = ['name']
+    autocomplete_fields = ['user']
 
     def get_business_hours(self, obj):
         try:
@@ -67,24 +114,70 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'company', 'category', 'price')
-    list_filter = ('company', 'category')
-    search_fields = ('name', 'company__name')
+class ProductAdmin(DeferredImageUploadAdminMixin, AutocompleteFilterMediaMixin, admin.ModelAdmin):
+    deferred_image_fields = ('image',)
+    list_display = ('name', 'company', 'category', 'price', 'stock')
+    list_select_related = ('company', 'category')
+    list_filter = (('company', AutocompleteFilter), 'category')
+    search_fields = ('name', '^company__name')
+    autocomplete_fields = ('company', 'category')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = PriceChangeActionForm
+    actions = ['change_prices']
+
+    @admin.action(description="Aplicar cambio porcentual de precio")
+    def change_prices(self, request, queryset):
+        # Solo interesa el campo propio; 'action' no trae choices al reconstruir el formulario
+        form = PriceChangeActionForm(request.POST)
+        form.is_valid()
+        if form.cleaned_data.get('percentage') is None:
+            self.message_user(request, "Indique un porcentaje válido (p. ej. 10 o -15).", level='error')
+            return
+        updated = change_product_prices(queryset, form.cleaned_data['percentage'])
+        self.message_user(request, f"Precio actualizado en {updated} productos.")
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(AutocompleteFilterMediaMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'company', 'created_at', 'total')
-    search_fields = ('user__username', 'company__name')
-    list_filter = ('company', 'created_at')
+    list_select_related = ('user', 'company')
+    # Coincidencias exactas: usan los índices de id y username en lugar de LIKE '%...%'
+    search_fields = ('=id', '=user__username', '^company__name')
+    list_filter = (('company', AutocompleteFilter), 'created_at')
+    autocomplete_fields = ('user', 'company')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ('order', 'product', 'quantity', 'price')
-    search_fields = ('order__id', 'product__name')
+    list_select_related = ('order__user', 'product')
+    search_fields = ('=order__id', 'product__name')
+    autocomplete_fields = ('order', 'product')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-admin.site.register(TopBurgerSection)
-admin.site.register(TopBurgerItem)
+@admin.register(TopBurgerSection)
+class TopBurgerSectionAdmin(admin.ModelAdmin):
+    list_display = ('title', 'location', 'position', 'mode')
+    list_filter = ('mode',)
+    autocomplete_fields = ('auto_category', 'auto_country')
+    fieldsets = (
+        (None, {'fields': ('title', 'location', 'position', 'mode')}),
+        ('Modo automático', {'fields': ('auto_category', 'auto_country', 'auto_limit')}),
+    )
+
+@admin.register(TopBurgerItem)
+class TopBurgerItemAdmin(DeferredImageUploadAdminMixin, admin.ModelAdmin):
+    deferred_image_fields = ('featured_image',)
+    list_select_related = ('section', 'company')
+    autocomplete_fields = ('company',)
+
+@admin.register(ImageUploadTask)
+class ImageUploadTaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'content_type', 'object_id', 'field_name', 'status', 'attempts', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'updated_at')
 
 @admin.register(CompanyCategory)
 class CompanyCategoryAdmin(admin.ModelAdmin):
@@ -98,7 +191,14 @@ class CountryAdmin(admin.ModelAdmin):
     list_per_page = 20
 
 @admin.register(Promotion)
-class PromotionAdmin(admin.ModelAdmin):
+class PromotionAdmin(DeferredImageUploadAdminMixin, AutocompleteFilterMediaMixin, admin.ModelAdmin):
+    deferred_image_fields = ('banner',)
+    list_select_related = ('company', 'product', 'category')
+    autocomplete_fields = ('company', 'product', 'category')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = ExtendPromotionsActionForm
+    actions = ['activate_promotions', 'deactivate_promotions', 'extend_end_dates']
     list_display = (
         'title',
         'company',
@@ -113,18 +213,20 @@ class PromotionAdmin(admin.ModelAdmin):
     list_filter = (
         'is_active',
         'discount_type',
-        'company',
+        ('company', AutocompleteFilter),
         'category',
         ('start_date', admin.DateFieldListFilter),
         ('end_date', admin.DateFieldListFilter),
     )
     
+    # Título y descripción con índice trigram en Postgres; los nombres relacionados por
+    # prefijo (^), que también resuelven sus índices trigram
     search_fields = (
         'title',
         'description',
-        'company__name',
-        'product__name',
-        'category__name'
+        '^company__name',
+        '^product__name',
+        '^category__name',
     )
     
     readonly_fields = (
@@ -153,7 +255,7 @@ class PromotionAdmin(admin.ModelAdmin):
         ('Fechas y Estado', {
             'fields': (
                 ('start_date', 'end_date'),
-                'is_active',
+                ('is_active', 'scheduled'),
                 ('created_at', 'updated_at'),
             )
         }),
@@ -177,4 +279,24 @@ class PromotionAdmin(admin.ModelAdmin):
                 obj.banner.url
             )
         return "Sin banner"
-    banner_preview.short_description = "Vista previa del banner"
\ No newline at end of file
+    banner_preview.short_description = "Vista previa del banner"
+
+    @admin.action(description="Activar promociones seleccionadas")
+    def activate_promotions(self, request, queryset):
+        updated = set_promotions_active(queryset, True)
+        self.message_user(request, f"{updated} promociones activadas.")
+
+    @admin.action(description="Desactivar promociones seleccionadas")
+    def deactivate_promotions(self, request, queryset):
+        updated = set_promotions_active(queryset, False)
+        self.message_user(request, f"{updated} promociones desactivadas.")
+
+    @admin.action(description="Extender fecha de fin")
+    def extend_end_dates(self, request, queryset):
+        form = ExtendPromotionsActionForm(request.POST)
+        form.is_valid()
+        if not form.cleaned_data.get('days'):
+            self.message_user(request, "Indique los días a extender.", level='error')
+            return
+        updated = extend_promotions(queryset, form.cleaned_data['days'])
+        self.message_user(request, f"{updated} promociones extendidas {form.cleaned_data['days']} días.")
@@ -0,0 +1,137 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Esquema OpenAPI generado una sola vez por versión del código: drf-spectacular recorre todos los
+# viewsets y serializers, lo que cuesta segundos de CPU. Se guarda ya renderizado y comprimido en
+# API_SCHEMA_ROOT (lo puede dejar listo build_api_schema) y en memoria del proceso.
+
+# Formato -> (renderer de drf-spectacular, content type). Los renderers se importan al generar
+FORMATS = {
+    'yaml': ('drf_spectacular.renderers.OpenApiYamlRenderer', 'application/vnd.oai.openapi'),
+    'json': ('drf_spectacular.renderers.OpenApiJsonRenderer', 'application/vnd.oai.openapi+json'),
+}
+
+SOURCE_DIRS = ('backend', 'marketplace')
+
+_artifacts = {}
+_lock = threading.Lock()
+_code_version = None
+
+
+def get_schema_root():
+    return Path(getattr(settings, 'API_SCHEMA_ROOT', Path(settings.BASE_DIR) / 'api_schema'))
+
+
+def code_version():
+    """
+    Versión del código desplegado: API_SCHEMA_VERSION (p. ej. el commit del slug) o, si no
+    se define, un hash del contenido de los módulos Python del proyecto.
+    """
+    global _code_version
+    if _code_version is None:
+        version = getattr(settings, 'API_SCHEMA_VERSION', None)
+        if not version:
+            digest = hashlib.sha256()
+            for directory in SOURCE_DIRS:
+                for path in sorted((Path(settings.BASE_DIR) / directory).rglob('*.py')):
+                    digest.update(str(path.relative_to(settings.BASE_DIR)).encode('utf-8'))
+                    digest.update(path.read_bytes())
+            version = digest.hexdigest()
+        _code_version = version[:16]
+    return _code_version
+
+
+def artifact_path(version, fmt, compressed=False):
+    suffix = '.gz' if compressed else ''
+    return get_schema_root() / f'openapi-{version}.{fmt}{suffix}'
+
+
+def render_schema():
+    """Genera el esquema y lo renderiza en todos los formatos: {formato: bytes}."""
+    from drf_spectacular.generators import SchemaGenerator
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {
+        fmt: import_string(renderer)().render(schema, renderer_context={})
+        for fmt, (renderer, _) in FORMATS.items()
+    }
+
+
+def _write_atomic(path, content):
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def build_artifacts(version=None):
+    """Genera y guarda en disco las variantes (plana y gzip) de cada formato; borra las de otras versiones."""
+    version = version or code_version()
+    root = get_schema_root()
+    root.mkdir(parents=True, exist_ok=True)
+    artifacts = {}
+    for fmt, content in render_schema().items():
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        _write_atomic(artifact_path(version, fmt), content)
+        _write_atomic(artifact_path(version, fmt, compressed=True), compressed)
+        artifacts[fmt] = (content, compressed)
+    for path in root.glob('openapi-*'):
+        if not path.name.startswith(f'openapi-{version}.'):
+            path.unlink(missing_ok=True)
+    return artifacts
+
+
+def _load_artifacts(version):
+    artifacts = {}
+    for fmt in FORMATS:
+        try:
+            artifacts[fmt] = (
+                artifact_path(version, fmt).read_bytes(),
+                artifact_path(version, fmt, compressed=True).read_bytes(),
+            )
+        except FileNotFoundError:
+            return None
+    return artifacts
+
+
+def stale_formats(version=None):
+    """Formatos cuyo artefacto guardado falta o no coincide con el esquema generado ahora."""
+    version = version or code_version()
+    stored = _load_artifacts(version) or {}
+    return [fmt for fmt, content in render_schema().items() if fmt not in stored or stored[fmt][0] != content]
+
+
+def get_artifact(fmt):
+    """(contenido, contenido_gzip) del formato para la versión actual: memoria, disco o generación."""
+    version = code_version()
+    artifacts = _artifacts.get(version)
+    if artifacts is None:
+        with _lock:
+            artifacts = _artifacts.get(version)
+            if artifacts is None:
+                artifacts = _load_artifacts(version)
+                if artifacts is None:
+                    logger.info(f"Generating OpenAPI schema for code version {version}")
+                    artifacts = build_artifacts(version)
+                _artifacts.clear()
+                _artifacts[version] = artifacts
+    return artifacts[fmt]
+
+
+def negotiate_format(request):
+    """Igual que SpectacularAPIView: YAML por defecto, JSON con ?format=json o Accept JSON."""
+    requested = request.GET.get('format')
+    if requested in FORMATS:
+        return requested
+    accept = request.headers.get('Accept', '')
+    if 'json' in accept and 'yaml' not in accept:
+        return 'json'
+    return 'yaml'
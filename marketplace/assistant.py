@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .cache import bump_version, get_version
+from .models import BusinessHours, Company, Product, Promotion
+
+logger = logging.getLogger(__name__)
+
+# Asistente del catálogo: respuestas en streaming de un LLM enchufable, ancladas en los datos
+# de empresas, productos, promociones y horarios, y cacheadas por pregunta normalizada y
+# versión del catálogo.
+
+CATALOG_NAMESPACE = 'catalog'
+
+SYSTEM_PROMPT = (
+    "Eres el asistente de Findout, un marketplace de comida. Responde en el idioma de la "
+    "pregunta, de forma breve, usando solo los datos del catálogo que siguen. Si los datos no "
+    "alcanzan para responder, dilo. Hora local actual: {now}.\n\nCatálogo:\n{context}"
+)
+
+
+class OpenAICompatibleClient:
+    """
+    Cliente de chat en streaming para cualquier API compatible con /chat/completions de
+    OpenAI (la real o el servidor de pruebas assistant_stub_server).
+    """
+
+    def __init__(self, base_url=None, api_key=None, model=None, timeout=None):
+        self.base_url = (base_url or settings.ASSISTANT_LLM_BASE_URL).rstrip('/')
+        self.api_key = api_key if api_key is not None else settings.OPENAI_API_KEY
+        self.model = model or settings.ASSISTANT_LLM_MODEL
+        self.timeout = timeout or getattr(settings, 'ASSISTANT_LLM_TIMEOUT', 60)
+
+    async def stream(self, messages):
+        import aiohttp
+
+        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+        payload = {'model': self.model, 'messages': messages, 'stream': True}
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.post(f'{self.base_url}/chat/completions', json=payload, headers=headers) as response:
+                response.raise_for_status()
+                async for raw_line in response.content:
+                    line = raw_line.decode('utf-8').strip()
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        return
+                    delta = json.loads(data)['choices'][0].get('delta', {})
+                    if delta.get('content'):
+                        yield delta['content']
+
+
+def get_llm_client():
+    client = getattr(settings, 'ASSISTANT_LLM_CLIENT', 'marketplace.assistant.OpenAICompatibleClient')
+    return import_string(client)()
+
+
+def normalize_prompt(prompt):
+    """Minúsculas, sin tildes ni puntuación y con espacios simples: la clave de la caché."""
+    # embeddings importa NumPy; las señales importan este módulo al arrancar
+    from .embeddings import normalize_text
+
+    return ' '.join(re.findall(r'\w+', normalize_text(prompt)))
+
+
+def invalidate_catalog():
+    bump_version(CATALOG_NAMESPACE)
+
+
+def local_now():
+    return timezone.now().astimezone(ZoneInfo(getattr(settings, 'ASSISTANT_TIME_ZONE', 'America/Costa_Rica')))
+
+
+def answer_key(prompt, now):
+    # La hora forma parte de la clave: "abierto ahora" no vale la misma respuesta todo el día
+    digest = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+    return f"marketplace:assistant:c{get_version(CATALOG_NAMESPACE)}:{now.strftime('%Y%m%d%H')}:{digest}"
+
+
+def _day_hours(hours, moment):
+    day = moment.strftime('%A').lower()
+    return getattr(hours, f'{day}_open'), getattr(hours, f'{day}_close')
+
+
+def _is_open(hours, now):
+    """
+    Un cierre anterior o igual a la apertura es un turno nocturno (p. ej. 18:00-02:00): abre hoy
+    a la hora de apertura y cierra al día siguiente, así que también cuenta el turno de ayer.
+    """
+    if hours is None:
+        return None
+    current = now.time()
+    opens, closes = _day_hours(hours, now)
+    if opens and closes:
+        if opens < closes and opens <= current < closes:
+            return True
+        if closes <= opens and current >= opens:
+            return True
+    opens, closes = _day_hours(hours, now - timedelta(days=1))
+    return bool(opens and closes and closes <= opens and current < closes)
+
+
+def _in_worker_thread(func):
+    """Ejecuta func en un hilo del pool (en paralelo con las demás) y recicla su conexión."""
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def _search_hits(prompt, limit):
+    from .semantic_search import search as semantic_search
+
+    return semantic_search([prompt], k=limit)[0]
+
+
+def _companies(ids):
+    return list(Company.objects.filter(pk__in=ids).select_related('category', 'country'))
+
+
+def _products(ids):
+    return list(Product.objects.filter(pk__in=ids).select_related('company', 'category'))
+
+
+def _promotions(company_ids, now):
+    return list(Promotion.objects.filter(
+        company_id__in=company_ids,
+        is_active=True,
+        start_date__lte=now
+    ).filter(
+        Q(end_date__gte=now) | Q(end_date__isnull=True)
+    ).select_related('product')[:20])
+
+
+def _hours(company_ids):
+    return {hours.company_id: hours for hours in BusinessHours.objects.filter(company_id__in=company_ids)}
+
+
+async def fetch_grounding(prompt, now, limit=None):
+    """
+    Datos de apoyo para la pregunta. Primero la búsqueda semántica; después empresas,
+    productos, promociones vigentes y horarios se consultan en paralelo.
+    """
+    limit = limit or getattr(settings, 'ASSISTANT_GROUNDING_LIMIT', 8)
+    hits = await _in_worker_thread(_search_hits)(prompt, limit)
+    company_ids = [object_id for name, object_id, _ in hits if name == 'company']
+    product_ids = [object_id for name, object_id, _ in hits if name == 'product']
+
+    products = await _in_worker_thread(_products)(product_ids)
+    related_company_ids = list(dict.fromkeys(company_ids + [product.company_id for product in products]))
+    companies, promotions, hours = await asyncio.gather(
+        _in_worker_thread(_companies)(related_company_ids),
+        _in_worker_thread(_promotions)(related_company_ids, now),
+        _in_worker_thread(_hours)(related_company_ids),
+    )
+    return build_context(companies, products, promotions, hours, now)
+
+
+def build_context(companies, products, promotions, hours, now):
+    lines = []
+    for company in companies:
+        is_open = _is_open(hours.get(company.pk), now)
+        status = {True: 'abierto ahora', False: 'cerrado ahora', None: 'horario desconocido'}[is_open]
+        lines.append(
+            f"- Empresa #{company.pk} {company.name} ({company.category.name if company.category_id else 'sin categoría'}, "
+            f"{company.country.name if company.country_id else 'sin país'}), {company.address}. {status}. "
+            f"{company.description[:200]}"
+        )
+    for product in products:
+        lines.append(
+            f"- Producto #{product.pk} {product.name} de {product.company.name}: "
+            f"{product.effective_price or product.price}. {product.description[:200]}"
+        )
+    for promotion in promotions:
+        lines.append(
+            f"- Promoción #{promotion.pk} {promotion.title} en empresa #{promotion.company_id}"
+            f"{' para ' + promotion.product.name if promotion.product_id else ''}"
+        )
+    return '\n'.join(lines) or '(sin resultados)'
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def answer_stream(prompt):
+    """
+    Genera eventos SSE: 'token' por fragmento y 'done' al final. Una pregunta repetida con el
+    mismo catálogo se sirve desde la caché sin consultar la base de datos ni el LLM.
+    """
+    now = local_now()
+    key = await sync_to_async(answer_key)(prompt, now)
+    cached = await cache.aget(key)
+    if cached is not None:
+        yield sse('token', {'text': cached})
+        yield sse('done', {'cached': True})
+        return
+
+    parts = []
+    try:
+        context = await fetch_grounding(prompt, now)
+        messages = [
+            {'role': 'system', 'content': SYSTEM_PROMPT.format(now=now.strftime('%A %H:%M'), context=context)},
+            {'role': 'user', 'content': prompt},
+        ]
+        async for token in get_llm_client().stream(messages):
+            parts.append(token)
+            yield sse('token', {'text': token})
+    except Exception as e:
+        logger.error(f"Error streaming assistant answer: {str(e)}")
+        yield sse('error', {'error': 'The assistant is not available right now'})
+        return
+
+    # Solo se cachean respuestas completas
+    await cache.aset(key, ''.join(parts), getattr(settings, 'ASSISTANT_CACHE_TIMEOUT', 3600))
+    yield sse('done', {'cached': False})
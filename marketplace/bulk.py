@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .assistant import invalidate_catalog
+from .catalog import invalidate_facets
+from .country_catalog import invalidate_company_countries
+from .home_feed import request_refresh
+from .pricing import recompute_effective_prices
+from .promotion_feed import invalidate_promotion_feed
+from .promotions import promotions_changed
+
+# Operaciones masivas compartidas por las acciones del admin y el API. Cada una es un único
+# UPDATE seguido de una sola invalidación de cachés, en lugar de save() + señales por objeto.
+
+
+def _rows(queryset):
+    return list(queryset.values('id', 'company_id', 'product_id', 'category_id'))
+
+
+@transaction.atomic
+def set_promotions_active(queryset, active):
+    """
+    Activa o desactiva en bloque. Solo se activan las que no han terminado. Un cambio manual
+    quita la marca de programada: el programador ya no las activa por su cuenta.
+    """
+    now = timezone.now()
+    queryset = queryset.filter(is_active=not active)
+    if active:
+        queryset = queryset.filter(Q(end_date__isnull=True) | Q(end_date__gt=now))
+    rows = _rows(queryset)
+    updated = queryset.model.objects.filter(pk__in=[row['id'] for row in rows]).update(
+        is_active=active,
+        scheduled=False,
+        updated_at=now
+    )
+    transaction.on_commit(lambda: promotions_changed(rows))
+    return updated
+
+
+@transaction.atomic
+def extend_promotions(queryset, days):
+    """Extiende la fecha de fin de las promociones que tienen una."""
+    queryset = queryset.filter(end_date__isnull=False)
+    rows = _rows(queryset)
+    updated = queryset.model.objects.filter(pk__in=[row['id'] for row in rows]).update(
+        end_date=F('end_date') + timedelta(days=days),
+        updated_at=timezone.now()
+    )
+    transaction.on_commit(lambda: promotions_changed(rows))
+    return updated
+
+
+def products_changed(queryset):
+    recompute_effective_prices(queryset)
+    invalidate_facets()
+    invalidate_catalog()
+    invalidate_promotion_feed()
+    invalidate_company_countries(queryset.values_list('company_id', flat=True).distinct())
+    request_refresh()
+
+
+@transaction.atomic
+def change_product_prices(queryset, percentage):
+    """Aplica un cambio porcentual (p. ej. 10 o -15) al precio de los productos."""
+    factor = (Decimal(100) + Decimal(percentage)) / Decimal(100)
+    updated = queryset.update(price=Round(F('price') * factor, 2))
+    transaction.on_commit(lambda: products_changed(queryset))
+    return updated
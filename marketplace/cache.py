@@ -0,0 +1,364 @@
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Caché de dos niveles: un LRU en memoria de cada proceso delante del backend compartido
+# (CACHES['default']). Los valores se guardan en el compartido como (valor, fresco_hasta): pasado
+# ese instante se sirven obsoletos mientras se recalculan en segundo plano (stale-while-revalidate),
+# y los cálculos concurrentes de una misma clave se agrupan en uno solo (single-flight).
+
+
+def version_key(namespace):
+    return f'marketplace:version:{namespace}'
+
+
+def get_version(namespace):
+    """Contador de versión del espacio de nombres; forma parte de las claves que invalida."""
+    version = cache.get(version_key(namespace))
+    if version is None:
+        cache.add(version_key(namespace), 1, None)
+        version = cache.get(version_key(namespace), 1)
+    return version
+
+
+def bump_version(namespace):
+    """Invalida en O(1) todas las claves del espacio de nombres: las nuevas usarán otra versión."""
+    try:
+        return cache.incr(version_key(namespace))
+    except ValueError:
+        cache.set(version_key(namespace), 2, None)
+        return 2
+
+
+def versioned_key(namespace, *parts):
+    suffix = ':'.join(str(part) for part in parts)
+    return f'marketplace:{namespace}:v{get_version(namespace)}:{suffix}'
+
+
+class LocalLRU:
+    """Primer nivel: entradas con caducidad en memoria del proceso, con tope de tamaño."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            envelope, expires = entry
+            if expires <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return envelope
+
+    def set(self, key, envelope, expires):
+        with self.lock:
+            self.entries[key] = (envelope, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class PartitionedLRU:
+    """
+    Nivel local repartido: las claves de partition_key() van a un LRU propio de su partición
+    (p. ej. un país) y el resto al LRU general, así un mercado con mucho tráfico no desaloja
+    las entradas de los demás.
+    """
+
+    def __init__(self, max_entries, partition_max_entries):
+        self.default = LocalLRU(max_entries)
+        self.partition_max_entries = partition_max_entries
+        self.partitions = {}
+        self.lock = threading.Lock()
+
+    def partition_for(self, key):
+        if not key.startswith(PARTITION_PREFIX):
+            return self.default
+        name = key[len(PARTITION_PREFIX):].split(':', 1)[0]
+        with self.lock:
+            partition = self.partitions.get(name)
+            if partition is None:
+                partition = self.partitions[name] = LocalLRU(self.partition_max_entries)
+            return partition
+
+    def get(self, key, now):
+        return self.partition_for(key).get(key, now)
+
+    def set(self, key, envelope, expires):
+        self.partition_for(key).set(key, envelope, expires)
+
+    def delete(self, key):
+        self.partition_for(key).delete(key)
+
+    def clear(self):
+        self.default.clear()
+        with self.lock:
+            partitions = list(self.partitions.values())
+        for partition in partitions:
+            partition.clear()
+
+
+PARTITION_PREFIX = 'marketplace:partition:'
+
+
+def partition_key(partition, namespace, *parts):
+    """Clave versionada dentro de una partición del nivel local (ver PartitionedLRU)."""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{PARTITION_PREFIX}{partition}:{namespace}:v{get_version(namespace)}:{suffix}'
+
+
+class CacheStats:
+    FIELDS = ('local_hits', 'shared_hits', 'stale_hits', 'misses', 'coalesced', 'refreshes')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def incr(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def reset(self):
+        with self.lock:
+            self.counts = dict.fromkeys(self.FIELDS, 0)
+
+    def snapshot(self):
+        with self.lock:
+            counts = dict(self.counts)
+        hits = counts['local_hits'] + counts['shared_hits'] + counts['stale_hits']
+        total = hits + counts['misses'] + counts['coalesced']
+        counts['hit_ratio'] = round(hits / total, 4) if total else None
+        return counts
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.has_value = False
+        self.value = None
+        self.error = None
+
+
+local_cache = PartitionedLRU(
+    getattr(settings, 'CACHE_LOCAL_MAX_ENTRIES', 1000),
+    getattr(settings, 'CACHE_PARTITION_MAX_ENTRIES', 50)
+)
+stats = CacheStats()
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _local_timeout():
+    return getattr(settings, 'CACHE_LOCAL_TIMEOUT', 5)
+
+
+def _lock_timeout():
+    return getattr(settings, 'CACHE_LOCK_TIMEOUT', 10)
+
+
+def jittered(timeout):
+    """TTL con variación aleatoria para que las claves creadas juntas no caduquen juntas."""
+    jitter = getattr(settings, 'CACHE_TTL_JITTER', 0.1)
+    return timeout * random.uniform(1 - jitter, 1 + jitter)
+
+
+def _remember_locally(key, envelope, now):
+    # El nivel local nunca guarda más allá de la frescura del valor
+    local_cache.set(key, envelope, min(envelope[1], now + _local_timeout()))
+
+
+def _envelopes(mapping, timeout, stale_timeout):
+    now = time.time()
+    for key, value in mapping.items():
+        if timeout is None:
+            # Sin caducidad: solo se invalida borrando o cambiando de versión
+            yield key, (value, float('inf')), None, now
+            continue
+        fresh_for = jittered(timeout)
+        yield key, (value, now + fresh_for), int(fresh_for + stale_timeout) + 1, now
+
+
+def _store(key, value, timeout, stale_timeout):
+    for key, envelope, ttl, now in _envelopes({key: value}, timeout, stale_timeout):
+        cache.set(key, envelope, ttl)
+        _remember_locally(key, envelope, now)
+    return value
+
+
+def _stale_timeout(stale_timeout):
+    if stale_timeout is None:
+        return getattr(settings, 'CACHE_STALE_TIMEOUT', 60)
+    return stale_timeout
+
+
+def get_or_set(key, compute, timeout, stale_timeout=None, background=True):
+    """
+    Devuelve el valor de la clave consultando el LRU local y luego el backend compartido.
+    En un fallo, compute() se ejecuta una sola vez aunque lleguen muchas peticiones a la vez.
+    Un valor caducado se recalcula en un hilo aparte, así que compute() no debe depender de
+    la petición; si depende (background=False), lo recalcula una sola de las peticiones que
+    lo encuentran caducado mientras las demás siguen sirviéndolo.
+    """
+    stale_timeout = _stale_timeout(stale_timeout)
+    now = time.time()
+
+    envelope = local_cache.get(key, now)
+    if envelope is not None:
+        stats.incr('local_hits')
+        return envelope[0]
+
+    envelope = cache.get(key)
+    if envelope is not None:
+        value, fresh_until = envelope
+        if fresh_until > now:
+            stats.incr('shared_hits')
+            _remember_locally(key, envelope, now)
+        else:
+            stats.incr('stale_hits')
+            if background:
+                _revalidate_in_background(key, compute, timeout, stale_timeout)
+            else:
+                value = _revalidate_inline(key, value, compute, timeout, stale_timeout)
+        return value
+
+    return _single_flight(key, compute, timeout, stale_timeout)
+
+
+def _single_flight(key, compute, timeout, stale_timeout):
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        stats.incr('coalesced')
+        flight.done.wait(_lock_timeout())
+        if flight.error is not None:
+            raise flight.error
+        if flight.has_value:
+            return flight.value
+        # El cálculo en curso no terminó a tiempo o no llegó a publicar un valor
+        return _store(key, compute(), timeout, stale_timeout)
+
+    stats.incr('misses')
+    try:
+        flight.value = _compute_once_across_processes(key, compute, timeout, stale_timeout)
+        flight.has_value = True
+        return flight.value
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _compute_once_across_processes(key, compute, timeout, stale_timeout):
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, _lock_timeout()):
+        try:
+            return _store(key, compute(), timeout, stale_timeout)
+        finally:
+            cache.delete(lock_key)
+
+    # Otro proceso está calculando la misma clave: esperar a que la publique
+    deadline = time.monotonic() + _lock_timeout()
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        envelope = cache.get(key)
+        if envelope is not None:
+            _remember_locally(key, envelope, time.time())
+            return envelope[0]
+    return _store(key, compute(), timeout, stale_timeout)
+
+
+def _claim_refresh(key):
+    """Registra el recálculo de la clave en este proceso; None si ya hay uno en curso."""
+    with _flights_lock:
+        if key in _flights:
+            return None
+        flight = _flights[key] = _Flight()
+        return flight
+
+
+def _refresh(key, compute, timeout, stale_timeout, flight):
+    """Recalcula y publica la clave si ningún otro proceso lo está haciendo. Nunca lanza."""
+    lock_key = f'{key}:lock'
+    try:
+        if cache.add(lock_key, 1, _lock_timeout()):
+            try:
+                flight.value = _store(key, compute(), timeout, stale_timeout)
+                flight.has_value = True
+                stats.incr('refreshes')
+            finally:
+                cache.delete(lock_key)
+    except Exception as e:
+        logger.error(f"Error revalidating cache key {key}: {str(e)}")
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _revalidate_in_background(key, compute, timeout, stale_timeout):
+    flight = _claim_refresh(key)
+    if flight is None:
+        return
+
+    def refresh():
+        try:
+            _refresh(key, compute, timeout, stale_timeout, flight)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=refresh, name='cache-revalidate', daemon=True).start()
+
+
+def _revalidate_inline(key, stale_value, compute, timeout, stale_timeout):
+    flight = _claim_refresh(key)
+    if flight is None:
+        return stale_value
+    _refresh(key, compute, timeout, stale_timeout, flight)
+    return flight.value if flight.has_value else stale_value
+
+
+def set_many(mapping, timeout, stale_timeout=None):
+    """Publica valores ya calculados (precalentado) con el mismo formato que get_or_set()."""
+    stale_timeout = _stale_timeout(stale_timeout)
+    entries = list(_envelopes(mapping, timeout, stale_timeout))
+    if not entries:
+        return
+    # Una sola escritura con el TTL mayor; la frescura de cada clave sigue siendo la suya
+    ttls = [ttl for _, _, ttl, _ in entries]
+    cache.set_many({key: envelope for key, envelope, _, _ in entries}, None if None in ttls else max(ttls))
+    for key, envelope, _, now in entries:
+        _remember_locally(key, envelope, now)
+
+
+def delete(key):
+    """Borra la clave en este proceso y en el compartido; otros procesos la olvidan al caducar su LRU."""
+    local_cache.delete(key)
+    cache.delete(key)
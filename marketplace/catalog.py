@@ -0,0 +1,155 @@
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Case, CharField, Count, Exists, OuterRef, Q, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import bump_version, get_or_set, versioned_key
+from .models import Promotion
+
+PRODUCT_FACETS_NAMESPACE = 'product_facets'
+
+PRODUCT_ORDERINGS = {
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+    'effective_price': ('effective_price', 'id'),
+    '-effective_price': ('-effective_price', '-id'),
+    'newest': ('-id',),
+}
+
+FILTER_PARAMS = (
+    'company', 'category', 'min_price', 'max_price', 'min_effective_price', 'max_effective_price', 'has_promotion'
+)
+
+
+def get_price_buckets():
+    return getattr(settings, 'PRODUCT_PRICE_BUCKETS', (0, 5, 10, 25, 50, 100))
+
+
+def live_product_promotions():
+    now = timezone.now()
+    return Promotion.objects.filter(
+        product=OuterRef('pk'),
+        is_active=True,
+        start_date__lte=now
+    ).filter(
+        Q(end_date__gte=now) | Q(end_date__isnull=True)
+    )
+
+
+def _parse_decimal(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise serializers.ValidationError({name: 'Debe ser un número válido'})
+
+
+def _parse_id(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    if not str(value).isdigit():
+        raise serializers.ValidationError({name: 'Debe ser un identificador numérico'})
+    return int(value)
+
+
+def filter_products(queryset, params):
+    """
+    Aplica los filtros del catálogo: company, category, min_price, max_price,
+    min_effective_price, max_effective_price, has_promotion=true y ordering
+    (price, -price, effective_price, -effective_price, name, -name, newest).
+    """
+    company = _parse_id(params, 'company')
+    category = _parse_id(params, 'category')
+    min_price = _parse_decimal(params, 'min_price')
+    max_price = _parse_decimal(params, 'max_price')
+    min_effective_price = _parse_decimal(params, 'min_effective_price')
+    max_effective_price = _parse_decimal(params, 'max_effective_price')
+
+    if company is not None:
+        queryset = queryset.filter(company_id=company)
+    if category is not None:
+        queryset = queryset.filter(category_id=category)
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+    if min_effective_price is not None:
+        queryset = queryset.filter(effective_price__gte=min_effective_price)
+    if max_effective_price is not None:
+        queryset = queryset.filter(effective_price__lte=max_effective_price)
+    if params.get('has_promotion', '').lower() in ('1', 'true'):
+        queryset = queryset.filter(Exists(live_product_promotions()))
+
+    ordering = params.get('ordering')
+    if ordering:
+        if ordering not in PRODUCT_ORDERINGS:
+            raise serializers.ValidationError({
+                'ordering': f"Debe ser uno de: {', '.join(PRODUCT_ORDERINGS)}"
+            })
+        queryset = queryset.order_by(*PRODUCT_ORDERINGS[ordering])
+    return queryset
+
+
+def price_bucket_expression():
+    buckets = get_price_buckets()
+    whens = [
+        When(price__gte=low, price__lt=high, then=Value(f'{low}-{high}'))
+        for low, high in zip(buckets, buckets[1:])
+    ]
+    return Case(*whens, default=Value(f'{buckets[-1]}+'), output_field=CharField())
+
+
+def compute_facets(queryset):
+    """
+    Conteos por categoría, rango de precio y empresa en una sola consulta agregada:
+    se agrupa por la terna (categoría, empresa, rango) y se pliega cada dimensión en Python.
+    """
+    rows = queryset.order_by().annotate(
+        price_bucket=price_bucket_expression()
+    ).values('category_id', 'category__name', 'company_id', 'company__name', 'price_bucket').annotate(
+        total=Count('id')
+    )
+
+    categories, companies = {}, {}
+    price_buckets = {label: 0 for label in _bucket_labels()}
+    for row in rows:
+        if row['category_id'] is not None:
+            entry = categories.setdefault(row['category_id'], {
+                'id': row['category_id'], 'name': row['category__name'], 'count': 0
+            })
+            entry['count'] += row['total']
+        entry = companies.setdefault(row['company_id'], {
+            'id': row['company_id'], 'name': row['company__name'], 'count': 0
+        })
+        entry['count'] += row['total']
+        price_buckets[row['price_bucket']] += row['total']
+
+    return {
+        'category': sorted(categories.values(), key=lambda item: -item['count']),
+        'company': sorted(companies.values(), key=lambda item: -item['count']),
+        'price': [{'range': label, 'count': count} for label, count in price_buckets.items()],
+    }
+
+
+def _bucket_labels():
+    buckets = get_price_buckets()
+    return [f'{low}-{high}' for low, high in zip(buckets, buckets[1:])] + [f'{buckets[-1]}+']
+
+
+def get_facets(queryset, params):
+    """Facetas cacheadas por combinación de filtros; la versión cambia con productos o promociones."""
+    normalized = '&'.join(f'{name}={params.get(name, "").lower()}' for name in FILTER_PARAMS)
+    key = versioned_key(PRODUCT_FACETS_NAMESPACE, hashlib.md5(normalized.encode('utf-8')).hexdigest())
+    return get_or_set(key, lambda: compute_facets(queryset), getattr(settings, 'PRODUCT_FACETS_TIMEOUT', 600))
+
+
+def invalidate_facets():
+    bump_version(PRODUCT_FACETS_NAMESPACE)
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.db.models import Q
+
+# Los ids de pedido se asignan al insertar, no al confirmar: un pedido con id menor puede
+# confirmarse después de que el checkpoint haya pasado por encima. Los ids que faltaban por
+# debajo del checkpoint se guardan como huecos abiertos y se vuelven a buscar en cada ejecución
+# hasta que aparecen o caducan (la transacción se revirtió o el pedido se borró).
+
+
+def get_gap_timeout():
+    return getattr(settings, 'CHECKPOINT_GAP_TIMEOUT', 600)
+
+
+def get_max_gaps():
+    return getattr(settings, 'CHECKPOINT_MAX_GAPS', 10000)
+
+
+def pending_orders(checkpoint, field='id'):
+    """Q de los pedidos por procesar: posteriores al checkpoint o en un hueco abierto."""
+    condition = Q(**{f'{field}__gt': checkpoint.last_order_id})
+    if checkpoint.open_gaps:
+        condition |= Q(**{f'{field}__in': [int(order_id) for order_id in checkpoint.open_gaps]})
+    return condition
+
+
+def advance(checkpoint, processed_ids, record_gaps=True, now=None):
+    """
+    Avanza last_order_id al mayor id procesado, cierra los huecos procesados y abre uno por
+    cada id intermedio que no apareció (solo los get_max_gaps() más recientes). No guarda.
+    """
+    now = now or time.time()
+    processed_ids = set(processed_ids)
+    gaps = {
+        int(order_id): opened for order_id, opened in checkpoint.open_gaps.items()
+        if opened > now - get_gap_timeout() and int(order_id) not in processed_ids
+    }
+    if processed_ids and max(processed_ids) > checkpoint.last_order_id:
+        highest = max(processed_ids)
+        if record_gaps:
+            first = max(checkpoint.last_order_id + 1, highest - get_max_gaps())
+            for order_id in range(first, highest):
+                if order_id not in processed_ids:
+                    gaps[order_id] = now
+        checkpoint.last_order_id = highest
+    # Si hay demasiados se conservan los más recientes, que son los que aún pueden confirmarse
+    newest = sorted(gaps, reverse=True)[:get_max_gaps()]
+    checkpoint.open_gaps = {str(order_id): gaps[order_id] for order_id in newest}
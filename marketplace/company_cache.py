@@ -0,0 +1,55 @@
+from django.conf import settings
+
+from .cache import bump_version, get_or_set, get_version
+
+# Caché read-through de las respuestas de empresas. Cada empresa tiene su propio contador de
+# versión; el listado tiene uno global y los datos compartidos (países, categorías) otro.
+# Invalidar es siempre un incr: nunca se recorren claves.
+
+LIST_NAMESPACE = 'company_list'
+SHARED_NAMESPACE = 'company_shared'
+
+
+def company_namespace(company_id):
+    return f'company:{company_id}'
+
+
+def get_timeout():
+    return getattr(settings, 'COMPANY_CACHE_TIMEOUT', 600)
+
+
+def detail_key(company_id):
+    return (
+        f'marketplace:company_detail:{company_id}'
+        f':v{get_version(company_namespace(company_id))}:s{get_version(SHARED_NAMESPACE)}'
+    )
+
+
+def list_key(params):
+    """Una entrada por combinación de filtros soportados por CompanyViewSet."""
+    filters = ':'.join(f'{name}={params.get(name, "")}' for name in ('category', 'country'))
+    return (
+        f'marketplace:company_list:v{get_version(LIST_NAMESPACE)}'
+        f':s{get_version(SHARED_NAMESPACE)}:{filters}'
+    )
+
+
+def get_or_build(key, build):
+    """
+    Devuelve el payload cacheado o lo construye con build() y lo guarda. build() usa la
+    petición y la vista, así que un valor caducado se recalcula dentro de la petición.
+    """
+    return get_or_set(key, build, get_timeout(), background=False)
+
+
+def invalidate_companies(company_ids):
+    """Invalida el detalle de las empresas indicadas y todos los listados."""
+    for company_id in set(company_ids):
+        if company_id is not None:
+            bump_version(company_namespace(company_id))
+    bump_version(LIST_NAMESPACE)
+
+
+def invalidate_all_companies():
+    """Para cambios en países o categorías de empresa, que pueden afectar a cualquier empresa."""
+    bump_version(SHARED_NAMESPACE)
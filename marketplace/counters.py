@@ -0,0 +1,156 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import F
+
+from .models import Company, Promotion, TopBurgerItem
+
+logger = logging.getLogger(__name__)
+
+# Contadores de impresiones y clics. Cada worker los acumula en memoria y un hilo los vuelca
+# cada COUNTER_FLUSH_INTERVAL segundos con un UPDATE ... SET campo = campo + n por grupo.
+# Si el proceso muere, solo se pierde lo acumulado desde el último volcado.
+
+TARGETS = {
+    'company': Company,
+    'top_burger_item': TopBurgerItem,
+    'promotion': Promotion,
+}
+EVENT_FIELDS = {
+    'view': 'view_count',
+    'click': 'click_count',
+}
+
+
+def get_flush_interval():
+    return getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5)
+
+
+def get_dedupe_window():
+    return getattr(settings, 'COUNTER_DEDUPE_WINDOW', 60)
+
+
+class CounterBuffer:
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def add(self, target, event, object_id, amount=1):
+        with self.lock:
+            self.counts[(target, event, object_id)] += amount
+
+    def drain(self):
+        with self.lock:
+            counts, self.counts = self.counts, defaultdict(int)
+        return counts
+
+    def restore(self, counts):
+        with self.lock:
+            for key, amount in counts.items():
+                self.counts[key] += amount
+
+
+buffer = CounterBuffer()
+
+
+def record(target, event, object_id, amount=1):
+    """Suma un evento en memoria; el coste por visita es un lock y una suma."""
+    start_flusher()
+    buffer.add(target, event, object_id, amount)
+
+
+def record_once(client, events):
+    """
+    Suma cada (target, event, id) como mucho una vez por cliente y COUNTER_DEDUPE_WINDOW
+    segundos: repetir el lote o el mismo evento no infla los contadores. Las marcas van a la
+    caché compartida con una lectura y una escritura por lote; en carreras puede colarse algún
+    duplicado, a cambio de no bloquear. Devuelve cuántos eventos se aceptaron.
+    """
+    events = list(dict.fromkeys(events))
+    window = get_dedupe_window()
+    if window:
+        keys = {
+            f'marketplace:counter_seen:{client}:{target}:{event}:{object_id}': (target, event, object_id)
+            for target, event, object_id in events
+        }
+        seen = cache.get_many(list(keys))
+        events = [event for key, event in keys.items() if key not in seen]
+        cache.set_many({key: 1 for key in keys if key not in seen}, window)
+    for target, event, object_id in events:
+        record(target, event, object_id)
+    return len(events)
+
+
+def flush():
+    """
+    Vuelca lo acumulado: un UPDATE por modelo, campo e incremento, con todos los ids que
+    comparten ese incremento. Si falla, devuelve los contadores al buffer.
+    """
+    counts = buffer.drain()
+    if not counts:
+        return 0
+
+    groups = defaultdict(list)
+    for (target, event, object_id), amount in counts.items():
+        groups[(target, event, amount)].append(object_id)
+
+    try:
+        for (target, event, amount), ids in groups.items():
+            field = EVENT_FIELDS[event]
+            for start in range(0, len(ids), 500):
+                TARGETS[target].objects.filter(pk__in=ids[start:start + 500]).update(**{field: F(field) + amount})
+    except Exception:
+        buffer.restore(counts)
+        raise
+    return sum(counts.values())
+
+
+class CounterFlusher(threading.Thread):
+    daemon = True
+
+    def __init__(self, interval=None):
+        super().__init__(name='counter-flusher')
+        self.interval = interval or get_flush_interval()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                flush()
+            except Exception as e:
+                logger.error(f"Error flushing counters: {str(e)}")
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            atexit.register(_flush_at_exit)
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = CounterFlusher()
+            _flusher.start()
+    return _flusher
+
+
+def _flush_at_exit():
+    # Apagado ordenado del worker: no perder lo acumulado desde el último ciclo
+    try:
+        flush()
+    except Exception as e:
+        logger.error(f"Error flushing counters at exit: {str(e)}")
@@ -0,0 +1,147 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import bump_version, get_or_set, get_version, partition_key, set_many
+from .models import Company, Country, Product
+from .reference_data import get_reference_data
+from .serializers import (
+    CompanySerializer, ProductSerializer, company_promotions_prefetch, product_promotions_prefetch
+)
+
+# Catálogo particionado por país para /api/{country_code}/companies/ y /products/. Cada país
+# tiene su propia versión (solo se invalida el país afectado), su propia partición del LRU local
+# y un índice precalculado por filtro para no volver a recorrer la tabla completa.
+
+SHARED_NAMESPACE = 'country_catalog_shared'
+
+# Filtros que se resuelven con el índice precalculado: parámetro -> campo del payload
+COMPANY_INDEXES = {
+    'category': lambda company: company['category']['id'] if company['category'] else None,
+}
+PRODUCT_INDEXES = {
+    'company': lambda product: product['company'],
+    'category': lambda product: product['category'],
+}
+
+
+def country_namespace(country_id):
+    return f'country:{country_id}'
+
+
+def get_timeout():
+    return getattr(settings, 'COUNTRY_CACHE_TIMEOUT', 600)
+
+
+def resolve_country_code(code):
+    """Id del país a partir de su código ISO usando los datos de referencia cacheados."""
+    code = (code or '').upper()
+    for country in get_reference_data()['countries']:
+        if country['code'] == code:
+            return country['id']
+    return None
+
+
+def catalog_key(country_id, kind):
+    return partition_key(
+        f'country{country_id}', country_namespace(country_id), kind, f's{get_version(SHARED_NAMESPACE)}'
+    )
+
+
+def build_index(results, fields):
+    """{campo: {valor: [posiciones]}} con las claves como texto, igual que llegan en la query."""
+    index = {name: {} for name in fields}
+    for position, item in enumerate(results):
+        for name, value_of in fields.items():
+            index[name].setdefault(str(value_of(item)), []).append(position)
+    return index
+
+
+def build_companies(country_id):
+    companies = Company.objects.filter(country_id=country_id).select_related(
+        'category', 'country', 'business_hours'
+    ).prefetch_related(company_promotions_prefetch())
+    results = CompanySerializer(companies, many=True).data
+    return {'results': results, 'index': build_index(results, COMPANY_INDEXES)}
+
+
+def build_products(country_id):
+    products = Product.objects.filter(company__country_id=country_id).prefetch_related(
+        product_promotions_prefetch()
+    ).order_by('id')
+    results = ProductSerializer(products, many=True).data
+    return {'results': results, 'index': build_index(results, PRODUCT_INDEXES)}
+
+
+BUILDERS = {
+    'companies': (build_companies, COMPANY_INDEXES),
+    'products': (build_products, PRODUCT_INDEXES),
+}
+
+
+def get_catalog(country_id, kind, params):
+    """
+    Lista del país filtrada con el índice: la intersección de las posiciones de cada filtro
+    soportado presente en params, en el orden original.
+    """
+    build, indexes = BUILDERS[kind]
+    payload = get_or_set(catalog_key(country_id, kind), lambda: build(country_id), get_timeout())
+    positions = None
+    for name in indexes:
+        value = params.get(name)
+        if value in (None, ''):
+            continue
+        matches = set(payload['index'][name].get(value, ()))
+        positions = matches if positions is None else positions & matches
+    if positions is None:
+        return payload['results']
+    return [payload['results'][position] for position in sorted(positions)]
+
+
+def active_countries():
+    """Países con al menos una empresa; son los que se precalientan."""
+    return Country.objects.filter(companies__isnull=False).distinct().values_list('id', flat=True)
+
+
+def warm_country_catalogs(min_fresh=0):
+    """
+    Reconstruye solo los catálogos que faltan en la caché compartida (la clave incluye la
+    versión del país, así que son los de países que cambiaron) o que dejarían de estar frescos
+    antes de min_fresh segundos. Devuelve cuántos se reconstruyeron.
+    """
+    keys = {
+        catalog_key(country_id, kind): (country_id, kind)
+        for country_id in active_countries() for kind in BUILDERS
+    }
+    cached = cache.get_many(list(keys))
+    deadline = time.time() + min_fresh
+    entries = {}
+    for key in keys:
+        envelope = cached.get(key)
+        if envelope is not None and envelope[1] > deadline:
+            continue
+        country_id, kind = keys[key]
+        entries[key] = BUILDERS[kind][0](country_id)
+    set_many(entries, get_timeout())
+    return len(entries)
+
+
+def invalidate_countries(country_ids):
+    for country_id in set(country_ids):
+        if country_id is not None:
+            bump_version(country_namespace(country_id))
+
+
+def invalidate_company_countries(company_ids):
+    """Invalida los países de las empresas indicadas (cambios en productos, promociones, horarios)."""
+    company_ids = {company_id for company_id in company_ids if company_id is not None}
+    if company_ids:
+        invalidate_countries(
+            Company.objects.filter(pk__in=company_ids).values_list('country_id', flat=True).distinct()
+        )
+
+
+def invalidate_all_countries():
+    """Para cambios en países o categorías, compartidos por todos los catálogos."""
+    bump_version(SHARED_NAMESPACE)
@@ -0,0 +1,86 @@
+import hashlib
+import math
+import re
+import unicodedata
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """Minúsculas y sin tildes, para que 'hamburguesa' y 'HAMBURGUÉSA' coincidan."""
+    text = unicodedata.normalize('NFKD', text or '').lower()
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+class HashingEmbedder:
+    """
+    Embedder local y determinista: hashing de palabras y n-gramas de caracteres con TF
+    sublineal. No usa IDF del corpus para que el vector de un texto no cambie al añadir
+    otros y las actualizaciones del índice puedan ser incrementales.
+    """
+    name = 'hashing'
+
+    def __init__(self, dimensions=None, ngram=3):
+        self.dimensions = dimensions or getattr(settings, 'SEMANTIC_SEARCH_DIMENSIONS', 512)
+        self.ngram = ngram
+
+    def _features(self, text):
+        for word in TOKEN_RE.findall(normalize_text(text)):
+            yield word, 1.0
+            padded = f'<{word}>'
+            # Los n-gramas acercan variantes como 'hamburguesa' y 'hamburguesas'
+            for start in range(len(padded) - self.ngram + 1):
+                yield padded[start:start + self.ngram], 0.5
+
+    def _embed_one(self, text):
+        counts = {}
+        for feature, weight in self._features(text):
+            counts[feature] = counts.get(feature, 0.0) + weight
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, count in counts.items():
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            value = int.from_bytes(digest, 'little')
+            sign = 1.0 if value >> 63 else -1.0
+            vector[value % self.dimensions] += sign * (1.0 + math.log(count))
+        return vector
+
+    def embed(self, texts):
+        return np.vstack([self._embed_one(text) for text in texts]) if texts else np.zeros(
+            (0, self.dimensions), dtype=np.float32
+        )
+
+
+class OpenAIEmbedder:
+    """Embeddings de OpenAI (cliente openai 0.27, ya en requirements). Requiere OPENAI_API_KEY."""
+    name = 'openai'
+    batch_size = 100
+
+    def __init__(self, model=None):
+        self.model = model or getattr(settings, 'OPENAI_EMBEDDING_MODEL', 'text-embedding-ada-002')
+        self.dimensions = getattr(settings, 'OPENAI_EMBEDDING_DIMENSIONS', 1536)
+
+    def embed(self, texts):
+        import openai
+
+        openai.api_key = settings.OPENAI_API_KEY
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = openai.Embedding.create(model=self.model, input=texts[start:start + self.batch_size])
+            vectors.extend(row['embedding'] for row in sorted(response['data'], key=lambda row: row['index']))
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dimensions)
+
+
+def get_embedder():
+    embedder = getattr(settings, 'SEMANTIC_SEARCH_EMBEDDER', 'marketplace.embeddings.HashingEmbedder')
+    return import_string(embedder)()
+
+
+def normalize_rows(vectors):
+    """Normaliza a norma 1 para que el producto escalar sea la similitud coseno."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache import bump_version, get_or_set, get_version, set_many, versioned_key
+from .country_catalog import resolve_country_code
+from .models import Company, CompanyCategory, Country, Promotion, TopBurgerSection
+from .serializers import (
+    CompanyCategorySerializer, CompanySerializer, PromotionSerializer, TopBurgerSectionSerializer,
+    company_promotions_prefetch
+)
+from .top_burgers import get_base_url
+
+HOME_FEED_NAMESPACE = 'home_feed'
+
+# Instantánea para clientes que no indican país
+ALL_COUNTRIES = 'ALL'
+
+
+def get_refresh_interval():
+    return getattr(settings, 'HOME_FEED_REFRESH_INTERVAL', 300)
+
+
+def get_poll_interval():
+    return getattr(settings, 'HOME_FEED_POLL_INTERVAL', 5)
+
+
+def get_featured_limit():
+    return getattr(settings, 'HOME_FEED_FEATURED_LIMIT', 12)
+
+
+def live_promotions():
+    now = timezone.now()
+    return Promotion.objects.filter(
+        is_active=True,
+        start_date__lte=now
+    ).filter(
+        Q(end_date__gte=now) | Q(end_date__isnull=True)
+    )
+
+
+def build_snapshot(country=None):
+    """
+    Arma el feed completo de la pantalla de inicio para un país (o para todos si es None).
+    """
+    promotions = live_promotions().select_related('company', 'product', 'category').order_by('end_date', '-created_at')
+    companies = Company.objects.select_related('category', 'country', 'business_hours').prefetch_related(
+        company_promotions_prefetch()
+    )
+    if country is not None:
+        promotions = promotions.filter(company__country=country)
+        companies = companies.filter(country=country)
+
+    now = timezone.now()
+    featured = companies.annotate(
+        live_promotions=Count(
+            'promotions',
+            filter=Q(promotions__is_active=True, promotions__start_date__lte=now) & (
+                Q(promotions__end_date__gte=now) | Q(promotions__end_date__isnull=True)
+            ),
+            # El JOIN con top_burger_items multiplica las filas de promociones
+            distinct=True
+        ),
+        top_burger_count=Count('top_burger_items', distinct=True)
+    ).filter(
+        Q(live_promotions__gt=0) | Q(top_burger_count__gt=0)
+    ).order_by('-top_burger_count', '-live_promotions', 'name')[:get_featured_limit()]
+
+    sections = TopBurgerSection.objects.prefetch_related('items__company').order_by('position')
+
+    return {
+        'country': country.code if country else None,
+        'generated_at': timezone.now().isoformat(),
+        'top_burgers': TopBurgerSectionSerializer(sections, many=True, context={'base_url': get_base_url()}).data,
+        'promotions': PromotionSerializer(promotions, many=True).data,
+        'company_categories': CompanyCategorySerializer(CompanyCategory.objects.all(), many=True).data,
+        'featured_companies': CompanySerializer(featured, many=True).data,
+    }
+
+
+def snapshot_key(code):
+    # La versión cambia con cada escritura (request_refresh): todos los procesos dejan de servir
+    # la instantánea anterior a la vez
+    return versioned_key(HOME_FEED_NAMESPACE, code)
+
+
+def refresh_home_feed():
+    """
+    Reconstruye las instantáneas de todos los países. Cada instantánea se construye completa
+    antes de escribirse, así que los lectores ven siempre la versión anterior o la nueva. Las
+    claves se toman antes de construir: si llega una escritura mientras tanto, lo construido
+    queda bajo la versión anterior y la siguiente pasada lo rehace.
+    """
+    countries = [None, *Country.objects.all()]
+    keys = [snapshot_key(country.code if country else ALL_COUNTRIES) for country in countries]
+    snapshots = {key: build_snapshot(country) for key, country in zip(keys, countries)}
+    set_many(snapshots, get_refresh_interval() * 3)
+    return len(snapshots)
+
+
+def get_home_feed(country_code=None):
+    """
+    Devuelve la instantánea del país indicado (None si el país no existe). Si aún no existe
+    (arranque en frío, caché expirada o escritura reciente) se construye en línea solo la de
+    ese país, una vez aunque lleguen muchas peticiones a la vez.
+    """
+    code = country_code.upper() if country_code else ALL_COUNTRIES
+    country_id = None
+    if code != ALL_COUNTRIES:
+        country_id = resolve_country_code(code)
+        if country_id is None:
+            return None
+
+    def build():
+        return build_snapshot(Country.objects.get(pk=country_id) if country_id else None)
+
+    return get_or_set(snapshot_key(code), build, get_refresh_interval() * 3)
+
+
+def current_version():
+    """Versión de las instantáneas; cambia con cada request_refresh()."""
+    return get_version(HOME_FEED_NAMESPACE)
+
+
+def request_refresh():
+    """
+    Invalida las instantáneas en todos los procesos tras el commit en curso (en el acto fuera
+    de una transacción); lo llaman las señales y los cambios en bloque. El proceso feed del
+    Procfile (refresh_home_feed --loop) detecta la nueva versión y las reconstruye.
+    """
+    transaction.on_commit(lambda: bump_version(HOME_FEED_NAMESPACE))
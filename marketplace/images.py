@@ -0,0 +1,86 @@
+import base64
+import io
+import os
+import tempfile
+
+from django.conf import settings
+
+
+def get_variant_widths():
+    return getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 1024))
+
+
+def variants_field_name(field_name):
+    """Campo JSON que guarda los metadatos de variantes de field_name (p. ej. cover_photo_variants)."""
+    return f'{field_name}_variants'
+
+
+def has_variants(model, field_name):
+    return any(f.name == variants_field_name(field_name) for f in model._meta.get_fields())
+
+
+def _open_rgb(path):
+    # Pillow solo se usa en el worker de subidas; no se importa al arrancar la web
+    from PIL import Image, ImageOps
+
+    image = Image.open(path)
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def build_lqip(image, width=16):
+    """Marcador de baja calidad (LQIP) como data URI JPEG de unos cientos de bytes."""
+    from PIL import Image
+
+    height = max(1, round(image.height * width / image.width))
+    thumb = image.resize((width, height), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    thumb.save(buffer, format='JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def generate_variants(path, field, backend):
+    """
+    Genera las anchuras configuradas (solo las menores que el original), las sube con el
+    mismo backend que la imagen principal y devuelve los metadatos a guardar:
+    {'width', 'height', 'lqip', 'widths': {'320': valor_del_campo, ...}}.
+    """
+    from PIL import Image
+
+    image = _open_rgb(path)
+    metadata = {
+        'width': image.width,
+        'height': image.height,
+        'lqip': build_lqip(image),
+        'widths': {},
+    }
+    stem = os.path.splitext(os.path.basename(path))[0]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for width in get_variant_widths():
+            if width >= image.width:
+                continue
+            height = round(image.height * width / image.width)
+            variant = image.resize((width, height), Image.Resampling.LANCZOS)
+            variant_path = os.path.join(tmpdir, f'{stem}_w{width}.jpg')
+            variant.save(variant_path, format='JPEG', quality=80, optimize=True, progressive=True)
+            metadata['widths'][str(width)] = backend.upload(variant_path, field)
+    return metadata
+
+
+def variant_urls(obj, field_name):
+    """Mapa anchura -> URL para el cliente (srcset), incluyendo el original como 'original'."""
+    image = getattr(obj, field_name)
+    if not image:
+        return {}
+    field = obj._meta.get_field(field_name)
+    metadata = getattr(obj, variants_field_name(field_name)) or {}
+    urls = {width: field.to_python(value).url for width, value in metadata.get('widths', {}).items()}
+    urls['original'] = image.url
+    return urls
+
+
+def lqip(obj, field_name):
+    metadata = getattr(obj, variants_field_name(field_name)) or {}
+    return metadata.get('lqip')
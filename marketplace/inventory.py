@@ -0,0 +1,64 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Insufficient stock for products {self.product_ids}")
+
+
+class UnknownProducts(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(f"Unknown products {self.product_ids}")
+
+
+def merge_lines(items):
+    """
+    Agrupa las líneas del pedido por producto: {product_id: cantidad}. Los ids se normalizan
+    a enteros ("5" y 5 son la misma línea); un id no numérico lanza ValueError.
+    """
+    quantities = {}
+    for item in items:
+        product_id = int(item['product'])
+        quantities[product_id] = quantities.get(product_id, 0) + item['quantity']
+    return quantities
+
+
+def reserve_stock(quantities):
+    """
+    Descuenta las existencias de todas las líneas con un único UPDATE condicional:
+    stock = stock - n solo en las filas con stock >= n (o sin control de inventario).
+    No usa select_for_update: la condición del WHERE es la que impide vender de más.
+    Si alguna línea no alcanza, no descuenta nada y lanza InsufficientStock, o UnknownProducts
+    si el producto no existe.
+    """
+    if not quantities:
+        return
+    available = reduce(or_, (
+        Q(pk=product_id) & (Q(stock__isnull=True) | Q(stock__gte=quantity))
+        for product_id, quantity in quantities.items()
+    ))
+    try:
+        with transaction.atomic():
+            updated = Product.objects.filter(available).update(stock=Case(
+                *(When(pk=product_id, then=F('stock') - quantity) for product_id, quantity in quantities.items()),
+                default=F('stock'),
+                output_field=PositiveIntegerField()
+            ))
+            if updated != len(quantities):
+                raise InsufficientStock(quantities)
+    except InsufficientStock:
+        # Tras revertir, identifica qué productos faltan o no alcanzan para informar al cliente;
+        # solo en este camino, así el caso normal sigue siendo un único UPDATE
+        existing = set(Product.objects.filter(pk__in=quantities).values_list('pk', flat=True))
+        if set(quantities) - existing:
+            raise UnknownProducts(set(quantities) - existing)
+        enough = set(Product.objects.filter(available).values_list('pk', flat=True))
+        raise InsufficientStock(set(quantities) - enough or quantities)
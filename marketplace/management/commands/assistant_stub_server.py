@@ -0,0 +1,43 @@
+import asyncio
+import json
+import re
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Servidor local compatible con /v1/chat/completions de OpenAI que responde en streaming '
+        'con las líneas del catálogo recibido. Sirve para probar el asistente sin red: '
+        'ASSISTANT_LLM_BASE_URL=http://127.0.0.1:8765/v1'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--delay', type=float, default=0.02, help='Segundos entre tokens.')
+
+    def handle(self, *args, **options):
+        from aiohttp import web
+
+        delay = options['delay']
+
+        async def chat_completions(request):
+            body = await request.json()
+            system = next((message['content'] for message in body['messages'] if message['role'] == 'system'), '')
+            catalog = [line[2:] for line in system.split('\n') if line.startswith('- ')][:3]
+            answer = 'Según el catálogo: ' + ('; '.join(catalog) if catalog else 'no hay resultados.')
+
+            response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+            await response.prepare(request)
+            for token in re.findall(r'\S+\s*', answer):
+                chunk = {'choices': [{'index': 0, 'delta': {'content': token}}]}
+                await response.write(f'data: {json.dumps(chunk, ensure_ascii=False)}\n\n'.encode('utf-8'))
+                await asyncio.sleep(delay)
+            await response.write(b'data: [DONE]\n\n')
+            return response
+
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', chat_completions)
+        self.stdout.write(f"Stub LLM en http://{options['host']}:{options['port']}/v1")
+        web.run_app(app, host=options['host'], port=options['port'], print=None)
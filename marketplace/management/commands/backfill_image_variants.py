@@ -0,0 +1,50 @@
+import time
+
+from cloudinary.models import CloudinaryField
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from marketplace.images import has_variants, variants_field_name
+from marketplace.uploads import backfill_variants, get_upload_backend
+
+
+def fields_with_variants():
+    """[(modelo, campo)] de las imágenes del marketplace que guardan variantes."""
+    return [
+        (model, field.name)
+        for model in apps.get_app_config('marketplace').get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, CloudinaryField) and has_variants(model, field.name)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera variantes y LQIP de las imágenes ya subidas que no los tienen (subidas antes de '
+        'las variantes o por el camino síncrono).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Máximo de imágenes a procesar por campo.')
+
+    def handle(self, *args, **options):
+        backend = get_upload_backend()
+        started = time.monotonic()
+        done = failed = 0
+        for model, field_name in fields_with_variants():
+            queryset = model.objects.filter(
+                **{variants_field_name(field_name): {}}
+            ).exclude(**{field_name: ''}).order_by('pk')
+            if options['limit']:
+                queryset = queryset[:options['limit']]
+            for instance in queryset.iterator():
+                try:
+                    backfill_variants(instance, field_name, backend)
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{model.__name__} {instance.pk} {field_name}: {str(e)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{done} imágenes con variantes nuevas, {failed} fallidas en {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace.api_schema import build_artifacts, code_version, get_schema_root, stale_formats
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera el esquema OpenAPI (YAML y JSON, planos y gzip) para la versión actual del código, '
+        'para que /api/schema/ no tenga que generarlo en la primera petición.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='No escribe nada: falla si el esquema guardado no coincide con el generado ahora.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        version = code_version()
+        if options['check']:
+            stale = stale_formats(version)
+            if stale:
+                raise CommandError(
+                    f'El esquema {version} guardado en {get_schema_root()} está desactualizado '
+                    f'({", ".join(stale)}); ejecuta build_api_schema'
+                )
+            self.stdout.write(self.style.SUCCESS(f'Esquema {version} al día'))
+            return
+
+        artifacts = build_artifacts(version)
+        sizes = ', '.join(
+            f'{fmt}: {len(content)} B ({len(compressed)} B gzip)' for fmt, (content, compressed) in artifacts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Esquema {version} en {get_schema_root()} ({sizes}) en {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from marketplace.semantic_search import SOURCES, get_max_age, index_is_stale, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los índices de búsqueda semántica de empresas y productos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(SOURCES), help='Reconstruye solo este índice.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Objetos por lote de embeddings.')
+        parser.add_argument(
+            '--if-stale', action='store_true',
+            help='Solo los índices que faltan o tienen más de SEMANTIC_SEARCH_MAX_AGE segundos.'
+        )
+
+    def handle(self, *args, **options):
+        for name in [options['source']] if options['source'] else SOURCES:
+            if options['if_stale'] and not index_is_stale(name):
+                self.stdout.write(f'Índice {name}: al día')
+                continue
+            started = time.monotonic()
+            count = rebuild_index(name, options['batch_size'], get_max_age() if options['if_stale'] else None)
+            if count is None:
+                self.stdout.write(f'Índice {name}: reconstruido por otro proceso')
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Índice {name}: {count} vectores en {time.monotonic() - started:.2f}s'
+            ))
@@ -0,0 +1,166 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from marketplace import views
+from marketplace.cache import local_cache
+from marketplace.models import Company, Category, Country, Order
+
+
+SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)(?P<rest>.*)$')
+POSTGRES_SCAN_RE = re.compile(r'Seq Scan on (?P<table>\w+)')
+
+# Las vistas se reproducen sin caché: con la caché caliente no llegarían a la base de datos (y
+# no deben escribir en la caché compartida de producción)
+NO_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Reproduce las consultas ORM que emite cada viewset, ejecuta EXPLAIN sobre ellas '
+        '(SQLite o Postgres) y reporta los recorridos secuenciales sobre tablas grandes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Tamaño mínimo de tabla (filas) para reportar un recorrido secuencial.'
+        )
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help='Imprime el plan completo de cada consulta.'
+        )
+
+    def handle(self, *args, **options):
+        self.min_rows = options['min_rows']
+        self.show_plans = options['show_plans']
+        self.table_sizes = {}
+
+        findings = 0
+        for label, view, kwargs, params, user in self.get_replays():
+            queries = self.capture_queries(view, kwargs, params, user)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{label} ({len(queries)} consultas únicas)'))
+            for sql in queries:
+                plan = self.explain(sql)
+                if self.show_plans:
+                    self.stdout.write(f'  {sql}')
+                    for line in plan:
+                        self.stdout.write(f'    {line}')
+                for table in self.find_seq_scans(plan):
+                    rows = self.get_table_size(table)
+                    if rows < self.min_rows:
+                        continue
+                    findings += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  Recorrido secuencial sobre {table} (~{rows} filas): {sql[:200]}'
+                    ))
+
+        if findings:
+            self.stdout.write(self.style.WARNING(f'{findings} recorridos secuenciales sobre tablas grandes.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sin recorridos secuenciales sobre tablas grandes.'))
+
+    def get_replays(self):
+        """
+        Devuelve las peticiones a reproducir: (etiqueta, vista, kwargs, query params, usuario).
+        Los identificadores de ejemplo se toman de la propia base de datos.
+        """
+        company = Company.objects.order_by('id').first()
+        category = Category.objects.order_by('id').first()
+        country = Country.objects.order_by('id').first()
+        order = Order.objects.order_by('-id').select_related('user').first()
+        user = order.user if order else User.objects.order_by('id').first()
+
+        list_action = {'get': 'list'}
+        detail_action = {'get': 'retrieve'}
+        replays = [
+            ('GET /api/companies/', views.CompanyViewSet.as_view(list_action), {}, {}, None),
+            ('GET /api/categories/', views.CategoryViewSet.as_view(list_action), {}, {}, None),
+            ('GET /api/products/', views.ProductViewSet.as_view(list_action), {}, {}, None),
+            ('GET /api/company-categories/', views.CompanyCategoryViewSet.as_view(list_action), {}, {}, None),
+            ('GET /api/countries/', views.CountryViewSet.as_view(list_action), {}, {}, None),
+            ('GET /api/promotions/', views.PromotionViewSet.as_view(list_action), {}, {}, None),
+            ('GET /api/top-burgers/', views.TopBurgerSectionView.as_view(), {}, {}, None),
+            ('GET /api/search/', views.SearchView.as_view(), {}, {'q': 'burger'}, user),
+        ]
+        if company:
+            replays += [
+                ('GET /api/companies/{id}/', views.CompanyViewSet.as_view(detail_action),
+                 {'pk': company.pk}, {}, None),
+                ('GET /api/companies/{id}/active_promotions/',
+                 views.CompanyViewSet.as_view({'get': 'active_promotions'}), {'pk': company.pk}, {}, None),
+                ('GET /api/promotions/?company=', views.PromotionViewSet.as_view(list_action),
+                 {}, {'company': company.pk}, None),
+            ]
+        if category:
+            replays.append(('GET /api/promotions/?category=', views.PromotionViewSet.as_view(list_action),
+                            {}, {'category': category.pk}, None))
+        if company and company.category_id:
+            replays.append(('GET /api/companies/?category=', views.CompanyViewSet.as_view(list_action),
+                            {}, {'category': company.category_id}, None))
+        if country:
+            replays.append(('GET /api/companies/?country=', views.CompanyViewSet.as_view(list_action),
+                            {}, {'country': country.pk}, None))
+        if user:
+            replays.append(('GET /api/orders/', views.OrderViewSet.as_view(list_action), {}, {}, user))
+        return replays
+
+    def capture_queries(self, view, kwargs, params, user):
+        request = APIRequestFactory().get('/', params)
+        if user is not None:
+            force_authenticate(request, user=user)
+        with override_settings(CACHES=NO_CACHES), CaptureQueriesContext(connection) as context:
+            # El nivel local de marketplace.cache no depende de CACHES
+            local_cache.clear()
+            view(request, **kwargs)
+            local_cache.clear()
+
+        unique = []
+        for query in context.captured_queries:
+            sql = query['sql']
+            if sql.lstrip().upper().startswith('SELECT') and sql not in unique:
+                unique.append(sql)
+        return unique
+
+    def explain(self, sql):
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            rows = cursor.fetchall()
+        if connection.vendor == 'sqlite':
+            # EXPLAIN QUERY PLAN devuelve (id, parent, notused, detail)
+            return [row[-1] for row in rows]
+        return [row[0] for row in rows]
+
+    def find_seq_scans(self, plan):
+        tables = []
+        for line in plan:
+            if connection.vendor == 'sqlite':
+                match = SQLITE_SCAN_RE.match(line.strip())
+                # "SCAN tabla USING INDEX ..." recorre un índice, no la tabla
+                if match and 'USING' not in match.group('rest'):
+                    tables.append(match.group('table'))
+            else:
+                match = POSTGRES_SCAN_RE.search(line)
+                if match:
+                    tables.append(match.group('table'))
+        return tables
+
+    def get_table_size(self, table):
+        if table not in self.table_sizes:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    # Estimación del planificador: evita un COUNT(*) sobre tablas enormes
+                    cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+                else:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                row = cursor.fetchone()
+            self.table_sizes[table] = max(int(row[0]), 0) if row else 0
+        return self.table_sizes[table]
@@ -0,0 +1,109 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from marketplace.inventory import InsufficientStock, reserve_stock
+from marketplace.models import Order, OrderItem, Product
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de pedidos sobre un mismo producto: varios hilos reservan existencias y '
+        'crean el pedido como OrderViewSet.create, e informa del rendimiento y las latencias. '
+        'Sin --commit cada pedido se revierte y no consume existencias.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('product', type=int, help='Producto con mucha demanda.')
+        parser.add_argument('--buyers', type=int, default=20, help='Hilos simultáneos.')
+        parser.add_argument('--orders', type=int, default=500, help='Pedidos a intentar en total.')
+        parser.add_argument('--quantity', type=int, default=1, help='Unidades por pedido.')
+        parser.add_argument('--commit', action='store_true', help='Confirma los pedidos (consume existencias).')
+
+    def place_order(self, product, quantity, commit):
+        try:
+            with transaction.atomic():
+                reserve_stock({product.pk: quantity})
+                order = Order.objects.create(
+                    user_id=product.company.user_id, company_id=product.company_id, total=product.price * quantity
+                )
+                OrderItem.objects.create(order=order, product_id=product.pk, quantity=quantity, price=product.price)
+                if not commit:
+                    raise Rollback()
+        except Rollback:
+            pass
+        return 'reserved'
+
+    def handle(self, *args, **options):
+        product = Product.objects.select_related('company').filter(pk=options['product']).first()
+        if product is None:
+            raise CommandError(f'No existe el producto {options["product"]}')
+        initial_stock = product.stock
+
+        pending = list(range(options['orders']))
+        pending_lock = threading.Lock()
+        results = []
+        barrier = threading.Barrier(options['buyers'])
+
+        def buyer():
+            try:
+                barrier.wait()
+                while True:
+                    with pending_lock:
+                        if not pending:
+                            return
+                        pending.pop()
+                    started = time.perf_counter()
+                    try:
+                        outcome = self.place_order(product, options['quantity'], options['commit'])
+                    except InsufficientStock:
+                        outcome = 'rejected'
+                    except Exception as e:
+                        outcome = f'error: {str(e)}'
+                    results.append((outcome, time.perf_counter() - started))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buyer) for _ in range(options['buyers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        outcomes = [outcome for outcome, _ in results]
+        latencies = sorted(latency for _, latency in results)
+        errors = sorted({outcome for outcome in outcomes if outcome.startswith('error')})
+        self.stdout.write(
+            f'{outcomes.count("reserved")} reservados, {outcomes.count("rejected")} sin existencias, '
+            f'{len(outcomes) - outcomes.count("reserved") - outcomes.count("rejected")} errores'
+        )
+        for error in errors[:5]:
+            self.stdout.write(self.style.WARNING(f'  {error}'))
+        if latencies:
+            self.stdout.write(
+                f'latencia p50 {statistics.median(latencies) * 1000:.1f} ms, '
+                f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, '
+                f'máx {latencies[-1] * 1000:.1f} ms'
+            )
+
+        if options['commit'] and initial_stock is not None:
+            final_stock = Product.objects.values_list('stock', flat=True).get(pk=product.pk)
+            sold = outcomes.count('reserved') * options['quantity']
+            if final_stock < 0 or initial_stock - final_stock != sold:
+                raise CommandError(
+                    f'Existencias inconsistentes: {initial_stock} iniciales, {sold} vendidas, {final_stock} finales'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(results)} pedidos en {elapsed:.2f}s ({len(results) / elapsed:.0f} pedidos/s) '
+            f'con {options["buyers"]} hilos'
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from marketplace.uploads import process_pending_uploads, requeue_stale_tasks
+
+
+class Command(BaseCommand):
+    help = 'Sube al almacenamiento final las imágenes encoladas por las escrituras del API y del admin.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Sigue procesando la cola indefinidamente.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Segundos de espera con la cola vacía.')
+        parser.add_argument('--batch-size', type=int, default=20, help='Tareas reclamadas por iteración.')
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_tasks()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'{requeued} tareas abandonadas devueltas a la cola'))
+
+            processed, failed = process_pending_uploads(options['batch_size'])
+            if processed or failed:
+                self.stdout.write(f'{processed} subidas completadas, {failed} fallidas')
+
+            if not options['loop']:
+                break
+            close_old_connections()
+            if not processed and not failed:
+                time.sleep(options['interval'])
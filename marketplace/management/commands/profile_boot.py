@@ -0,0 +1,122 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Arranque en un proceso nuevo, como un worker web recién creado: importa la aplicación WSGI de
+# producción y le hace una primera petición sin servidor. Los tiempos salen por stdout en una
+# línea JSON; -X importtime escribe en stderr el tiempo de cada import.
+BOOT_SCRIPT = '''
+import io, json, sys, time
+started = time.perf_counter()
+from backend.wsgi import application
+loaded = time.perf_counter()
+path, _, query = sys.argv[1].partition('?')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1', 'wsgi.input': io.BytesIO(),
+    'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0),
+    'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+status = []
+response = application(environ, lambda value, headers, exc_info=None: status.append(int(value.split()[0])))
+b''.join(response)
+finished = time.perf_counter()
+print('BOOT ' + json.dumps({
+    'application': loaded - started, 'first_request': finished - loaded,
+    'total': finished - started, 'status': status[0] if status else None,
+}))
+'''
+
+MODES = {'current': 'false', 'lazy': 'true'}
+
+
+def parse_importtime(stderr):
+    """[(módulo, propio_s, acumulado_s, nivel)] a partir de la salida de -X importtime."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque de un worker: tiempo de import por módulo y tiempo hasta la primera '
+        'respuesta, con el arranque actual y con LAZY_STARTUP (subsistemas diferidos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/reference-data/', help='Ruta de la primera petición.')
+        parser.add_argument('--mode', choices=[*MODES, 'both'], default='both')
+        parser.add_argument('--runs', type=int, default=3, help='Arranques por modo; se informa la mediana.')
+        parser.add_argument('--top', type=int, default=20, help='Módulos y paquetes más lentos a mostrar.')
+
+    def boot(self, lazy_value, path):
+        env = dict(os.environ, LAZY_STARTUP=lazy_value)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT, path],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        timings = next(
+            (json.loads(line[5:]) for line in result.stdout.splitlines() if line.startswith('BOOT ')), None
+        )
+        if result.returncode != 0 or timings is None:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError('El arranque falló:\n' + '\n'.join(errors[-20:]))
+        return timings, parse_importtime(result.stderr)
+
+    def report_imports(self, imports, top):
+        packages = {}
+        for name, self_time, _, _ in imports:
+            package = name.split('.', 1)[0]
+            packages[package] = packages.get(package, 0) + self_time
+        total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+        self.stdout.write(f'  imports: {len(imports)} módulos, {total * 1000:.0f} ms')
+        self.stdout.write('  paquetes (tiempo propio):')
+        for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'    {seconds * 1000:8.1f} ms  {package}')
+        self.stdout.write('  módulos (acumulado):')
+        slowest = sorted(imports, key=lambda item: -item[2])[:top]
+        for name, _, cumulative, _ in slowest:
+            self.stdout.write(f'    {cumulative * 1000:8.1f} ms  {name}')
+
+    def handle(self, *args, **options):
+        modes = list(MODES) if options['mode'] == 'both' else [options['mode']]
+        medians = {}
+        for mode in modes:
+            runs = [self.boot(MODES[mode], options['path']) for _ in range(max(options['runs'], 1))]
+            timings = {
+                field: statistics.median(run[0][field] for run in runs)
+                for field in ('application', 'first_request', 'total')
+            }
+            medians[mode] = timings
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{mode} (LAZY_STARTUP={MODES[mode]}), mediana de {len(runs)} arranques'
+            ))
+            self.stdout.write(
+                f'  aplicación cargada: {timings["application"] * 1000:.0f} ms, '
+                f'primera petición {options["path"]} (HTTP {runs[-1][0]["status"]}): '
+                f'{timings["first_request"] * 1000:.0f} ms'
+            )
+            self.report_imports(runs[-1][1], options['top'])
+
+        if len(medians) == 2:
+            current, lazy = medians['current']['total'], medians['lazy']['total']
+            self.stdout.write(self.style.SUCCESS(
+                f'Hasta la primera respuesta: {current * 1000:.0f} ms actual, {lazy * 1000:.0f} ms lazy '
+                f'({(current - lazy) / current * 100:+.0f} %)'
+            ))
+        else:
+            mode, timings = next(iter(medians.items()))
+            self.stdout.write(self.style.SUCCESS(
+                f'Hasta la primera respuesta ({mode}): {timings["total"] * 1000:.0f} ms'
+            ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from marketplace.models import Product
+from marketplace.pricing import recompute_effective_prices
+
+
+class Command(BaseCommand):
+    help = 'Recalcula effective_price y best_promotion de los productos con las promociones vigentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Limita el recálculo a una empresa.')
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['company']:
+            queryset = queryset.filter(company_id=options['company'])
+
+        started = time.monotonic()
+        changed = recompute_effective_prices(queryset)
+        self.stdout.write(self.style.SUCCESS(
+            f'{changed} productos actualizados en {time.monotonic() - started:.2f}s'
+        ))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from marketplace.country_catalog import warm_country_catalogs
+from marketplace.home_feed import current_version, get_poll_interval, get_refresh_interval, refresh_home_feed
+from marketplace.promotion_feed import warm_promotion_feed
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye las instantáneas del feed de inicio, las primeras páginas del feed de '
+        'promociones y los catálogos de empresas y productos por país (una vez o en bucle). '
+        'En bucle es el proceso feed del Procfile: reconstruye cada --interval segundos y, '
+        'antes, en cuanto una escritura cambia la versión del feed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Repite la reconstrucción cada --interval segundos o al cambiar la versión (proceso feed).'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Segundos entre reconstrucciones (por defecto HOME_FEED_REFRESH_INTERVAL).'
+        )
+
+    def refresh(self, interval, loop):
+        started = time.monotonic()
+        count = refresh_home_feed()
+        pages = warm_promotion_feed()
+        # En bucle, solo los países que cambiaron o cuyo catálogo caducaría antes de la próxima pasada
+        catalogs = warm_country_catalogs(min_fresh=interval if loop else 0)
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} instantáneas del feed de inicio, {pages} páginas del feed de promociones '
+            f'y {catalogs} catálogos por país reconstruidos '
+            f'en {time.monotonic() - started:.2f}s'
+        ))
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or get_refresh_interval()
+        while True:
+            version = current_version()
+            self.refresh(interval, options['loop'])
+            if not options['loop']:
+                break
+            close_old_connections()
+            self.wait(version, interval)
+
+    def wait(self, version, interval):
+        """Hasta que pase el intervalo o una escritura cambie la versión del feed."""
+        deadline = time.monotonic() + interval
+        while time.monotonic() < deadline:
+            time.sleep(min(get_poll_interval(), max(deadline - time.monotonic(), 0)))
+            if current_version() != version:
+                return
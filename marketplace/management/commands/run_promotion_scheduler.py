@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from marketplace.promotions import PromotionScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Activa y expira promociones automáticamente en sus fechas de inicio y fin '
+        'usando una rueda de tiempo en memoria.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tick', type=float, default=1.0, help='Resolución de la rueda en segundos.')
+        parser.add_argument('--lookahead', type=int, default=24 * 3600,
+                            help='Horizonte (segundos) de fronteras cargadas en memoria.')
+        parser.add_argument('--reload', type=int, default=60,
+                            help='Segundos entre recargas de la base de datos para ver promociones nuevas.')
+        parser.add_argument('--once', action='store_true', help='Solo reconcilia el estado y termina.')
+
+    def handle(self, *args, **options):
+        scheduler = PromotionScheduler(
+            tick=options['tick'],
+            lookahead=timedelta(seconds=options['lookahead']),
+        )
+        expired, started = scheduler.reconcile()
+        self.stdout.write(f'Reconciliación: {expired} expiradas, {started} iniciadas')
+        if options['once']:
+            return
+
+        next_reload = 0
+        while True:
+            if time.monotonic() >= next_reload:
+                scheduled = scheduler.load()
+                close_old_connections()
+                next_reload = time.monotonic() + options['reload']
+                self.stdout.write(f'{scheduled} fronteras programadas')
+
+            started, expired = scheduler.run_pending()
+            if started or expired:
+                self.stdout.write(self.style.SUCCESS(f'{started} promociones iniciadas, {expired} expiradas'))
+            time.sleep(options['tick'])
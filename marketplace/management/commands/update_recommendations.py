@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from marketplace.recommendations import reset_recommendations, update_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Actualiza las recomendaciones "comprados juntos" con los pedidos nuevos desde la última ejecución.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Pedidos por lote.')
+        parser.add_argument('--rebuild', action='store_true', help='Borra todo y recalcula desde el primer pedido.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_recommendations()
+
+        started = time.monotonic()
+        orders, products, rows = update_recommendations(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{orders} pedidos procesados, {products} productos actualizados ({rows} vecinos) '
+            f'en {time.monotonic() - started:.2f}s'
+        ))
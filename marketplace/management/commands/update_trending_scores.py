@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from marketplace.trending import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza de forma incremental las puntuaciones de tendencia que alimentan las '
+        'secciones de top burgers en modo automático (una vez o en bucle).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Repite la actualización cada --interval segundos (proceso worker).'
+        )
+        parser.add_argument('--interval', type=int, default=900, help='Segundos entre actualizaciones.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            count = update_trending_scores()
+            self.stdout.write(self.style.SUCCESS(
+                f'{count} puntuaciones actualizadas en {time.monotonic() - started:.2f}s'
+            ))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0016_imageuploadtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='cover_photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Anchuras derivadas y marcador LQIP de la foto de portada'),
+        ),
+        migrations.AddField(
+            model_name='topburgeritem',
+            name='featured_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Anchuras derivadas y marcador LQIP de la imagen destacada'),
+        ),
+    ]
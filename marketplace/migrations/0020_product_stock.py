@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0019_promotion_title_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, help_text='Unidades disponibles. Dejar vacío para no controlar inventario', null=True),
+        ),
+    ]
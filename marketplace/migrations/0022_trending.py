@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-19 17:39
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0021_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='topburgersection',
+            name='auto_category',
+            field=models.ForeignKey(blank=True, help_text='Modo automático: categoría de producto a considerar (vacío = todas)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='marketplace.category'),
+        ),
+        migrations.AddField(
+            model_name='topburgersection',
+            name='auto_country',
+            field=models.ForeignKey(blank=True, help_text='Modo automático: país de las empresas (vacío = todos)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='marketplace.country'),
+        ),
+        migrations.AddField(
+            model_name='topburgersection',
+            name='auto_limit',
+            field=models.PositiveSmallIntegerField(default=3, help_text='Modo automático: número de empresas a mostrar', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AddField(
+            model_name='topburgersection',
+            name='mode',
+            field=models.CharField(choices=[('MANUAL', 'Manual'), ('AUTO', 'Automático (tendencias)')], default='MANUAL', help_text='En modo automático los elementos salen de las empresas en tendencia', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='marketplace.category')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='marketplace.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', '-score'], name='trending_category_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company', 'category'), name='trending_company_category_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0022_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='click_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Clics'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Visitas'),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='click_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Clics'),
+        ),
+        migrations.AddField(
+            model_name='promotion',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Impresiones'),
+        ),
+        migrations.AddField(
+            model_name='topburgeritem',
+            name='click_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Clics'),
+        ),
+        migrations.AddField(
+            model_name='topburgeritem',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Impresiones'),
+        ),
+    ]
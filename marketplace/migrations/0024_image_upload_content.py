@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('marketplace', '0023_view_click_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageuploadtask',
+            name='content',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='imageuploadtask',
+            name='file_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='imageuploadtask',
+            name='local_path',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='imageuploadtask',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pendiente'), ('PROCESSING', 'Procesando'), ('DONE', 'Completada'), ('FAILED', 'Fallida'), ('SUPERSEDED', 'Reemplazada')], default='PENDING', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='imageuploadtask',
+            index=models.Index(fields=['content_type', 'object_id', 'field_name'], name='upload_task_target_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-19 18:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_future_promotions(apps, schema_editor):
+    # Las que aún no han empezado conservan la activación automática
+    Promotion = apps.get_model('marketplace', 'Promotion')
+    Promotion.objects.filter(start_date__gt=timezone.now()).update(scheduled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0024_image_upload_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotion',
+            name='scheduled',
+            field=models.BooleanField(default=False, help_text='Se activa sola al llegar la fecha de inicio. Se marca al crearla con inicio futuro y se desmarca al desactivarla a mano o al activarse.', verbose_name='Programada'),
+        ),
+        migrations.RunPython(mark_future_promotions, migrations.RunPython.noop),
+    ]
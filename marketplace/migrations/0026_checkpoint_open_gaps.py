@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0025_promotion_scheduled'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationcheckpoint',
+            name='open_gaps',
+            field=models.JSONField(blank=True, default=dict, help_text='Ids por debajo de last_order_id que aún no se habían confirmado: {id: desde (epoch)}'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MaxValueValidator, MinValueValidator
 from cloudinary.models import CloudinaryField
 from django.core.validators import RegexValidator
@@ -61,11 +62,25 @@ class Country(models.Model):
         help_text="Icono de la bandera del país (opcional)"
     )
 
+    # Precalculado una vez por proceso para evitar recorrer COUNTRY_CHOICES en cada fila
+    FLAG_EMOJIS = {code: label.split()[0] for code, label in COUNTRY_CHOICES}
+
     def get_flag_emoji(self):
         if self.code:
-            return next((choice[1].split()[0] for choice in self.COUNTRY_CHOICES if choice[0] == self.code), '')
+            return self.FLAG_EMOJIS.get(self.code, '')
         return ''
 
+    @classmethod
+    def get_available_countries(cls):
+        return [
+            {
+                'code': code,
+                'name': label.split(maxsplit=1)[1],
+                'flag_emoji': label.split()[0]
+            }
+            for code, label in cls.COUNTRY_CHOICES
+        ]
+
     def __str__(self):
         return f"{self.get_flag_emoji()} {self.name}"
 
@@ -104,8 +119,23 @@ class Company(models.Model):
         folder='company_covers/',
         help_text="Foto de portada de la compañía"
     )
+    cover_photo_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Anchuras derivadas y marcador LQIP de la foto de portada"
+    )
     phone = models.CharField(max_length=20)
     address = models.TextField()
+    # Contadores acumulados por marketplace.counters (se vuelcan en lote, no por visita)
+    view_count = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Visitas")
+    click_count = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Clics")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name'], name='company_name_idx'),
+            models.Index(fields=['country', 'category'], name='company_country_category_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -122,6 +152,11 @@ class Category(models.Model):
     name = models.CharField(max_length=50)
     category_type = models.CharField(max_length=20, choices=CATEGORY_TYPES, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['name'], name='category_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.get_category_type_display() if self.category_type else 'Sin tipo'}"
 
@@ -136,6 +171,35 @@ class Product(models.Model):
         folder='products/',
         help_text="Imagen del producto"
     )
+    # Precio con la mejor promoción vigente aplicada; lo mantiene marketplace.pricing
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+    best_promotion = models.ForeignKey(
+        'Promotion',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
+    # Existencias disponibles; vacío = sin control de inventario. Se descuentan en marketplace.inventory
+    stock = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Unidades disponibles. Dejar vacío para no controlar inventario"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'category'], name='product_company_category_idx'),
+            models.Index(fields=['name'], name='product_name_idx'),
+            models.Index(fields=['effective_price'], name='product_effective_price_idx'),
+            models.Index(fields=['category', 'effective_price'], name='product_cat_eff_price_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.effective_price is None:
+            self.effective_price = self.price
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -146,6 +210,11 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     total = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} - {self.user.username}"
 
@@ -159,9 +228,41 @@ class OrderItem(models.Model):
         return f"{self.quantity} x {self.product.name}"
     
 class TopBurgerSection(models.Model):
+    MODE_CHOICES = [
+        ('MANUAL', 'Manual'),
+        ('AUTO', 'Automático (tendencias)'),
+    ]
+
     title = models.CharField(max_length=100, default="TOP 3 BURGUERS")
     location = models.CharField(max_length=100, default="en San Jose")
     position = models.IntegerField(default=0, help_text="Orden de posición para mostrar secciones")
+    mode = models.CharField(
+        max_length=10,
+        choices=MODE_CHOICES,
+        default='MANUAL',
+        help_text="En modo automático los elementos salen de las empresas en tendencia"
+    )
+    auto_category = models.ForeignKey(
+        'Category',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Modo automático: categoría de producto a considerar (vacío = todas)"
+    )
+    auto_country = models.ForeignKey(
+        'Country',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Modo automático: país de las empresas (vacío = todos)"
+    )
+    auto_limit = models.PositiveSmallIntegerField(
+        default=3,
+        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        help_text="Modo automático: número de empresas a mostrar"
+    )
     
     class Meta:
         ordering = ['position']
@@ -207,6 +308,14 @@ class TopBurgerItem(models.Model):
         folder='top_burgers/',
         help_text="Imagen destacada de la hamburguesa"
     )
+    featured_image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Anchuras derivadas y marcador LQIP de la imagen destacada"
+    )
+    view_count = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Impresiones")
+    click_count = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Clics")
 
     class Meta:
         ordering = ['order']
@@ -322,6 +431,12 @@ class Promotion(models.Model):
         default=True,
         verbose_name="Activa"
     )
+    scheduled = models.BooleanField(
+        default=False,
+        verbose_name="Programada",
+        help_text="Se activa sola al llegar la fecha de inicio. Se marca al crearla con inicio futuro "
+                  "y se desmarca al desactivarla a mano o al activarse."
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Fecha de Creación"
@@ -330,11 +445,28 @@ class Promotion(models.Model):
         auto_now=True,
         verbose_name="Última Actualización"
     )
+    view_count = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Impresiones")
+    click_count = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Clics")
 
     class Meta:
         verbose_name = "Promoción"
         verbose_name_plural = "Promociones"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'start_date', 'end_date'], name='promo_active_window_idx'),
+            models.Index(fields=['company', 'is_active'], name='promo_company_active_idx'),
+            # Índices parciales: solo cubren las promociones activas, que son las que se consultan
+            models.Index(
+                fields=['start_date', 'end_date'],
+                condition=models.Q(is_active=True),
+                name='promo_live_window_idx'
+            ),
+            models.Index(
+                fields=['product'],
+                condition=models.Q(is_active=True),
+                name='promo_live_product_idx'
+            ),
+        ]
 
     def clean(self):
         if self.discount_type == 'PERCENTAGE' and self.discount_value > 100:
@@ -357,4 +489,128 @@ class Promotion(models.Model):
         return f"${self.discount_value}"
 
     def __str__(self):
-        return f"{self.title} - {self.company.name}"
\ No newline at end of file
+        return f"{self.title} - {self.company.name}"
+
+class ImageUploadTask(models.Model):
+    """
+    Subida de imagen diferida: los bytes del archivo se guardan en la base de datos durante la
+    petición (compartida entre dynos) y un worker (process_image_uploads) los sube al
+    almacenamiento final y actualiza el campo. Una tarea nueva para el mismo campo reemplaza
+    a las anteriores que no hayan terminado.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('PROCESSING', 'Procesando'),
+        ('DONE', 'Completada'),
+        ('FAILED', 'Fallida'),
+        ('SUPERSEDED', 'Reemplazada'),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    field_name = models.CharField(max_length=50)
+    # Tareas antiguas guardaban el archivo en PENDING_UPLOADS_ROOT; las nuevas usan content
+    local_path = models.CharField(max_length=255, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    content = models.BinaryField(null=True, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Subida de imagen"
+        verbose_name_plural = "Subidas de imágenes"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='upload_task_status_idx'),
+            models.Index(fields=['content_type', 'object_id', 'field_name'], name='upload_task_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model}#{self.object_id}.{self.field_name} ({self.status})"
+
+
+class ProductCoPurchase(models.Model):
+    """Veces que dos productos aparecieron en el mismo pedido (se guarda en ambos sentidos)."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'related'], name='copurchase_pair_unique'),
+        ]
+
+
+class CompanyAffinity(models.Model):
+    """Veces que un usuario con pedidos en una empresa hizo un pedido en la otra."""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    related = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'related'], name='company_affinity_unique'),
+        ]
+
+
+class RelatedProduct(models.Model):
+    """
+    Top-K de vecinos por producto, precalculado por marketplace.recommendations.
+    Es lo único que se consulta al servir /api/products/{id}/related/.
+    """
+    REASON_CHOICES = [
+        ('BOUGHT_TOGETHER', 'Comprados juntos'),
+        ('COMPANY_AFFINITY', 'Afinidad entre empresas'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_products')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.PositiveIntegerField(default=0)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default='BOUGHT_TOGETHER')
+
+    class Meta:
+        verbose_name = "Producto relacionado"
+        verbose_name_plural = "Productos relacionados"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='related_product_rank_unique'),
+        ]
+
+
+class RecommendationCheckpoint(models.Model):
+    """Último pedido procesado por cada trabajo incremental (ver marketplace.checkpoints)."""
+    name = models.CharField(max_length=50, unique=True)
+    last_order_id = models.PositiveBigIntegerField(default=0)
+    open_gaps = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Ids por debajo de last_order_id que aún no se habían confirmado: {id: desde (epoch)}"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_order_id}"
+
+
+class TrendingScore(models.Model):
+    """
+    Puntuación de tendencia con decaimiento exponencial por empresa y categoría de producto
+    (category vacía = todas). La mantiene marketplace.trending de forma incremental.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    category = models.ForeignKey('Category', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'category'], name='trending_company_category_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['category', '-score'], name='trending_category_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id}/{self.category_id or '*'}: {self.score:.2f}"
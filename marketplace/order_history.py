@@ -0,0 +1,117 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.utils.urls import remove_query_param
+
+
+class OrderHistoryPagination(CursorPagination):
+    """
+    Paginación por keyset sobre (created_at, id): el coste por página no depende del historial.
+    La posición del cursor incluye el id, así que los pedidos con la misma fecha no se repiten
+    ni se saltan entre páginas, aunque lleguen pedidos nuevos durante el recorrido (el
+    CursorPagination de DRF desempata con un offset, que se descuadra en esos casos).
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        backwards = self.cursor is not None and self.cursor.reverse
+
+        if self.cursor is not None and self.cursor.position is not None:
+            created_at, pk = self._parse_position(self.cursor.position)
+            if backwards:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        queryset = queryset.order_by('created_at', 'id') if backwards else queryset.order_by(*self.ordering)
+
+        # Una fila de más indica si queda otra página en el sentido del recorrido
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if backwards:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, has_more
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Hacia atrás no quedó nada: se vuelve al principio
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+    def _position(self, order):
+        return f'{order.created_at.isoformat()}|{order.pk}'
+
+    def _parse_position(self, position):
+        created_at, _, pk = position.rpartition('|')
+        moment = parse_datetime(created_at)
+        if moment is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return moment, int(pk)
+
+
+def _parse_bound(params, name):
+    """Devuelve (momento, solo_fecha) o (None, False) si el parámetro no viene."""
+    value = params.get(name)
+    if value in (None, ''):
+        return None, False
+    # Primero la fecha sola: parse_datetime también acepta "AAAA-MM-DD" (medianoche)
+    day = parse_date(value)
+    date_only = day is not None
+    if date_only:
+        moment = datetime.combine(day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise serializers.ValidationError({name: 'Debe ser una fecha (AAAA-MM-DD) o fecha y hora ISO 8601'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, date_only
+
+
+def filter_orders(queryset, params):
+    """Filtros del historial: date_from, date_to (una fecha sola incluye el día completo) y company."""
+    date_from, _ = _parse_bound(params, 'date_from')
+    date_to, date_only = _parse_bound(params, 'date_to')
+    company = params.get('company')
+
+    if date_from is not None:
+        queryset = queryset.filter(created_at__gte=date_from)
+    if date_to is not None:
+        if date_only:
+            queryset = queryset.filter(created_at__lt=date_to + timedelta(days=1))
+        else:
+            queryset = queryset.filter(created_at__lte=date_to)
+    if company not in (None, ''):
+        if not str(company).isdigit():
+            raise serializers.ValidationError({'company': 'Debe ser un identificador numérico'})
+        queryset = queryset.filter(company_id=int(company))
+    return queryset
+
+
+def order_summary(queryset):
+    """Total gastado y número de pedidos del conjunto filtrado, en una sola consulta."""
+    summary = queryset.order_by().aggregate(total_spent=Sum('total'), order_count=Count('id'))
+    summary['total_spent'] = summary['total_spent'] or 0
+    return summary
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Product, Promotion
+
+CENT = Decimal('0.01')
+BATCH_SIZE = 2000
+
+
+def apply_discount(price, promotion):
+    if promotion.discount_type == 'PERCENTAGE':
+        discounted = price * (Decimal(100) - Decimal(promotion.discount_value)) / Decimal(100)
+    else:
+        discounted = price - Decimal(promotion.discount_value)
+    return max(discounted, Decimal(0)).quantize(CENT)
+
+
+def live_promotions_for_companies(company_ids, now=None):
+    now = now or timezone.now()
+    return Promotion.objects.filter(
+        company_id__in=company_ids,
+        is_active=True,
+        start_date__lte=now
+    ).filter(
+        Q(end_date__gte=now) | Q(end_date__isnull=True)
+    ).only('id', 'company_id', 'product_id', 'category_id', 'discount_type', 'discount_value', 'end_date')
+
+
+def _recompute_batch(products):
+    """
+    Calcula precio efectivo y mejor promoción para un lote de productos con una sola consulta
+    de promociones: se indexan por producto, por (empresa, categoría) y por empresa, y a cada
+    producto se le aplican todas las que le corresponden.
+    """
+    company_ids = {product.company_id for product in products}
+    by_product = defaultdict(list)
+    by_category = defaultdict(list)
+    by_company = defaultdict(list)
+    for promotion in live_promotions_for_companies(company_ids):
+        if promotion.product_id:
+            by_product[promotion.product_id].append(promotion)
+        elif promotion.category_id:
+            by_category[(promotion.company_id, promotion.category_id)].append(promotion)
+        else:
+            by_company[promotion.company_id].append(promotion)
+
+    changed = []
+    for product in products:
+        candidates = (
+            by_product[product.pk] +
+            by_category[(product.company_id, product.category_id)] +
+            by_company[product.company_id]
+        )
+        best_price, best_promotion = product.price, None
+        for promotion in candidates:
+            price = apply_discount(product.price, promotion)
+            if price < best_price:
+                best_price, best_promotion = price, promotion
+
+        best_promotion_id = best_promotion.pk if best_promotion else None
+        if product.effective_price != best_price or product.best_promotion_id != best_promotion_id:
+            product.effective_price = best_price
+            product.best_promotion_id = best_promotion_id
+            changed.append(product)
+
+    Product.objects.bulk_update(changed, ['effective_price', 'best_promotion'])
+    return len(changed)
+
+
+def recompute_effective_prices(queryset=None):
+    """
+    Recalcula effective_price y best_promotion de los productos indicados (todos si es None)
+    por lotes de BATCH_SIZE, escribiendo solo los que cambian. Devuelve cuántos cambiaron.
+    """
+    queryset = (queryset if queryset is not None else Product.objects.all()).only(
+        'id', 'company_id', 'category_id', 'price', 'effective_price', 'best_promotion_id'
+    ).order_by('pk')
+
+    changed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        changed += _recompute_batch(batch)
+        last_pk = batch[-1].pk
+    return changed
+
+
+def products_affected_by(promotion):
+    """Productos a los que puede aplicar la promoción según su alcance (producto, categoría o empresa)."""
+    if promotion.product_id:
+        return Product.objects.filter(pk=promotion.product_id)
+    queryset = Product.objects.filter(company_id=promotion.company_id)
+    if promotion.category_id:
+        queryset = queryset.filter(category_id=promotion.category_id)
+    return queryset
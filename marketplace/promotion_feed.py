@@ -0,0 +1,121 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Q, Value, When
+from django.utils import timezone
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+
+from .cache import bump_version, get_or_set, set_many, versioned_key
+from .models import Country, Promotion
+from .serializers import PromotionSerializer
+
+PROMOTION_FEED_NAMESPACE = 'promotion_feed'
+
+# Ordenamientos del feed; el primer campo es la clave del cursor (keyset)
+RANKINGS = {
+    'newest': ('-created_at', '-id'),
+    'ending': ('end_date', 'id'),
+    'discount': ('-discount_percent', '-id'),
+}
+DEFAULT_RANKING = 'newest'
+
+
+class PromotionFeedPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return RANKINGS[get_ranking(request.query_params)]
+
+
+def get_ranking(params):
+    ranking = params.get('ranking', DEFAULT_RANKING)
+    return ranking if ranking in RANKINGS else DEFAULT_RANKING
+
+
+def resolve_country(value):
+    """Acepta el id o el código ISO del país; devuelve el id o None si no existe."""
+    if not value:
+        return None
+    if str(value).isdigit():
+        return int(value)
+    return Country.objects.filter(code=str(value).upper()).values_list('id', flat=True).first()
+
+
+def feed_queryset(ranking, country_id=None, category_id=None, company_id=None):
+    """Promociones vigentes con la anotación de descuento comparable entre tipos."""
+    now = timezone.now()
+    queryset = Promotion.objects.filter(
+        is_active=True,
+        start_date__lte=now
+    ).filter(
+        Q(end_date__gte=now) | Q(end_date__isnull=True)
+    ).select_related('company', 'product', 'category').annotate(
+        # Porcentaje equivalente: los descuentos de valor fijo se comparan contra el precio
+        # del producto; sin producto no hay referencia y quedan al final del ranking
+        discount_percent=Case(
+            When(discount_type='PERCENTAGE', then=F('discount_value') * Value(1.0)),
+            When(product__price__gt=0, then=ExpressionWrapper(
+                F('discount_value') * Value(100.0) / F('product__price'),
+                output_field=DecimalField(max_digits=12, decimal_places=4)
+            )),
+            default=Value(0.0),
+            output_field=DecimalField(max_digits=12, decimal_places=4)
+        )
+    )
+    if ranking == 'ending':
+        queryset = queryset.filter(end_date__isnull=False)
+    if country_id:
+        queryset = queryset.filter(company__country_id=country_id)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    if company_id:
+        queryset = queryset.filter(company_id=company_id)
+    return queryset
+
+
+def build_first_page(ranking, country_id=None):
+    """
+    Primera página del feed sin depender de una petición real: se pagina con una petición
+    sintética y se guarda el token del cursor siguiente, no la URL absoluta.
+    """
+    # rest_framework.test importa django.test; solo hace falta al construir la página
+    from rest_framework.test import APIRequestFactory
+
+    params = {'ranking': ranking}
+    request = Request(APIRequestFactory().get('/', params))
+    paginator = PromotionFeedPagination()
+    page = paginator.paginate_queryset(feed_queryset(ranking, country_id), request)
+    next_link = paginator.get_next_link()
+    return {
+        'results': PromotionSerializer(page, many=True).data,
+        'next_cursor': parse_qs(urlparse(next_link).query).get('cursor', [None])[0] if next_link else None,
+    }
+
+
+def first_page_key(ranking, country_id):
+    return versioned_key(PROMOTION_FEED_NAMESPACE, ranking, country_id or 'all')
+
+
+def get_timeout():
+    return getattr(settings, 'PROMOTION_FEED_TIMEOUT', 300)
+
+
+def get_first_page(ranking, country_id=None):
+    return get_or_set(first_page_key(ranking, country_id), lambda: build_first_page(ranking, country_id), get_timeout())
+
+
+def warm_promotion_feed():
+    """Precalcula la primera página de cada ranking para todos los países y el feed global."""
+    pages = {}
+    for country_id in [None] + list(Country.objects.values_list('id', flat=True)):
+        for ranking in RANKINGS:
+            pages[first_page_key(ranking, country_id)] = build_first_page(ranking, country_id)
+    set_many(pages, get_timeout())
+    return len(pages)
+
+
+def invalidate_promotion_feed():
+    bump_version(PROMOTION_FEED_NAMESPACE)
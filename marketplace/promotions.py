@@ -0,0 +1,198 @@
+import logging
+import math
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .assistant import invalidate_catalog
+from .catalog import invalidate_facets
+from .company_cache import invalidate_companies
+from .country_catalog import invalidate_company_countries
+from .home_feed import request_refresh
+from .models import Product, Promotion
+from .pricing import recompute_effective_prices
+from .promotion_feed import invalidate_promotion_feed
+
+logger = logging.getLogger(__name__)
+
+START = 'start'
+END = 'end'
+
+
+def affected_products_filter(promotions):
+    """Q que cubre los productos afectados por un conjunto de promociones (dicts de values())."""
+    conditions = []
+    for promotion in promotions:
+        if promotion['product_id']:
+            conditions.append(Q(pk=promotion['product_id']))
+        elif promotion['category_id']:
+            conditions.append(Q(company_id=promotion['company_id'], category_id=promotion['category_id']))
+        else:
+            conditions.append(Q(company_id=promotion['company_id']))
+    return reduce(or_, conditions) if conditions else None
+
+
+def promotions_changed(promotions):
+    """
+    Hook de invalidación por lotes para cambios hechos con queryset.update(), que no emite
+    señales: recalcula precios efectivos una vez para todos los productos afectados e
+    invalida facetas y feed de inicio.
+    """
+    promotions = list(promotions)
+    if not promotions:
+        return
+    products = affected_products_filter(promotions)
+    if products is not None:
+        recompute_effective_prices(Product.objects.filter(products))
+    invalidate_facets()
+    invalidate_promotion_feed()
+    invalidate_catalog()
+    invalidate_companies(promotion['company_id'] for promotion in promotions)
+    invalidate_company_countries(promotion['company_id'] for promotion in promotions)
+    request_refresh()
+
+
+def _promotion_rows(queryset):
+    return list(queryset.values('id', 'company_id', 'product_id', 'category_id'))
+
+
+def expire_promotions(now=None, ids=None):
+    """Desactiva en bloque las promociones activas cuya fecha de fin ya pasó."""
+    now = now or timezone.now()
+    queryset = Promotion.objects.filter(is_active=True, end_date__lte=now)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    rows = _promotion_rows(queryset)
+    if rows:
+        Promotion.objects.filter(pk__in=[row['id'] for row in rows]).update(is_active=False, updated_at=now)
+        promotions_changed(rows)
+    return len(rows)
+
+
+def start_promotions(since, now=None, ids=None):
+    """
+    Procesa las promociones cuyo inicio cae en (since, now] y aún no han terminado: activa
+    las programadas (scheduled) que estaban inactivas, y dispara la invalidación también
+    para las que ya estaban activas, porque pasan a estar vigentes. Las desactivadas a mano
+    no están programadas y no se tocan.
+
+    Con since=None es un barrido sin límite inferior: todas las programadas cuyo inicio ya
+    pasó, aunque sea hace horas (proceso caído, o creada entre dos recargas del programador).
+    Al procesarlas pierden scheduled, así que repetir el barrido no las vuelve a tocar.
+    """
+    now = now or timezone.now()
+    queryset = Promotion.objects.filter(start_date__lte=now).filter(
+        Q(end_date__gt=now) | Q(end_date__isnull=True)
+    )
+    if since is None:
+        queryset = queryset.filter(scheduled=True)
+    else:
+        queryset = queryset.filter(start_date__gt=since).filter(Q(is_active=True) | Q(scheduled=True))
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    rows = _promotion_rows(queryset)
+    if rows:
+        Promotion.objects.filter(pk__in=[row['id'] for row in rows]).update(
+            is_active=True, scheduled=False, updated_at=now
+        )
+        promotions_changed(rows)
+    return len(rows)
+
+
+class TimeWheel:
+    """
+    Rueda de tiempo con `slots` ranuras de `tick` segundos. Cada evento se coloca en la
+    ranura de su instante con el número de vueltas pendientes, así que programar y avanzar
+    son O(1) por evento independientemente de cuántas promociones haya.
+    """
+
+    def __init__(self, tick=1.0, slots=3600, now=None):
+        self.tick = tick
+        self.slots = [dict() for _ in range(slots)]
+        self.cursor = 0
+        self.position = now or timezone.now()
+        self.scheduled = {}
+
+    def __len__(self):
+        return len(self.scheduled)
+
+    def schedule(self, kind, promotion_id, when):
+        key = (kind, promotion_id)
+        if self.scheduled.get(key) == when:
+            return
+        ticks = max(1, math.ceil((when - self.position).total_seconds() / self.tick))
+        slot = (self.cursor + ticks) % len(self.slots)
+        rounds = (ticks - 1) // len(self.slots)
+        # Si la fecha cambió, la entrada anterior queda en su ranura y se descarta al vencer
+        self.slots[slot][key] = (rounds, when)
+        self.scheduled[key] = when
+
+    def advance(self, now):
+        """Avanza la rueda hasta `now` y devuelve los eventos vencidos agrupados por tipo."""
+        due = {START: set(), END: set()}
+        while self.position + timedelta(seconds=self.tick) <= now:
+            self.position += timedelta(seconds=self.tick)
+            self.cursor = (self.cursor + 1) % len(self.slots)
+            bucket = self.slots[self.cursor]
+            for key, (rounds, when) in list(bucket.items()):
+                if rounds > 0:
+                    bucket[key] = (rounds - 1, when)
+                    continue
+                del bucket[key]
+                if self.scheduled.get(key) == when:
+                    del self.scheduled[key]
+                    due[key[0]].add(key[1])
+        return due
+
+
+class PromotionScheduler:
+    """
+    Mantiene en memoria las fronteras start_date/end_date próximas (hasta `lookahead`) y
+    aplica los cambios de estado en bloque justo al cruzarlas.
+    """
+
+    def __init__(self, tick=1.0, lookahead=timedelta(hours=24)):
+        self.wheel = TimeWheel(tick=tick, slots=max(1, int(3600 / tick)))
+        self.lookahead = lookahead
+
+    def reconcile(self):
+        """
+        Pone al día el estado al arrancar y en cada recarga: expira lo vencido y activa todas
+        las programadas cuyo inicio ya pasó, incluidas las que la rueda no llegó a ver.
+        """
+        now = timezone.now()
+        expired = expire_promotions(now)
+        started = start_promotions(None, now)
+        return expired, started
+
+    def load(self):
+        """
+        Programa en la rueda las fronteras dentro del horizonte; se repite para ver cambios.
+        Antes reconcilia, para no perder las que cruzaron su frontera entre dos recargas.
+        """
+        self.reconcile()
+        now = timezone.now()
+        horizon = now + self.lookahead
+        for promotion_id, start_date in Promotion.objects.filter(
+            start_date__gt=now, start_date__lte=horizon
+        ).values_list('id', 'start_date'):
+            self.wheel.schedule(START, promotion_id, start_date)
+        # También las inactivas: pueden activarse en su inicio antes de la próxima recarga
+        for promotion_id, end_date in Promotion.objects.filter(
+            end_date__gt=now, end_date__lte=horizon
+        ).values_list('id', 'end_date'):
+            self.wheel.schedule(END, promotion_id, end_date)
+        return len(self.wheel)
+
+    def run_pending(self):
+        now = timezone.now()
+        due = self.wheel.advance(now)
+        started = expired = 0
+        if due[START]:
+            started = start_promotions(now - self.lookahead, now, ids=due[START])
+        if due[END]:
+            expired = expire_promotions(now, ids=due[END])
+        return started, expired
@@ -0,0 +1,182 @@
+import logging
+from collections import Counter, defaultdict
+from itertools import permutations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from .checkpoints import advance, pending_orders
+from .models import (
+    CompanyAffinity, Order, OrderItem, Product, ProductCoPurchase, RecommendationCheckpoint, RelatedProduct
+)
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'copurchase'
+
+
+def get_top_k():
+    return getattr(settings, 'RECOMMENDATIONS_TOP_K', 10)
+
+
+def _add_counts(model, owner_field, increments):
+    """Suma increments {(owner_id, related_id): n} a los contadores existentes con un upsert."""
+    if not increments:
+        return
+    owners = {owner for owner, _ in increments}
+    related = {other for _, other in increments}
+    existing = {
+        (owner, other): count
+        for owner, other, count in model.objects.filter(
+            **{f'{owner_field}_id__in': owners, 'related_id__in': related}
+        ).values_list(f'{owner_field}_id', 'related_id', 'count')
+    }
+    model.objects.bulk_create(
+        [
+            model(**{f'{owner_field}_id': owner, 'related_id': other, 'count': existing.get((owner, other), 0) + n})
+            for (owner, other), n in increments.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=[owner_field, 'related'],
+        update_fields=['count'],
+    )
+
+
+def _process_orders(orders):
+    """Acumula co-ocurrencias y afinidades de un lote de pedidos; devuelve los productos tocados."""
+    order_ids = [order['id'] for order in orders]
+    baskets = defaultdict(set)
+    for order_id, product_id in OrderItem.objects.filter(order_id__in=order_ids).values_list('order_id', 'product_id'):
+        baskets[order_id].add(product_id)
+
+    pairs = Counter()
+    for products in baskets.values():
+        pairs.update(permutations(products, 2))
+
+    # Empresas en las que cada usuario ya había comprado antes del lote
+    users = {order['user_id'] for order in orders}
+    seen = defaultdict(set)
+    for user_id, company_id in Order.objects.filter(
+        user_id__in=users, id__lt=order_ids[0]
+    ).values_list('user_id', 'company_id').distinct():
+        seen[user_id].add(company_id)
+
+    affinities = Counter()
+    for order in orders:
+        for company_id in seen[order['user_id']] - {order['company_id']}:
+            affinities[(order['company_id'], company_id)] += 1
+            affinities[(company_id, order['company_id'])] += 1
+        seen[order['user_id']].add(order['company_id'])
+
+    _add_counts(ProductCoPurchase, 'product', pairs)
+    _add_counts(CompanyAffinity, 'company', affinities)
+    return {product for product, _ in pairs} | {product for products in baskets.values() for product in products}
+
+
+def _best_sellers(company_ids, limit):
+    """Productos más vendidos (en unidades) de cada empresa."""
+    sellers = defaultdict(list)
+    rows = OrderItem.objects.filter(product__company_id__in=company_ids).values(
+        'product_id', 'product__company_id'
+    ).annotate(units=Sum('quantity')).order_by('-units', 'product_id')
+    for row in rows:
+        if len(sellers[row['product__company_id']]) < limit:
+            sellers[row['product__company_id']].append(row['product_id'])
+    return sellers
+
+
+def rebuild_related(product_ids, top_k=None):
+    """
+    Recalcula el top-K de los productos indicados: primero los comprados juntos y, si no
+    llegan a K, los más vendidos de las empresas con más afinidad con la del producto.
+    """
+    top_k = top_k or get_top_k()
+    product_ids = list(product_ids)
+    if not product_ids:
+        return 0
+
+    neighbours = defaultdict(list)
+    for product_id, related_id, count in ProductCoPurchase.objects.filter(
+        product_id__in=product_ids
+    ).order_by('product_id', '-count', 'related_id').values_list('product_id', 'related_id', 'count'):
+        if len(neighbours[product_id]) < top_k:
+            neighbours[product_id].append((related_id, count, 'BOUGHT_TOGETHER'))
+
+    companies = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'company_id'))
+    short = {companies[pk] for pk in product_ids if pk in companies and len(neighbours[pk]) < top_k}
+    affine = defaultdict(list)
+    for company_id, related_id in CompanyAffinity.objects.filter(
+        company_id__in=short
+    ).order_by('company_id', '-count', 'related_id').values_list('company_id', 'related_id'):
+        if len(affine[company_id]) < top_k:
+            affine[company_id].append(related_id)
+    sellers = _best_sellers({related for ids in affine.values() for related in ids}, top_k)
+
+    rows = []
+    for product_id in product_ids:
+        if product_id not in companies:
+            continue
+        chosen = neighbours[product_id]
+        taken = {product_id} | {related_id for related_id, _, _ in chosen}
+        for company_id in affine.get(companies[product_id], []):
+            for related_id in sellers.get(company_id, []):
+                if len(chosen) >= top_k:
+                    break
+                if related_id not in taken:
+                    chosen.append((related_id, 0, 'COMPANY_AFFINITY'))
+                    taken.add(related_id)
+        rows.extend(
+            RelatedProduct(product_id=product_id, related_id=related_id, rank=rank, score=score, reason=reason)
+            for rank, (related_id, score, reason) in enumerate(chosen, start=1)
+        )
+
+    with transaction.atomic():
+        RelatedProduct.objects.filter(product_id__in=product_ids).delete()
+        RelatedProduct.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def update_recommendations(batch_size=None):
+    """
+    Procesa solo los pedidos posteriores al último ejecutado (y los que se confirmaron tarde,
+    ver checkpoints), en lotes, y después reconstruye el top-K de los productos afectados. Cada
+    lote avanza el checkpoint en la misma transacción que sus contadores, así que una ejecución
+    interrumpida se reanuda sin contar dos veces.
+    """
+    batch_size = batch_size or getattr(settings, 'RECOMMENDATIONS_BATCH_SIZE', 1000)
+    RecommendationCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    touched = set()
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            checkpoint = RecommendationCheckpoint.objects.select_for_update().get(name=CHECKPOINT_NAME)
+            orders = list(
+                Order.objects.filter(pending_orders(checkpoint)).order_by('id').values(
+                    'id', 'user_id', 'company_id'
+                )[:batch_size]
+            )
+            if not orders:
+                break
+            touched |= _process_orders(orders)
+            advance(checkpoint, [order['id'] for order in orders])
+            checkpoint.save(update_fields=['last_order_id', 'open_gaps', 'updated_at'])
+        processed += len(orders)
+
+    rebuilt = 0
+    touched = sorted(touched)
+    for start in range(0, len(touched), batch_size):
+        rebuilt += rebuild_related(touched[start:start + batch_size])
+    logger.info(f"Recommendations updated: {processed} orders, {len(touched)} products")
+    return processed, len(touched), rebuilt
+
+
+def reset_recommendations():
+    """Borra contadores, vecinos y checkpoint para recalcular desde el primer pedido."""
+    with transaction.atomic():
+        ProductCoPurchase.objects.all().delete()
+        CompanyAffinity.objects.all().delete()
+        RelatedProduct.objects.all().delete()
+        RecommendationCheckpoint.objects.filter(name=CHECKPOINT_NAME).delete()
@@ -0,0 +1,38 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .cache import delete, get_or_set
+from .models import Category, CompanyCategory, Country
+from .serializers import CategorySerializer, CompanyCategorySerializer, CountrySerializer
+
+
+REFERENCE_DATA_CACHE_KEY = 'marketplace:reference_data'
+
+# El contenido solo cambia al editar países o categorías; las señales invalidan la clave
+REFERENCE_DATA_TIMEOUT = None
+
+
+def build_reference_data():
+    """
+    Construye el paquete de datos de referencia (países y categorías) que los clientes
+    necesitan al arrancar, junto con una versión derivada del hash de su contenido.
+    """
+    data = {
+        'countries': CountrySerializer(Country.objects.all(), many=True).data,
+        'available_countries': Country.get_available_countries(),
+        'company_categories': CompanyCategorySerializer(CompanyCategory.objects.all(), many=True).data,
+        'categories': CategorySerializer(Category.objects.all(), many=True).data,
+    }
+    content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, ensure_ascii=False)
+    data['version'] = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+    return data
+
+
+def get_reference_data():
+    return get_or_set(REFERENCE_DATA_CACHE_KEY, build_reference_data, REFERENCE_DATA_TIMEOUT)
+
+
+def invalidate_reference_data():
+    delete(REFERENCE_DATA_CACHE_KEY)
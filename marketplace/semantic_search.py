@@ -0,0 +1,394 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+
+from .embeddings import get_embedder, normalize_rows
+from .models import Company, Product
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se serializan las escrituras dentro del proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Filas que se multiplican de una vez al buscar; acota la memoria con índices grandes
+SEARCH_CHUNK_ROWS = 65536
+
+
+class IndexMismatch(Exception):
+    """El índice en disco se construyó con otro embedder o dimensión: hay que reconstruirlo."""
+
+
+class VectorIndex:
+    """
+    Vectores normalizados en una matriz .npy mapeada en memoria y sus ids en otro .npy.
+    Las escrituras se serializan con un lock de fichero y publican un meta.json nuevo; los
+    lectores de otros workers vuelven a abrir el mapa cuando ese fichero cambia.
+    Los borrados dejan la fila vacía (id -1) hasta la siguiente reconstrucción.
+    Los ficheros son locales de cada dyno: ver ensure_indexes() para construirlos y refrescarlos.
+    """
+
+    def __init__(self, root, name, dimensions, embedder_name):
+        self.root = root
+        self.dimensions = dimensions
+        self.embedder_name = embedder_name
+        self.vectors_path = os.path.join(root, f'{name}.vectors.npy')
+        self.ids_path = os.path.join(root, f'{name}.ids.npy')
+        self.meta_path = os.path.join(root, f'{name}.meta.json')
+        self.lock_path = os.path.join(root, f'{name}.lock')
+        self._thread_lock = threading.Lock()
+        self._stamp = None
+        self._state = None
+        self._built_at = None
+
+    # Lectura
+
+    def _meta_stamp(self):
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path) as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    def _check_meta(self, meta):
+        if meta['dimensions'] != self.dimensions or meta['embedder'] != self.embedder_name:
+            raise IndexMismatch(
+                f"Index built with {meta['embedder']}/{meta['dimensions']}, "
+                f"expected {self.embedder_name}/{self.dimensions}"
+            )
+
+    def _load(self):
+        stamp = self._meta_stamp()
+        if stamp is None:
+            return None
+        if stamp != self._stamp:
+            meta = self._read_meta()
+            self._check_meta(meta)
+            vectors = np.load(self.vectors_path, mmap_mode='r')
+            ids = np.load(self.ids_path, mmap_mode='r')
+            self._state = (vectors, ids, meta['count'])
+            self._built_at = meta.get('built_at')
+            self._stamp = stamp
+        return self._state
+
+    def built_at(self):
+        """Instante (epoch) de la última reconstrucción completa, o None si no existe."""
+        return self._built_at if self._load() is not None else None
+
+    def __len__(self):
+        state = self._load()
+        return 0 if state is None else int((state[1][:state[2]] >= 0).sum())
+
+    def search(self, queries, k):
+        """
+        Top-K por similitud coseno para un lote de consultas (matriz q x d normalizada).
+        Devuelve, por consulta, una lista de (id, score) de mayor a menor.
+        """
+        state = self._load()
+        if state is None or state[2] == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        vectors, ids, count = state
+
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, count, SEARCH_CHUNK_ROWS):
+            end = min(start + SEARCH_CHUNK_ROWS, count)
+            block_ids = np.asarray(ids[start:end])
+            scores = queries @ np.asarray(vectors[start:end]).T
+            scores[:, block_ids < 0] = -np.inf
+            take = min(k, scores.shape[1])
+            top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_scores = np.hstack([best_scores, np.take_along_axis(scores, top, axis=1)])
+            best_ids = np.hstack([best_ids, block_ids[top]])
+
+        results = []
+        for row_scores, row_ids in zip(best_scores, best_ids):
+            order = np.argsort(-row_scores)[:k]
+            results.append([
+                (int(row_ids[i]), float(row_scores[i])) for i in order if np.isfinite(row_scores[i])
+            ])
+        return results
+
+    # Escritura
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._thread_lock, open(self.lock_path, 'a') as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _write_meta(self, count, capacity, built_at=None):
+        meta = {
+            'count': count,
+            'capacity': capacity,
+            'dimensions': self.dimensions,
+            'embedder': self.embedder_name,
+            'built_at': built_at,
+        }
+        tmp_path = f'{self.meta_path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(meta, handle)
+        os.replace(tmp_path, self.meta_path)
+
+    def _allocate(self, capacity, copy_from=None):
+        """Crea ficheros nuevos con la capacidad indicada y los publica con os.replace."""
+        vectors = np.lib.format.open_memmap(
+            f'{self.vectors_path}.tmp', mode='w+', dtype=np.float32, shape=(capacity, self.dimensions)
+        )
+        ids = np.lib.format.open_memmap(f'{self.ids_path}.tmp', mode='w+', dtype=np.int64, shape=(capacity,))
+        ids[:] = -1
+        if copy_from is not None:
+            old_vectors, old_ids, count = copy_from
+            vectors[:count] = old_vectors[:count]
+            ids[:count] = old_ids[:count]
+        vectors.flush()
+        ids.flush()
+        del vectors, ids
+        os.replace(f'{self.vectors_path}.tmp', self.vectors_path)
+        os.replace(f'{self.ids_path}.tmp', self.ids_path)
+
+    def upsert(self, object_ids, vectors):
+        """Inserta o reemplaza vectores (ya normalizados) de los ids indicados."""
+        if not len(object_ids):
+            return
+        with self._write_lock():
+            meta = self._read_meta()
+            if meta is None:
+                self._allocate(max(1024, len(object_ids)))
+                meta = {'count': 0, 'capacity': max(1024, len(object_ids))}
+            else:
+                self._check_meta(meta)
+            count, capacity = meta['count'], meta['capacity']
+
+            stored_ids = np.load(self.ids_path, mmap_mode='r')
+            row_of = {int(object_id): row for row, object_id in enumerate(stored_ids[:count]) if object_id >= 0}
+            new_ids = [object_id for object_id in dict.fromkeys(object_ids) if object_id not in row_of]
+            if count + len(new_ids) > capacity:
+                capacity = max(capacity * 2, count + len(new_ids))
+                self._allocate(capacity, (np.load(self.vectors_path, mmap_mode='r'), stored_ids, count))
+            for object_id in new_ids:
+                row_of[object_id] = count
+                count += 1
+
+            stored_vectors = np.load(self.vectors_path, mmap_mode='r+')
+            stored_ids = np.load(self.ids_path, mmap_mode='r+')
+            rows = [row_of[object_id] for object_id in object_ids]
+            stored_vectors[rows] = vectors
+            stored_ids[rows] = object_ids
+            stored_vectors.flush()
+            stored_ids.flush()
+            self._write_meta(count, capacity, meta.get('built_at'))
+
+    def remove(self, object_ids):
+        with self._write_lock():
+            meta = self._read_meta()
+            if meta is None:
+                return
+            stored_vectors = np.load(self.vectors_path, mmap_mode='r+')
+            stored_ids = np.load(self.ids_path, mmap_mode='r+')
+            rows = np.flatnonzero(np.isin(stored_ids[:meta['count']], list(object_ids)))
+            stored_ids[rows] = -1
+            stored_vectors[rows] = 0
+            stored_vectors.flush()
+            stored_ids.flush()
+            self._write_meta(meta['count'], meta['capacity'], meta.get('built_at'))
+
+    def rebuild(self, batches, total, max_age=None):
+        """
+        Reconstruye (y compacta) el índice a partir de lotes (ids, vectores normalizados). Con
+        max_age no hace nada (devuelve None) si otro proceso lo reconstruyó hace menos de
+        max_age segundos mientras se esperaba el lock.
+        """
+        with self._write_lock():
+            meta = self._read_meta()
+            if (
+                max_age is not None and meta is not None and meta.get('built_at')
+                and meta['dimensions'] == self.dimensions and meta['embedder'] == self.embedder_name
+                and time.time() - meta['built_at'] < max_age
+            ):
+                return None
+            capacity = max(1024, total)
+            self._allocate(capacity)
+            stored_vectors = np.load(self.vectors_path, mmap_mode='r+')
+            stored_ids = np.load(self.ids_path, mmap_mode='r+')
+            count = 0
+            for object_ids, vectors in batches:
+                end = min(count + len(object_ids), capacity)
+                stored_vectors[count:end] = vectors[:end - count]
+                stored_ids[count:end] = object_ids[:end - count]
+                count = end
+            stored_vectors.flush()
+            stored_ids.flush()
+            self._write_meta(count, capacity, time.time())
+        return count
+
+
+def company_text(company):
+    category = company.category.name if company.category_id else ''
+    return ' '.join(part for part in (company.name, category, company.description) if part)
+
+
+def product_text(product):
+    category = product.category.name if product.category_id else ''
+    return ' '.join(part for part in (product.name, category, product.description) if part)
+
+
+SOURCES = {
+    'company': (Company, company_text),
+    'product': (Product, product_text),
+}
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index_root():
+    return getattr(settings, 'SEMANTIC_SEARCH_INDEX_ROOT', os.path.join(settings.BASE_DIR, 'vector_index'))
+
+
+def get_index(name, embedder=None):
+    embedder = embedder or get_embedder()
+    key = (name, embedder.name, embedder.dimensions)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = VectorIndex(get_index_root(), name, embedder.dimensions, embedder.name)
+        return _indexes[key]
+
+
+def embed_objects(name, objects, embedder):
+    _, to_text = SOURCES[name]
+    return normalize_rows(embedder.embed([to_text(obj) for obj in objects]))
+
+
+def index_objects(name, objects):
+    """Actualización incremental: vuelve a calcular el vector de los objetos indicados."""
+    objects = list(objects)
+    if not objects:
+        return
+    embedder = get_embedder()
+    get_index(name, embedder).upsert([obj.pk for obj in objects], embed_objects(name, objects, embedder))
+
+
+def remove_objects(name, object_ids):
+    get_index(name).remove(object_ids)
+
+
+def get_max_age():
+    return getattr(settings, 'SEMANTIC_SEARCH_MAX_AGE', 900)
+
+
+def rebuild_index(name, batch_size=500, max_age=None):
+    model, _ = SOURCES[name]
+    embedder = get_embedder()
+    queryset = model.objects.select_related('category').order_by('pk')
+
+    def batches():
+        last_pk = 0
+        while True:
+            objects = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not objects:
+                return
+            last_pk = objects[-1].pk
+            yield [obj.pk for obj in objects], embed_objects(name, objects, embedder)
+
+    return get_index(name, embedder).rebuild(batches(), queryset.count(), max_age)
+
+
+def index_is_stale(name, embedder=None):
+    """Sin construir, construido con otro embedder o reconstruido hace más de get_max_age()."""
+    try:
+        built_at = get_index(name, embedder).built_at()
+    except IndexMismatch:
+        return True
+    return built_at is None or time.time() - built_at > get_max_age()
+
+
+def ensure_indexes(batch_size=500):
+    """
+    Reconstruye los índices obsoletos (ver index_is_stale). Los ficheros viven en el disco del
+    dyno, que empieza vacío tras cada despliegue o reinicio, y los guardados hechos en otro dyno
+    solo llegan con una reconstrucción. Lo ejecuta refresh_in_background() (arranque de los
+    workers y búsquedas) o build_vector_index --if-stale.
+    Devuelve {nombre: vectores} de los reconstruidos.
+    """
+    rebuilt = {}
+    for name in SOURCES:
+        if index_is_stale(name):
+            count = rebuild_index(name, batch_size, max_age=get_max_age())
+            if count is not None:
+                rebuilt[name] = count
+    return rebuilt
+
+
+_refresh_thread = None
+_refresh_lock = threading.Lock()
+
+
+def refresh_in_background():
+    """Lanza ensure_indexes() en un hilo si algún índice está obsoleto y no hay otro en curso."""
+    global _refresh_thread
+    if not any(index_is_stale(name) for name in SOURCES):
+        return False
+    with _refresh_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return False
+        _refresh_thread = threading.Thread(target=_refresh, name='semantic-index-refresh', daemon=True)
+        _refresh_thread.start()
+    return True
+
+
+def _refresh():
+    try:
+        rebuilt = ensure_indexes()
+        if rebuilt:
+            logger.info(f"Semantic indexes rebuilt: {rebuilt}")
+    except Exception as e:
+        logger.error(f"Error rebuilding semantic indexes: {str(e)}")
+    finally:
+        connections.close_all()
+
+
+def search(queries, k=20, sources=None):
+    """
+    Busca un lote de consultas de texto en los índices indicados (todos por defecto).
+    Devuelve, por consulta, [(fuente, id, score)] ordenado por similitud.
+    """
+    embedder = get_embedder()
+    # Tras un despliegue el índice del dyno está vacío: se construye en segundo plano
+    refresh_in_background()
+    vectors = normalize_rows(embedder.embed(list(queries)))
+    results = [[] for _ in queries]
+    for name in sources or SOURCES:
+        try:
+            hits = get_index(name, embedder).search(vectors, k)
+        except IndexMismatch as e:
+            logger.warning(f"Semantic index {name} needs a rebuild: {str(e)}")
+            continue
+        for position, query_hits in enumerate(hits):
+            results[position].extend((name, object_id, score) for object_id, score in query_hits)
+    return [sorted(query_results, key=lambda hit: -hit[2])[:k] for query_results in results]
+
+
+def update_on_save_enabled():
+    return getattr(settings, 'SEMANTIC_SEARCH_UPDATE_ON_SAVE', True)
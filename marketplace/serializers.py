@@ -1,10 +1,50 @@
+from decimal import Decimal
+from urllib.parse import urljoin
+
 from rest_framework import serializers
 from .models import Company, Category, Product, Order, OrderItem, CompanyCategory, Country, TopBurgerSection, Promotion, TopBurgerItem
-from .models import BusinessHours
+from .models import BusinessHours, RelatedProduct
+from .trending import trending_items
+from .counters import EVENT_FIELDS, TARGETS
+from django.urls import reverse
 from django.db import transaction
 from django.utils import timezone
-from django.db.models import Q
-
+from django.db.models import Prefetch, Q
+from django.core.files.uploadedfile import UploadedFile
+from .uploads import defer_image_upload, deferred_uploads_enabled, upload_image
+from .images import lqip, variant_urls
+
+
+
+class DeferredImageUploadSerializer(serializers.ModelSerializer):
+    """
+    Las imágenes de deferred_image_fields no se suben a Cloudinary dentro de la petición:
+    se encolan en la base de datos y el worker process_image_uploads las sube después.
+    pending_images indica qué campos siguen pendientes tras la escritura. Con
+    DEFERRED_IMAGE_UPLOADS desactivado se suben al guardar, también con variantes y LQIP.
+    """
+    deferred_image_fields = ()
+    pending_images = serializers.SerializerMethodField()
+
+    def get_pending_images(self, obj):
+        return getattr(obj, '_pending_images', [])
+
+    def save(self, **kwargs):
+        uploads = {}
+        for field_name in self.deferred_image_fields:
+            if isinstance(self.validated_data.get(field_name), UploadedFile):
+                uploads[field_name] = self.validated_data.pop(field_name)
+
+        instance = super().save(**kwargs)
+
+        deferred = deferred_uploads_enabled()
+        for field_name, uploaded_file in uploads.items():
+            if deferred:
+                defer_image_upload(instance, field_name, uploaded_file)
+            else:
+                upload_image(instance, field_name, uploaded_file)
+        instance._pending_images = list(uploads) if deferred else []
+        return instance
 
 
 class BusinessHoursSerializer(serializers.ModelSerializer):
@@ -54,7 +94,29 @@ class CountrySerializer(serializers.ModelSerializer):
         return None
 
 
-class PromotionSerializer(serializers.ModelSerializer):
+def company_promotions_prefetch(lookup='promotions'):
+    """
+    Promociones activas de cada empresa en active_promotions_list, en una sola consulta para
+    todo el listado (ver CompanySerializer.get_active_promotions).
+    """
+    promotions = Promotion.objects.filter(is_active=True).select_related('company', 'product', 'category')
+    return Prefetch(lookup, queryset=promotions, to_attr='active_promotions_list')
+
+
+def product_promotions_prefetch(lookup='promotions'):
+    """Promociones vigentes de cada producto en active_promotions_list (ver ProductSerializer)."""
+    now = timezone.now()
+    promotions = Promotion.objects.filter(
+        is_active=True,
+        start_date__lte=now
+    ).filter(
+        Q(end_date__gte=now) | Q(end_date__isnull=True)
+    ).select_related('company', 'product', 'category')
+    return Prefetch(lookup, queryset=promotions, to_attr='active_promotions_list')
+
+
+class PromotionSerializer(DeferredImageUploadSerializer):
+    deferred_image_fields = ('banner',)
     banner_url = serializers.SerializerMethodField()
     company_name = serializers.SerializerMethodField()
     product_name = serializers.SerializerMethodField()
@@ -78,13 +140,15 @@ class PromotionSerializer(serializers.ModelSerializer):
             'discount_value',
             'discount_display',
             'banner_url',
+            'pending_images',
             'start_date',
             'end_date',
             'is_active',
+            'scheduled',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['scheduled', 'created_at', 'updated_at']
 
     def get_banner_url(self, obj):
         if obj.banner:
@@ -149,9 +213,12 @@ class PromotionSerializer(serializers.ModelSerializer):
             validated_data['discount_value'] = int(round(float(validated_data['discount_value'])))
         return super().update(instance, validated_data)
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DeferredImageUploadSerializer):
+    deferred_image_fields = ('profile_picture', 'cover_photo')
     profile_picture_url = serializers.SerializerMethodField()
     cover_photo_url = serializers.SerializerMethodField()
+    cover_photo_variants = serializers.SerializerMethodField()
+    cover_photo_lqip = serializers.SerializerMethodField()
     category = CompanyCategorySerializer(read_only=False, required=False)
     country = CountrySerializer(read_only=False, required=False)
     business_hours = BusinessHoursSerializer(read_only=False, required=False)
@@ -171,8 +238,16 @@ class CompanySerializer(serializers.ModelSerializer):
             return obj.cover_photo.url
         return None
 
+    def get_cover_photo_variants(self, obj):
+        return variant_urls(obj, 'cover_photo')
+
+    def get_cover_photo_lqip(self, obj):
+        return lqip(obj, 'cover_photo')
+
     def get_active_promotions(self, obj):
-        promotions = obj.promotions.filter(is_active=True)
+        promotions = getattr(obj, 'active_promotions_list', None)
+        if promotions is None:
+            promotions = obj.promotions.filter(is_active=True)
         return PromotionSerializer(promotions, many=True).data
 
     @transaction.atomic
@@ -235,13 +310,15 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DeferredImageUploadSerializer):
+    deferred_image_fields = ('image',)
     image_url = serializers.SerializerMethodField()
     active_promotions = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
         fields = '__all__'
+        read_only_fields = ['effective_price', 'best_promotion']
 
     def get_image_url(self, obj):
         if obj.image:
@@ -249,6 +326,10 @@ class ProductSerializer(serializers.ModelSerializer):
         return None
 
     def get_active_promotions(self, obj):
+        # Los listados las traen con product_promotions_prefetch; un solo objeto las consulta
+        promotions = getattr(obj, 'active_promotions_list', None)
+        if promotions is not None:
+            return PromotionSerializer(promotions, many=True, context=self.context).data
         now = timezone.now()
         promotions = Promotion.objects.filter(
             product=obj,
@@ -261,6 +342,67 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 
+class CounterEventSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=list(EVENT_FIELDS))
+    target = serializers.ChoiceField(choices=list(TARGETS))
+    id = serializers.IntegerField(min_value=1)
+
+
+class CounterEventBatchSerializer(serializers.Serializer):
+    events = serializers.ListField(child=CounterEventSerializer(), allow_empty=False, max_length=100)
+
+
+class PromotionBulkUpdateSerializer(serializers.Serializer):
+    """Selección (ids y/o company) y operación (is_active y/o extend_days) para el PATCH masivo."""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    company = serializers.IntegerField(required=False)
+    is_active = serializers.BooleanField(required=False)
+    extend_days = serializers.IntegerField(required=False, min_value=1, max_value=365)
+
+    def validate(self, data):
+        if 'ids' not in data and 'company' not in data:
+            raise serializers.ValidationError('Debe indicar ids o company')
+        if 'is_active' not in data and 'extend_days' not in data:
+            raise serializers.ValidationError('Debe indicar is_active o extend_days')
+        return data
+
+
+class ProductBulkUpdateSerializer(serializers.Serializer):
+    """Selección (ids, company, category) y cambio porcentual de precio para el PATCH masivo."""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    company = serializers.IntegerField(required=False)
+    category = serializers.IntegerField(required=False)
+    price_change_percent = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=Decimal('-99'), max_value=Decimal('1000')
+    )
+
+    def validate(self, data):
+        if not any(name in data for name in ('ids', 'company', 'category')):
+            raise serializers.ValidationError('Debe indicar ids, company o category')
+        return data
+
+
+class RelatedProductSerializer(serializers.ModelSerializer):
+    """Vecino precalculado; los datos del producto salen del select_related('related')."""
+    id = serializers.IntegerField(source='related.id', read_only=True)
+    name = serializers.CharField(source='related.name', read_only=True)
+    company = serializers.IntegerField(source='related.company_id', read_only=True)
+    price = serializers.DecimalField(source='related.price', max_digits=10, decimal_places=2, read_only=True)
+    effective_price = serializers.DecimalField(
+        source='related.effective_price', max_digits=10, decimal_places=2, read_only=True
+    )
+    image_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RelatedProduct
+        fields = ['id', 'name', 'company', 'price', 'effective_price', 'image_url', 'score', 'reason']
+
+    def get_image_url(self, obj):
+        if obj.related.image:
+            return obj.related.image.url
+        return None
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
@@ -275,12 +417,33 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class OrderHistoryItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'product_name', 'quantity', 'price']
+
+
+class OrderHistorySerializer(serializers.ModelSerializer):
+    """Pedido con nombres de empresa y productos; requiere select_related/prefetch_related."""
+    company_name = serializers.CharField(source='company.name', read_only=True)
+    items = OrderHistoryItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'company', 'company_name', 'created_at', 'total', 'items']
+
+
 class TopBurgerItemSerializer(serializers.ModelSerializer):
     company_name = serializers.SerializerMethodField()
     company_logo = serializers.SerializerMethodField()
     company_profile_url = serializers.SerializerMethodField()
     featured_image = serializers.SerializerMethodField()
+    featured_image_variants = serializers.SerializerMethodField()
+    featured_image_lqip = serializers.SerializerMethodField()
     click_url = serializers.SerializerMethodField()
+    tracking_url = serializers.SerializerMethodField()
 
     class Meta:
         model = TopBurgerItem
@@ -289,9 +452,12 @@ class TopBurgerItemSerializer(serializers.ModelSerializer):
             'company_logo',
             'company_profile_url',
             'featured_image',
+            'featured_image_variants',
+            'featured_image_lqip',
             'order',
             'item_type',
-            'click_url'
+            'click_url',
+            'tracking_url'
         ]
 
     def get_company_name(self, obj):
@@ -299,7 +465,7 @@ class TopBurgerItemSerializer(serializers.ModelSerializer):
 
     def get_company_logo(self, obj):
         if obj.company and obj.company.profile_picture and obj.item_type == 'COMPANY':
-            return self.context['request'].build_absolute_uri(obj.company.profile_picture.url)
+            return self._absolute_url(obj.company.profile_picture.url)
         return ""
 
     def get_company_profile_url(self, obj):
@@ -309,18 +475,43 @@ class TopBurgerItemSerializer(serializers.ModelSerializer):
 
     def get_featured_image(self, obj):
         if obj.featured_image:
-            return self.context['request'].build_absolute_uri(obj.featured_image.url)
+            return self._absolute_url(obj.featured_image.url)
         return ""
 
+    def get_featured_image_variants(self, obj):
+        return {width: self._absolute_url(url) for width, url in variant_urls(obj, 'featured_image').items()}
+
+    def get_featured_image_lqip(self, obj):
+        return lqip(obj, 'featured_image')
+
+    def _absolute_url(self, url):
+        # En la caché compartida se usa la URL base canónica (base_url), no la petición;
+        # sin ninguna de las dos se devuelve la URL tal cual
+        if self.context.get('base_url'):
+            return urljoin(self.context['base_url'], url)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
     def get_click_url(self, obj):
         if obj.item_type == 'BANNER':
             return obj.custom_url
-        return obj.company_profile_url if obj.company else ""
+        return self.get_company_profile_url(obj) if obj.company else ""
+
+    def get_tracking_url(self, obj):
+        # Redirección que cuenta el clic; los elementos de secciones automáticas no tienen id
+        if obj.pk is None:
+            return ""
+        return self._absolute_url(reverse('top-burger-item-click', args=[obj.pk]))
 
 
 class TopBurgerSectionSerializer(serializers.ModelSerializer):
-    items = TopBurgerItemSerializer(many=True, read_only=True)
+    items = serializers.SerializerMethodField()
 
     class Meta:
         model = TopBurgerSection
-        fields = ['id', 'title', 'location', 'position', 'items']
+        fields = ['id', 'title', 'location', 'position', 'mode', 'items']
+
+    def get_items(self, obj):
+        # En modo automático los elementos salen de las puntuaciones de tendencia
+        items = trending_items(obj) if obj.mode == 'AUTO' else obj.items.all()
+        return TopBurgerItemSerializer(items, many=True, context=self.context).data
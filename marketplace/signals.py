@@ -0,0 +1,211 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .assistant import invalidate_catalog
+from .catalog import invalidate_facets
+from .company_cache import invalidate_all_companies, invalidate_companies
+from .country_catalog import invalidate_all_countries, invalidate_company_countries, invalidate_countries
+from .home_feed import request_refresh
+from .pricing import products_affected_by, recompute_effective_prices
+from .promotion_feed import invalidate_promotion_feed
+from .models import (
+    BusinessHours, Category, Company, CompanyCategory, Country, Product, Promotion, TopBurgerItem, TopBurgerSection
+)
+from .reference_data import invalidate_reference_data
+from .top_burgers import invalidate_top_burgers
+
+logger = logging.getLogger(__name__)
+
+
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=CompanyCategory)
+@receiver([post_save, post_delete], sender=Category)
+def reference_data_changed(sender, **kwargs):
+    # Tras el commit: el paquete no caduca, y una petición concurrente lo volvería a guardar con
+    # los datos anteriores
+    transaction.on_commit(invalidate_reference_data)
+
+
+@receiver([post_save, post_delete], sender=TopBurgerSection)
+@receiver([post_save, post_delete], sender=TopBurgerItem)
+@receiver([post_save, post_delete], sender=Promotion)
+@receiver([post_save, post_delete], sender=CompanyCategory)
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=BusinessHours)
+@receiver([post_save, post_delete], sender=Country)
+def home_feed_changed(sender, **kwargs):
+    # request_refresh espera al commit
+    request_refresh()
+
+
+@receiver(pre_save, sender=Promotion)
+def promotion_before_save(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = Promotion.objects.filter(pk=instance.pk).values(
+            'company_id', 'product_id', 'category_id', 'is_active', 'start_date'
+        ).first()
+    if previous is None:
+        # Solo las creadas con inicio futuro las activa el programador
+        instance.scheduled = instance.start_date > timezone.now()
+        return
+
+    # Si cambia el alcance, los productos que dejan de estar cubiertos también se recalculan
+    instance._previous_scope = {
+        field: previous[field] for field in ('company_id', 'product_id', 'category_id')
+    }
+    if previous['is_active'] and not instance.is_active:
+        # Desactivada a propósito: el programador no debe volver a activarla
+        instance.scheduled = False
+    elif instance.start_date != previous['start_date'] and instance.start_date > timezone.now():
+        instance.scheduled = True
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+def promotion_pricing_changed(sender, instance, **kwargs):
+    affected = products_affected_by(instance)
+    previous_scope = getattr(instance, '_previous_scope', None)
+    if previous_scope:
+        affected = affected | products_affected_by(Promotion(**previous_scope))
+    transaction.on_commit(lambda: recompute_effective_prices(affected))
+
+
+@receiver(post_save, sender=Product)
+def product_pricing_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'price' not in update_fields and 'category' not in update_fields:
+        return
+    transaction.on_commit(lambda: recompute_effective_prices(Product.objects.filter(pk=instance.pk)))
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Promotion)
+def product_facets_changed(sender, **kwargs):
+    # Tras el commit y después del recálculo de precios efectivos (filtros min/max_effective_price)
+    transaction.on_commit(invalidate_facets)
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def promotion_feed_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_promotion_feed)
+
+
+@receiver([post_save, post_delete], sender=Company)
+def company_changed(sender, instance, **kwargs):
+    # Tras el commit, para que una petición concurrente no vuelva a cachear los datos anteriores;
+    # tras el borrado instance.pk pasa a None
+    company_id = instance.pk
+    transaction.on_commit(lambda: invalidate_companies([company_id]))
+
+
+@receiver([post_save, post_delete], sender=BusinessHours)
+@receiver([post_save, post_delete], sender=Promotion)
+@receiver([post_save, post_delete], sender=Product)
+def company_related_changed(sender, instance, **kwargs):
+    # Las promociones activas anidadas incluyen el nombre del producto
+    company_id = instance.company_id
+    transaction.on_commit(lambda: invalidate_companies([company_id]))
+
+
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=CompanyCategory)
+def company_shared_data_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_all_companies)
+
+
+@receiver(pre_save, sender=Company)
+def company_country_before_save(sender, instance, **kwargs):
+    # Si la empresa cambia de país hay que invalidar también el catálogo del país anterior
+    if instance.pk is not None:
+        instance._previous_country_id = Company.objects.filter(pk=instance.pk).values_list(
+            'country_id', flat=True
+        ).first()
+
+
+@receiver([post_save, post_delete], sender=Company)
+def country_catalog_company_changed(sender, instance, **kwargs):
+    # Tras el commit, para que una petición concurrente no vuelva a cachear los datos anteriores
+    country_ids = [instance.country_id, getattr(instance, '_previous_country_id', None)]
+    transaction.on_commit(lambda: invalidate_countries(country_ids))
+
+
+@receiver([post_save, post_delete], sender=BusinessHours)
+@receiver([post_save, post_delete], sender=Promotion)
+@receiver([post_save, post_delete], sender=Product)
+def country_catalog_related_changed(sender, instance, **kwargs):
+    # Tras el commit y después del recálculo de precios efectivos, registrado antes
+    company_id = instance.company_id
+    transaction.on_commit(lambda: invalidate_company_countries([company_id]))
+
+
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=CompanyCategory)
+@receiver([post_save, post_delete], sender=Category)
+def country_catalog_shared_changed(sender, **kwargs):
+    invalidate_all_countries()
+
+
+@receiver([post_save, post_delete], sender=TopBurgerSection)
+@receiver([post_save, post_delete], sender=TopBurgerItem)
+@receiver([post_save, post_delete], sender=Company)
+def top_burgers_changed(sender, **kwargs):
+    invalidate_top_burgers()
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Product)
+def semantic_index_changed(sender, instance, update_fields=None, **kwargs):
+    # semantic_search importa NumPy; se carga con el primer guardado, no al arrancar
+    from .semantic_search import index_objects, update_on_save_enabled
+
+    if not update_on_save_enabled():
+        return
+    if update_fields is not None and not {'name', 'description', 'category'} & set(update_fields):
+        return
+    name = 'company' if sender is Company else 'product'
+
+    def update():
+        try:
+            index_objects(name, [instance])
+        except Exception as e:
+            # El índice se puede reconstruir con build_vector_index; no debe romper el guardado
+            logger.error(f"Error updating semantic index for {name} {instance.pk}: {str(e)}")
+
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Product)
+def semantic_index_deleted(sender, instance, **kwargs):
+    from .semantic_search import remove_objects, update_on_save_enabled
+
+    if not update_on_save_enabled():
+        return
+    name = 'company' if sender is Company else 'product'
+    # Tras el borrado instance.pk pasa a None: se guarda antes del commit
+    pk = instance.pk
+
+    def remove():
+        try:
+            remove_objects(name, [pk])
+        except Exception as e:
+            logger.error(f"Error removing {name} {pk} from semantic index: {str(e)}")
+
+    transaction.on_commit(remove)
+
+
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Promotion)
+@receiver([post_save, post_delete], sender=BusinessHours)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=CompanyCategory)
+@receiver([post_save, post_delete], sender=Country)
+def assistant_catalog_changed(sender, **kwargs):
+    invalidate_catalog()
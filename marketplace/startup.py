@@ -0,0 +1,46 @@
+import threading
+
+from django.utils.module_loading import import_string
+
+# Piezas del arranque diferido (LAZY_STARTUP): subsistemas opcionales que se cargan con su
+# primera petición en lugar de al arrancar el worker. profile_boot mide la diferencia.
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """Vista basada en clase que se importa (y se construye con as_view) en su primera petición."""
+    view = None
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
+
+class LazyAdminURLConf:
+    """
+    URLconf del admin que ejecuta autodiscover() al resolverse por primera vez una URL bajo
+    /admin/. Se usa con SimpleAdminConfig, que no importa los admin.py al arrancar.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.lock = threading.Lock()
+        self.patterns = None
+
+    @property
+    def urlpatterns(self):
+        with self.lock:
+            if self.patterns is None:
+                from django.contrib import admin
+
+                admin.autodiscover()
+                self.patterns = self.site.get_urls()
+        return self.patterns
+
+
+def lazy_admin_urls(site):
+    """Equivalente diferido de admin.site.urls para usar en path('admin/', ...)."""
+    return LazyAdminURLConf(site), 'admin', site.name
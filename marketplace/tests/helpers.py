@@ -0,0 +1,57 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from PIL import Image
+
+from marketplace.models import Company, Product, Promotion
+
+
+def make_user(username='owner'):
+    return User.objects.create_user(username=username, password='secret')
+
+
+def make_company(user=None, **fields):
+    values = {
+        'name': 'Burger Co',
+        'description': 'Hamburguesas a la parrilla',
+        'profile_picture': 'company_profiles/profile',
+        'cover_photo': 'company_covers/cover',
+        'phone': '555-0100',
+        'address': 'Calle 1',
+    }
+    values.update(fields)
+    return Company.objects.create(user=user or make_user(), **values)
+
+
+def make_product(company, **fields):
+    values = {
+        'name': 'Clásica',
+        'description': 'Carne, queso y pan brioche',
+        'price': Decimal('10.00'),
+        'image': 'products/image',
+    }
+    values.update(fields)
+    return Product.objects.create(company=company, **values)
+
+
+def make_promotion(company, **fields):
+    values = {
+        'title': '2x1',
+        'description': 'Promoción de prueba',
+        'terms_conditions': 'Sin condiciones',
+        'discount_type': 'PERCENTAGE',
+        'discount_value': 50,
+        'banner': 'promotions/banner',
+        'start_date': timezone.now() - timezone.timedelta(days=1),
+    }
+    values.update(fields)
+    return Promotion.objects.create(company=company, **values)
+
+
+def png_upload(name='photo.png', size=(64, 32), color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from marketplace.models import Category, Order
+
+from .helpers import make_company, make_product, make_promotion, make_user
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=False)
+class AdminSearchTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='secret'))
+        burgers = Category.objects.create(name='Hamburguesas')
+        self.company = make_company(name='Burger Co')
+        self.other = make_company(user=make_user('other'), name='Pizza Place')
+        product = make_product(self.company, name='Doble Queso', category=burgers)
+        make_promotion(self.company, title='2x1', product=product, category=burgers,
+                       description='Solo los martes')
+        make_promotion(self.other, title='Pizza gratis', description='Con tu primera orden')
+        Order.objects.create(user=self.company.user, company=self.other, total=Decimal('10.00'))
+
+    def search(self, model, query):
+        response = self.client.get(f'/admin/marketplace/{model}/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [str(obj) for obj in response.context['cl'].result_list]
+
+    def test_promotions_are_searchable_by_related_names_and_description(self):
+        self.assertEqual(self.search('promotion', 'Burger'), ['2x1 - Burger Co'])
+        self.assertEqual(self.search('promotion', 'doble'), ['2x1 - Burger Co'])
+        self.assertEqual(self.search('promotion', 'Hambur'), ['2x1 - Burger Co'])
+        self.assertEqual(self.search('promotion', 'martes'), ['2x1 - Burger Co'])
+        self.assertEqual(self.search('promotion', 'gratis'), ['Pizza gratis - Pizza Place'])
+
+    def test_related_names_match_by_prefix(self):
+        self.assertEqual(self.search('promotion', 'Place'), [])
+        self.assertEqual(self.search('product', 'burger'), ['Doble Queso'])
+        self.assertEqual(len(self.search('order', 'Pizza')), 1)
+        self.assertEqual(self.search('order', 'Burger'), [])
+
+    def test_changelists_render(self):
+        for model in ('promotion', 'product', 'order', 'orderitem', 'company', 'topburgeritem'):
+            self.assertEqual(self.client.get(f'/admin/marketplace/{model}/').status_code, 200, model)
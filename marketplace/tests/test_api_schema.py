@@ -0,0 +1,75 @@
+import gzip
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from drf_spectacular.drainage import GENERATOR_STATS
+from drf_spectacular.views import SpectacularAPIView
+
+from marketplace import api_schema
+
+
+class ApiSchemaTests(SimpleTestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(API_SCHEMA_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.object(api_schema, '_artifacts', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Los avisos de drf-spectacular sobre los serializers no son parte de estas pruebas
+        self.enterContext(GENERATOR_STATS.silence())
+        self.version = api_schema.code_version()
+
+    def get(self, **headers):
+        params = headers.pop('params', {})
+        return self.client.get('/api/schema/', params, headers=headers)
+
+    def live_schema(self):
+        request = RequestFactory().get('/api/schema/', {'format': 'json'})
+        response = SpectacularAPIView.as_view()(request)
+        response.render()
+        return json.loads(response.content)
+
+    def test_artifact_is_served_with_etag_and_gzip(self):
+        plain = self.get(params={'format': 'json'})
+        self.assertEqual(plain.status_code, 200)
+        self.assertEqual(plain['Content-Type'], 'application/vnd.oai.openapi+json')
+        self.assertEqual(plain['ETag'], f'"{self.version}-json"')
+        self.assertEqual(json.loads(plain.content), self.live_schema())
+
+        compressed = self.get(params={'format': 'json'}, accept_encoding='gzip, br')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+
+        not_modified = self.get(params={'format': 'json'}, if_none_match=plain['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(self.get(if_none_match=plain['ETag']).status_code, 200)
+
+    def test_stale_artifact_is_rejected_then_regenerated(self):
+        call_command('build_api_schema', stdout=mock.MagicMock())
+        call_command('build_api_schema', '--check', stdout=mock.MagicMock())
+
+        # Mismo código, esquema distinto (p. ej. otra versión de drf-spectacular)
+        api_schema.artifact_path(self.version, 'json').write_bytes(b'{"openapi": "3.0.0"}')
+        with self.assertRaisesMessage(CommandError, 'desactualizado (json)'):
+            call_command('build_api_schema', '--check', stdout=mock.MagicMock())
+
+        call_command('build_api_schema', stdout=mock.MagicMock())
+        self.assertEqual(api_schema.stale_formats(), [])
+        self.assertEqual(json.loads(self.get(params={'format': 'json'}).content), self.live_schema())
+
+    def test_new_code_version_replaces_old_artifacts(self):
+        api_schema.build_artifacts('old')
+        with mock.patch.object(api_schema, '_code_version', 'new'):
+            response = self.get()
+        self.assertEqual(response['ETag'], '"new-yaml"')
+        names = sorted(path.name for path in api_schema.get_schema_root().iterdir())
+        self.assertEqual(names, ['openapi-new.json', 'openapi-new.json.gz', 'openapi-new.yaml', 'openapi-new.yaml.gz'])
@@ -0,0 +1,152 @@
+import datetime
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from marketplace.assistant import _is_open, answer_stream
+from marketplace.cache import local_cache
+from marketplace.models import BusinessHours
+
+
+class FakeClient:
+    """Cliente LLM de prueba: emite los tokens de la clase y falla si failure está definido."""
+    tokens = ['Burger ', 'Co ', 'abre a las 18:00.']
+    failure = None
+    calls = []
+
+    async def stream(self, messages):
+        FakeClient.calls.append(messages)
+        for token in self.tokens:
+            yield token
+        if self.failure:
+            raise self.failure
+
+
+def collect(prompt):
+    """[(evento, datos)] emitidos por answer_stream para la pregunta."""
+    async def run():
+        return [chunk async for chunk in answer_stream(prompt)]
+
+    events = []
+    for chunk in async_to_sync(run)():
+        event_line, data_line = chunk.strip().split('\n')
+        events.append((event_line[len('event: '):], json.loads(data_line[len('data: '):])))
+    return events
+
+
+@override_settings(ASSISTANT_LLM_CLIENT='marketplace.tests.test_assistant.FakeClient')
+class AnswerStreamTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        FakeClient.calls = []
+        FakeClient.failure = None
+        grounding = mock.patch(
+            'marketplace.assistant.fetch_grounding', new=mock.AsyncMock(return_value='- Empresa #1 Burger Co')
+        )
+        self.fetch_grounding = grounding.start()
+        self.addCleanup(grounding.stop)
+
+    def test_streams_tokens_then_done(self):
+        events = collect('¿Cuándo abre Burger Co?')
+        self.assertEqual(events, [
+            ('token', {'text': 'Burger '}),
+            ('token', {'text': 'Co '}),
+            ('token', {'text': 'abre a las 18:00.'}),
+            ('done', {'cached': False}),
+        ])
+        self.assertIn('Burger Co', FakeClient.calls[0][0]['content'])
+
+    def test_repeated_question_is_served_from_cache(self):
+        collect('¿Cuándo abre Burger Co?')
+        events = collect('cuando abre burger co')
+        self.assertEqual(events, [
+            ('token', {'text': 'Burger Co abre a las 18:00.'}),
+            ('done', {'cached': True}),
+        ])
+        self.assertEqual(len(FakeClient.calls), 1)
+        self.fetch_grounding.assert_awaited_once()
+
+    def test_llm_failure_emits_error_and_is_not_cached(self):
+        FakeClient.failure = ConnectionError('reset by peer')
+        with self.assertLogs('marketplace.assistant', 'ERROR'):
+            events = collect('¿Cuándo abre Burger Co?')
+        self.assertEqual(events[-1], ('error', {'error': 'The assistant is not available right now'}))
+        self.assertNotIn('done', [event for event, _ in events])
+
+        FakeClient.failure = None
+        self.assertEqual(collect('¿Cuándo abre Burger Co?')[-1], ('done', {'cached': False}))
+
+    def test_grounding_failure_emits_error(self):
+        self.fetch_grounding.side_effect = RuntimeError('database is down')
+        with self.assertLogs('marketplace.assistant', 'ERROR'):
+            events = collect('¿Cuándo abre Burger Co?')
+        self.assertEqual(events, [('error', {'error': 'The assistant is not available right now'})])
+        self.assertEqual(FakeClient.calls, [])
+
+
+@override_settings(ASSISTANT_LLM_CLIENT='marketplace.tests.test_assistant.FakeClient')
+class AssistantViewTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        FakeClient.failure = None
+        grounding = mock.patch(
+            'marketplace.assistant.fetch_grounding', new=mock.AsyncMock(return_value='- Empresa #1 Burger Co')
+        )
+        grounding.start()
+        self.addCleanup(grounding.stop)
+
+    async def test_asgi_process_streams_events(self):
+        response = await self.async_client.get('/api/assistant/', {'q': '¿Cuándo abre Burger Co?'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[-1].startswith(b'event: done'))
+
+    def test_wsgi_process_answers_in_one_piece(self):
+        response = self.client.get('/api/assistant/', {'q': '¿Cuándo abre Burger Co?'})
+        self.assertEqual(response.status_code, 200)
+        # Así itera el WSGIHandler la respuesta: el stream async se consume entero
+        with self.assertWarnsMessage(Warning, 'must consume asynchronous iterators'):
+            body = b''.join(response).decode()
+        self.assertIn('abre a las 18:00.', body)
+        self.assertIn('event: done', body)
+
+    def test_missing_question_is_rejected(self):
+        self.assertEqual(self.client.get('/api/assistant/').status_code, 400)
+
+
+class IsOpenTests(SimpleTestCase):
+
+    def at(self, day, hour, minute=0):
+        # 2024-01-01 fue lunes
+        return datetime.datetime(2024, 1, day, hour, minute)
+
+    def test_daytime_hours(self):
+        hours = BusinessHours(monday_open=datetime.time(9), monday_close=datetime.time(17))
+        self.assertTrue(_is_open(hours, self.at(1, 9)))
+        self.assertFalse(_is_open(hours, self.at(1, 17)))
+        self.assertFalse(_is_open(hours, self.at(1, 8, 59)))
+
+    def test_overnight_hours_span_midnight(self):
+        hours = BusinessHours(monday_open=datetime.time(18), monday_close=datetime.time(2))
+        self.assertTrue(_is_open(hours, self.at(1, 23)))
+        self.assertTrue(_is_open(hours, self.at(2, 1, 30)))
+        self.assertFalse(_is_open(hours, self.at(2, 2)))
+        self.assertFalse(_is_open(hours, self.at(1, 17)))
+        # El lunes de madrugada sigue el horario del domingo, que no abre
+        self.assertFalse(_is_open(hours, self.at(1, 1)))
+
+    def test_closed_day_and_unknown_hours(self):
+        self.assertFalse(_is_open(BusinessHours(), self.at(1, 12)))
+        self.assertIsNone(_is_open(None, self.at(1, 12)))
@@ -0,0 +1,137 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from marketplace.cache import get_or_set, local_cache, stats
+from marketplace.models import TopBurgerItem, TopBurgerSection
+
+from .helpers import make_company
+
+
+class CacheTestMixin:
+    """Cada prueba parte de ambos niveles vacíos; el compartido es LocMemCache, como en desarrollo."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        local_cache.clear()
+        stats.reset()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+
+
+class CountingCompute:
+    def __init__(self, value, delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            self.threads.append(threading.current_thread())
+        time.sleep(self.delay)
+        return self.value
+
+
+class GetOrSetTests(CacheTestMixin, SimpleTestCase):
+
+    def run_concurrently(self, target, count):
+        barrier = threading.Barrier(count)
+        results = [None] * count
+
+        def worker(index):
+            barrier.wait()
+            results[index] = target()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        return results
+
+    def test_concurrent_misses_compute_once(self):
+        compute = CountingCompute({'items': [1, 2, 3]}, delay=0.2)
+
+        results = self.run_concurrently(lambda: get_or_set('test:stampede', compute, 60), 100)
+
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(results, [{'items': [1, 2, 3]}] * 100)
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['misses'], 1)
+        self.assertEqual(snapshot['coalesced'] + snapshot['shared_hits'] + snapshot['local_hits'], 99)
+
+    def test_hit_does_not_compute(self):
+        compute = CountingCompute('value')
+        get_or_set('test:hit', compute, 60)
+        self.assertEqual(get_or_set('test:hit', compute, 60), 'value')
+        self.assertEqual(compute.calls, 1)
+
+    def test_compute_error_reaches_every_waiter(self):
+        def fail():
+            time.sleep(0.1)
+            raise RuntimeError('boom')
+
+        def call():
+            try:
+                return get_or_set('test:error', fail, 60)
+            except RuntimeError as e:
+                return str(e)
+
+        self.assertEqual(self.run_concurrently(call, 10), ['boom'] * 10)
+        self.assertIsNone(cache.get('test:error'))
+
+    def test_stale_value_is_served_while_revalidating_in_background(self):
+        cache.set('test:stale', ('old', time.time() - 1), 60)
+        compute = CountingCompute('new', delay=0.5)
+
+        results = self.run_concurrently(lambda: get_or_set('test:stale', compute, 60), 20)
+
+        self.assertEqual(results, ['old'] * 20)
+        deadline = time.monotonic() + 5
+        while cache.get('test:stale')[0] != 'new' and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(compute.calls, 1)
+        self.assertIsNot(compute.threads[0], threading.main_thread())
+        self.assertEqual(get_or_set('test:stale', compute, 60), 'new')
+
+    def test_request_bound_compute_is_revalidated_inline(self):
+        cache.set('test:inline', ('old', time.time() - 1), 60)
+        compute = CountingCompute('new')
+
+        self.assertEqual(get_or_set('test:inline', compute, 60, background=False), 'new')
+        self.assertEqual(compute.threads, [threading.current_thread()])
+
+    def test_failed_inline_revalidation_serves_stale_value(self):
+        cache.set('test:inline-error', ('old', time.time() - 1), 60)
+
+        def fail():
+            raise RuntimeError('boom')
+
+        with self.assertLogs('marketplace.cache', 'ERROR'):
+            self.assertEqual(get_or_set('test:inline-error', fail, 60, background=False), 'old')
+
+
+@override_settings(PUBLIC_API_URL='https://api.example.test')
+class TopBurgerSectionsCacheTests(CacheTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        section = TopBurgerSection.objects.create()
+        self.item = TopBurgerItem.objects.create(
+            section=section, company=make_company(), order=1, featured_image='top_burgers/featured'
+        )
+
+    def test_urls_use_canonical_host_not_request_host(self):
+        first = self.client.get('/api/top-burgers/', HTTP_HOST='attacker.example').json()
+        second = self.client.get('/api/top-burgers/', HTTP_HOST='other.example').json()
+
+        tracking_url = first[0]['items'][0]['tracking_url']
+        self.assertEqual(tracking_url, f'https://api.example.test/api/top-burgers/items/{self.item.pk}/click/')
+        self.assertEqual(first, second)
+        self.assertEqual(stats.snapshot()['misses'], 1)
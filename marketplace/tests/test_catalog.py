@@ -0,0 +1,91 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from marketplace.cache import get_version, local_cache
+from marketplace.catalog import PRODUCT_FACETS_NAMESPACE
+from marketplace.models import Category
+from marketplace.promotion_feed import PROMOTION_FEED_NAMESPACE
+
+from .helpers import make_company, make_product, make_promotion, make_user
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=False, PRODUCT_PRICE_BUCKETS=(0, 10, 50))
+class ProductCatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        self.burgers = Category.objects.create(name='Hamburguesas')
+        self.drinks = Category.objects.create(name='Bebidas')
+        self.company = make_company(name='Burger Co')
+        self.other = make_company(user=make_user('other'), name='Otra')
+        self.classic = make_product(self.company, name='Clásica', price=Decimal('8.00'), category=self.burgers)
+        self.double = make_product(self.company, name='Doble', price=Decimal('12.00'), category=self.burgers)
+        self.soda = make_product(self.other, name='Soda', price=Decimal('2.00'), category=self.drinks)
+        self.deluxe = make_product(self.other, name='Deluxe', price=Decimal('60.00'), category=self.burgers)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_promotion(self.company, product=self.double, discount_value=50)
+
+    def names(self, **params):
+        response = self.client.get('/api/products/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [product['name'] for product in response.json()]
+
+    def facets(self, **params):
+        response = self.client.get('/api/products/', {'facets': 'true', **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_filters(self):
+        self.assertEqual(self.names(company=self.company.pk, ordering='name'), ['Clásica', 'Doble'])
+        self.assertEqual(self.names(category=self.drinks.pk), ['Soda'])
+        self.assertEqual(self.names(min_price='5', max_price='12', ordering='price'), ['Clásica', 'Doble'])
+        self.assertEqual(self.names(max_effective_price='6', ordering='price'), ['Soda', 'Doble'])
+        self.assertEqual(self.names(has_promotion='true'), ['Doble'])
+
+    def test_orderings(self):
+        self.assertEqual(self.names(ordering='-price'), ['Deluxe', 'Doble', 'Clásica', 'Soda'])
+        self.assertEqual(self.names(ordering='effective_price'), ['Soda', 'Doble', 'Clásica', 'Deluxe'])
+        self.assertEqual(self.names(ordering='name'), ['Clásica', 'Deluxe', 'Doble', 'Soda'])
+        self.assertEqual(self.names(ordering='newest'), ['Deluxe', 'Soda', 'Doble', 'Clásica'])
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'ordering': 'random'}, {'min_price': 'cheap'}, {'company': 'abc'}):
+            response = self.client.get('/api/products/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.json())
+
+    def test_facets_count_the_filtered_products(self):
+        data = self.facets(category=self.burgers.pk)
+        self.assertEqual(data['count'], 3)
+        facets = data['facets']
+        self.assertEqual(facets['category'], [{'id': self.burgers.pk, 'name': 'Hamburguesas', 'count': 3}])
+        self.assertEqual(
+            facets['company'],
+            [{'id': self.company.pk, 'name': 'Burger Co', 'count': 2}, {'id': self.other.pk, 'name': 'Otra', 'count': 1}]
+        )
+        self.assertEqual(
+            facets['price'],
+            [{'range': '0-10', 'count': 1}, {'range': '10-50', 'count': 1}, {'range': '50+', 'count': 1}]
+        )
+
+    def test_writes_invalidate_facets_and_feed_after_commit(self):
+        self.assertEqual(self.facets()['facets']['price'][0]['count'], 2)
+        facets_version = get_version(PRODUCT_FACETS_NAMESPACE)
+        feed_version = get_version(PROMOTION_FEED_NAMESPACE)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            make_product(self.other, name='Agua', price=Decimal('1.00'), category=self.drinks)
+        self.assertEqual(get_version(PRODUCT_FACETS_NAMESPACE), facets_version)
+        self.assertEqual(get_version(PROMOTION_FEED_NAMESPACE), feed_version)
+        self.assertEqual(self.facets()['facets']['price'][0]['count'], 2)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(PROMOTION_FEED_NAMESPACE), feed_version)
+        local_cache.clear()
+        self.assertEqual(self.facets()['facets']['price'][0]['count'], 3)
@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from marketplace.checkpoints import advance
+from marketplace.models import Order, OrderItem, ProductCoPurchase, RecommendationCheckpoint, TrendingScore
+from marketplace.recommendations import update_recommendations
+from marketplace.trending import update_trending_scores
+
+from .helpers import make_company, make_product
+
+
+class AdvanceTests(SimpleTestCase):
+
+    def checkpoint(self, last_order_id=0, open_gaps=None):
+        return RecommendationCheckpoint(name='test', last_order_id=last_order_id, open_gaps=open_gaps or {})
+
+    def test_missing_ids_below_the_new_checkpoint_stay_open(self):
+        checkpoint = self.checkpoint(last_order_id=10)
+        advance(checkpoint, [11, 14], now=1000)
+        self.assertEqual(checkpoint.last_order_id, 14)
+        self.assertEqual(checkpoint.open_gaps, {'13': 1000, '12': 1000})
+
+    def test_processed_gaps_are_closed_and_old_ones_expire(self):
+        checkpoint = self.checkpoint(last_order_id=14, open_gaps={'12': 1000, '13': 1000, '5': 100})
+        with override_settings(CHECKPOINT_GAP_TIMEOUT=600):
+            advance(checkpoint, [12], now=1000)
+        self.assertEqual(checkpoint.last_order_id, 14)
+        self.assertEqual(checkpoint.open_gaps, {'13': 1000})
+
+    def test_gaps_are_capped_to_the_most_recent_ids(self):
+        checkpoint = self.checkpoint(last_order_id=0)
+        with override_settings(CHECKPOINT_MAX_GAPS=3):
+            advance(checkpoint, [100], now=1000)
+        self.assertEqual(checkpoint.open_gaps, {'99': 1000, '98': 1000, '97': 1000})
+
+    def test_first_run_can_skip_recording_gaps(self):
+        checkpoint = self.checkpoint(last_order_id=0)
+        advance(checkpoint, [50], record_gaps=False, now=1000)
+        self.assertEqual((checkpoint.last_order_id, checkpoint.open_gaps), (50, {}))
+
+
+class LateCommitRecommendationTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.burger = make_product(self.company)
+        self.fries = make_product(self.company, name='Papas')
+
+    def order(self, order_id, *products):
+        order = Order.objects.create(id=order_id, user=self.company.user, company=self.company, total=Decimal('10'))
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        return order
+
+    def test_order_committed_after_a_higher_id_is_still_counted(self):
+        self.order(1, self.burger, self.fries)
+        self.order(3, self.burger, self.fries)
+        self.assertEqual(update_recommendations()[0], 2)
+
+        # El pedido 2 se insertó antes que el 3 pero se confirma después
+        self.order(2, self.burger, self.fries)
+        self.assertEqual(update_recommendations()[0], 1)
+        self.assertEqual(update_recommendations()[0], 0)
+
+        pair = ProductCoPurchase.objects.get(product=self.burger, related=self.fries)
+        self.assertEqual(pair.count, 3)
+        self.assertEqual(RecommendationCheckpoint.objects.get(name='copurchase').open_gaps, {})
+
+
+class LateCommitTrendingTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.burger = make_product(self.company)
+
+    def order(self, order_id, quantity=1):
+        order = Order.objects.create(id=order_id, user=self.company.user, company=self.company, total=Decimal('10'))
+        OrderItem.objects.create(order=order, product=self.burger, quantity=quantity, price=self.burger.price)
+
+    def score(self):
+        return TrendingScore.objects.get(company=self.company, category__isnull=True).score
+
+    def test_order_committed_after_a_higher_id_is_still_scored(self):
+        now = timezone.now()
+        self.order(1)
+        update_trending_scores(now)
+        self.order(3)
+        update_trending_scores(now)
+        self.assertAlmostEqual(self.score(), 2, places=3)
+
+        self.order(2)
+        update_trending_scores(now)
+        update_trending_scores(now)
+
+        self.assertAlmostEqual(self.score(), 3, places=3)
+        self.assertEqual(RecommendationCheckpoint.objects.get(name='trending').open_gaps, {})
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from marketplace.cache import get_version, local_cache
+from marketplace.company_cache import LIST_NAMESPACE, SHARED_NAMESPACE, company_namespace
+from marketplace.models import Country
+
+from .helpers import make_company, make_product
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=False)
+class CompanyCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        self.company = make_company(name='Burger Co')
+
+    def detail(self):
+        response = self.client.get(f'/api/companies/{self.company.pk}/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_detail_is_cached(self):
+        self.assertEqual(self.detail()['name'], 'Burger Co')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.detail()['name'], 'Burger Co')
+
+    def test_company_changes_invalidate_after_commit(self):
+        self.assertEqual(self.detail()['name'], 'Burger Co')
+        detail_version = get_version(company_namespace(self.company.pk))
+        list_version = get_version(LIST_NAMESPACE)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.company.name = 'Burger House'
+            self.company.save()
+        # Hasta el commit se sigue sirviendo la versión guardada
+        self.assertEqual(get_version(company_namespace(self.company.pk)), detail_version)
+        self.assertEqual(self.detail()['name'], 'Burger Co')
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(LIST_NAMESPACE), list_version)
+        self.assertEqual(self.detail()['name'], 'Burger House')
+
+    def test_related_changes_invalidate_the_company_after_commit(self):
+        self.detail()
+        version = get_version(company_namespace(self.company.pk))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            make_product(self.company)
+        self.assertEqual(get_version(company_namespace(self.company.pk)), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(company_namespace(self.company.pk)), version)
+
+    def test_shared_data_changes_invalidate_every_company_after_commit(self):
+        version = get_version(SHARED_NAMESPACE)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Country.objects.create(code='CR', name='Costa Rica')
+        self.assertEqual(get_version(SHARED_NAMESPACE), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(SHARED_NAMESPACE), version)
+
+    def test_deleted_company_is_invalidated(self):
+        company_id = self.company.pk
+        version = get_version(company_namespace(company_id))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.delete()
+        self.assertNotEqual(get_version(company_namespace(company_id)), version)
@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from marketplace import counters
+
+from .helpers import make_company
+
+
+class CounterEventsViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        counters.buffer.drain()
+        self.addCleanup(counters.buffer.drain)
+        self.company = make_company()
+
+    def post(self, events, ip='203.0.113.7'):
+        return self.client.post(
+            '/api/events/', {'events': events}, content_type='application/json', REMOTE_ADDR=ip
+        )
+
+    def counted(self):
+        return dict(counters.buffer.counts)
+
+    def test_repeated_events_count_once_per_client(self):
+        view = {'type': 'view', 'target': 'company', 'id': self.company.pk}
+        click = {'type': 'click', 'target': 'company', 'id': self.company.pk}
+
+        response = self.post([view] * 99 + [click])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'accepted': 2})
+        self.assertEqual(self.post([view, click]).json(), {'accepted': 0})
+        self.assertEqual(self.post([view], ip='198.51.100.1').json(), {'accepted': 1})
+
+        self.assertEqual(self.counted(), {
+            ('company', 'view', self.company.pk): 2,
+            ('company', 'click', self.company.pk): 1,
+        })
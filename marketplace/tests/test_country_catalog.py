@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from marketplace.cache import get_version, local_cache
+from marketplace.country_catalog import (
+    build_companies, build_products, country_namespace, warm_country_catalogs
+)
+from marketplace.models import Country
+
+from .helpers import make_company, make_product, make_promotion, make_user
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=False)
+class CountryCatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        self.country = Country.objects.create(code='CR', name='Costa Rica')
+
+    def populate(self, companies, first=0):
+        for n in range(first, first + companies):
+            company = make_company(user=make_user(f'owner{n}'), name=f'Burger {n}', country=self.country)
+            product = make_product(company, name=f'Clásica {n}')
+            make_promotion(company)
+            make_promotion(company, product=product, title='Producto')
+            make_promotion(company, is_active=False, title='Inactiva')
+
+    def count_queries(self, build):
+        with CaptureQueriesContext(connection) as queries:
+            results = build(self.country.pk)['results']
+        return len(queries), results
+
+    def test_promotions_are_prefetched_for_the_whole_country(self):
+        self.populate(2)
+        few_companies, _ = self.count_queries(build_companies)
+        few_products, _ = self.count_queries(build_products)
+        self.populate(3, first=2)
+        many_companies, companies = self.count_queries(build_companies)
+        many_products, products = self.count_queries(build_products)
+
+        self.assertEqual(many_companies, few_companies)
+        self.assertEqual(many_products, few_products)
+        self.assertEqual({len(company['active_promotions']) for company in companies}, {2})
+        self.assertEqual({len(product['active_promotions']) for product in products}, {1})
+        self.assertEqual(products[0]['active_promotions'][0]['company_name'], 'Burger 0')
+
+    def test_only_changed_countries_are_rebuilt(self):
+        other = Country.objects.create(code='PA', name='Panamá')
+        self.populate(1)
+        make_company(user=make_user('other'), name='Otra', country=other)
+
+        self.assertEqual(warm_country_catalogs(), 4)
+        self.assertEqual(warm_country_catalogs(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product(self.country.companies.first(), name='Nueva')
+        self.assertEqual(warm_country_catalogs(), 2)
+
+    def test_catalogs_close_to_expiry_are_rebuilt(self):
+        self.populate(1)
+        with override_settings(COUNTRY_CACHE_TIMEOUT=60):
+            self.assertEqual(warm_country_catalogs(), 2)
+            self.assertEqual(warm_country_catalogs(min_fresh=10), 0)
+            self.assertEqual(warm_country_catalogs(min_fresh=120), 2)
+
+    def test_company_changes_invalidate_after_commit(self):
+        self.populate(1)
+        company = self.country.companies.first()
+        version = get_version(country_namespace(self.country.pk))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            company.name = 'Renombrada'
+            company.save()
+        self.assertEqual(get_version(country_namespace(self.country.pk)), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_version(country_namespace(self.country.pk)), version)
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from marketplace.cache import local_cache
+from marketplace.home_feed import current_version, get_home_feed, refresh_home_feed, request_refresh
+from marketplace.management.commands.refresh_home_feed import Command
+from marketplace.models import Country
+
+from .helpers import make_company, make_promotion, make_user
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=False)
+class HomeFeedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        self.country = Country.objects.create(code='CR', name='Costa Rica')
+        self.company = make_company(name='Burger CR', country=self.country)
+        make_promotion(self.company, title='2x1 CR')
+        other = make_company(user=make_user('other'), name='Otra', country=None)
+        make_promotion(other, title='Sin país')
+
+    def titles(self, snapshot):
+        return sorted(promotion['title'] for promotion in snapshot['promotions'])
+
+    def test_snapshot_is_filtered_by_country(self):
+        response = self.client.get('/api/home/', {'country': 'cr'})
+        self.assertEqual(response.status_code, 200)
+        snapshot = response.json()
+        self.assertEqual(snapshot['country'], 'CR')
+        self.assertEqual(self.titles(snapshot), ['2x1 CR'])
+        self.assertEqual([company['name'] for company in snapshot['featured_companies']], ['Burger CR'])
+
+        self.assertEqual(self.titles(self.client.get('/api/home/').json()), ['2x1 CR', 'Sin país'])
+        self.assertEqual(self.client.get('/api/home/', {'country': 'PA'}).status_code, 404)
+
+    def test_refreshed_snapshots_are_served_without_queries(self):
+        get_home_feed('CR')
+        self.assertEqual(refresh_home_feed(), 2)
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(get_home_feed('CR')), ['2x1 CR'])
+
+    def test_writes_invalidate_the_snapshot_in_every_process_after_commit(self):
+        self.assertEqual(self.titles(get_home_feed('CR')), ['2x1 CR'])
+        version = current_version()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            make_promotion(self.company, title='Nueva')
+        self.assertEqual(current_version(), version)
+        self.assertEqual(self.titles(get_home_feed('CR')), ['2x1 CR'])
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(current_version(), version)
+        # Otro proceso: sin nada en su nivel local
+        local_cache.clear()
+        self.assertEqual(self.titles(get_home_feed('CR')), ['2x1 CR', 'Nueva'])
+
+    def test_feed_process_wakes_up_when_the_version_changes(self):
+        version = current_version()
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                with self.captureOnCommitCallbacks(execute=True):
+                    request_refresh()
+
+        with override_settings(HOME_FEED_POLL_INTERVAL=5), \
+                mock.patch('marketplace.management.commands.refresh_home_feed.time.sleep', side_effect=sleep):
+            Command().wait(version, 300)
+        self.assertEqual(sleeps, [5, 5])
@@ -0,0 +1,54 @@
+import io
+import re
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from marketplace.cache import local_cache
+
+from .helpers import make_company, make_product, make_promotion
+
+
+class IndexAdvisorTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        company = make_company()
+        make_product(company)
+        make_promotion(company)
+
+    def run_advisor(self, *args):
+        out = io.StringIO()
+        call_command('index_advisor', *args, stdout=out)
+        return out.getvalue()
+
+    def replayed_queries(self, output, label):
+        match = re.search(rf'^{re.escape(label)} \((\d+) consultas únicas\)$', output, re.MULTILINE)
+        self.assertIsNotNone(match, output)
+        return int(match.group(1))
+
+    def test_reports_sequential_scans_over_large_tables(self):
+        output = self.run_advisor('--min-rows', '0')
+        self.assertIn('Recorrido secuencial sobre marketplace_company', output)
+        self.assertIn('recorridos secuenciales sobre tablas grandes.', output)
+
+    def test_small_tables_are_not_reported(self):
+        output = self.run_advisor('--min-rows', '1000')
+        self.assertNotIn('Recorrido secuencial', output)
+        self.assertIn('Sin recorridos secuenciales sobre tablas grandes.', output)
+
+    def test_cached_views_are_replayed_against_the_database(self):
+        # Con la caché caliente la vista no consultaría la base de datos
+        self.assertEqual(self.client.get('/api/companies/').status_code, 200)
+        cached = set(cache._cache)
+
+        output = self.run_advisor('--min-rows', '0')
+
+        self.assertGreater(self.replayed_queries(output, 'GET /api/companies/'), 0)
+        self.assertGreater(self.replayed_queries(output, 'GET /api/top-burgers/'), 0)
+        # Ni escribe en la caché compartida
+        self.assertEqual(set(cache._cache), cached)
@@ -0,0 +1,143 @@
+import io
+import threading
+import unittest
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from marketplace.inventory import InsufficientStock, UnknownProducts, merge_lines, reserve_stock
+from marketplace.models import Order, Product
+
+from .helpers import make_company, make_product
+
+
+class MergeLinesTests(SimpleTestCase):
+
+    def test_string_and_integer_ids_are_the_same_line(self):
+        items = [{'product': '5', 'quantity': 1}, {'product': 5, 'quantity': 2}, {'product': 7, 'quantity': 1}]
+        self.assertEqual(merge_lines(items), {5: 3, 7: 1})
+
+    def test_non_numeric_id_is_rejected(self):
+        with self.assertRaises(ValueError):
+            merge_lines([{'product': 'abc', 'quantity': 1}])
+
+
+class ReserveStockTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.product = make_product(self.company, stock=5)
+        self.unlimited = make_product(self.company, name='Papas', stock=None)
+
+    def stock(self, product):
+        return Product.objects.values_list('stock', flat=True).get(pk=product.pk)
+
+    def test_reserves_every_line_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            reserve_stock({self.product.pk: 3, self.unlimited.pk: 10})
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(self.stock(self.product), 2)
+        self.assertIsNone(self.stock(self.unlimited))
+
+    def test_insufficient_line_reserves_nothing(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve_stock({self.product.pk: 6, self.unlimited.pk: 1})
+        self.assertEqual(raised.exception.product_ids, [self.product.pk])
+        self.assertEqual(self.stock(self.product), 5)
+
+    def test_unknown_product_is_reported(self):
+        with self.assertRaises(UnknownProducts) as raised:
+            reserve_stock({self.product.pk: 1, 999999: 1})
+        self.assertEqual(raised.exception.product_ids, [999999])
+        self.assertEqual(self.stock(self.product), 5)
+
+
+class OrderCreateTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.product = make_product(self.company, stock=5)
+        self.client.force_login(self.company.user)
+
+    def post(self, items):
+        return self.client.post(
+            '/api/orders/', {'company': self.company.pk, 'items': items}, content_type='application/json'
+        )
+
+    def test_mixed_id_types_are_reserved_together(self):
+        response = self.post([
+            {'product': str(self.product.pk), 'quantity': 2, 'price': 10},
+            {'product': self.product.pk, 'quantity': 3, 'price': 10},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 0)
+
+    def test_mixed_id_types_cannot_oversell(self):
+        response = self.post([
+            {'product': str(self.product.pk), 'quantity': 3, 'price': 10},
+            {'product': self.product.pk, 'quantity': 3, 'price': 10},
+        ])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 5)
+
+    def test_unknown_product_is_a_bad_request(self):
+        response = self.post([{'product': 999999, 'quantity': 1, 'price': 10}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown products', 'products': [999999]})
+        self.assertFalse(Order.objects.exists())
+
+    def test_non_numeric_product_is_a_bad_request(self):
+        response = self.post([{'product': 'abc', 'quantity': 1, 'price': 10}])
+        self.assertEqual(response.status_code, 400)
+
+
+class HotProductConcurrencyTests(TransactionTestCase):
+    """Muchos pedidos simultáneos del mismo producto: nunca se vende más de lo que hay."""
+
+    buyers = 40
+    stock = 25
+
+    def test_load_test_command_sells_exactly_the_stock(self):
+        product = make_product(make_company(), stock=self.stock)
+        out = io.StringIO()
+
+        call_command('load_test_orders', product.pk, '--buyers', '1', '--orders', '30', '--commit', stdout=out)
+
+        self.assertIn(f'{self.stock} reservados, 5 sin existencias, 0 errores', out.getvalue())
+        self.assertEqual(Product.objects.get(pk=product.pk).stock, 0)
+        self.assertEqual(Order.objects.count(), self.stock)
+
+    # SQLite bloquea la tabla entera ante escrituras concurrentes; en Postgres compiten por la fila
+    @unittest.skipIf(connection.vendor == 'sqlite', 'requiere escrituras concurrentes (Postgres)')
+    def test_concurrent_orders_never_oversell(self):
+        product = make_product(make_company(), stock=self.stock, price=Decimal('5.00'))
+        barrier = threading.Barrier(self.buyers)
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def buy():
+            try:
+                barrier.wait()
+                try:
+                    reserve_stock({product.pk: 1})
+                    outcome = 'reserved'
+                except InsufficientStock:
+                    outcome = 'rejected'
+                with outcomes_lock:
+                    outcomes.append(outcome)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy) for _ in range(self.buyers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+
+        self.assertEqual(len(outcomes), self.buyers)
+        self.assertEqual(outcomes.count('reserved'), self.stock)
+        self.assertEqual(Product.objects.get(pk=product.pk).stock, 0)
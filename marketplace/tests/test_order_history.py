@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from marketplace.models import Order, OrderItem
+
+from .helpers import make_company, make_product, make_user
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=False)
+class OrderHistoryTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('buyer')
+        self.company = make_company()
+        self.other = make_company(user=make_user('other'), name='Otra')
+        self.product = make_product(self.company)
+        self.noon = timezone.make_aware(datetime(2026, 3, 10, 12, 0))
+        # Varios pedidos comparten created_at: el cursor no puede depender solo de la fecha
+        self.orders = []
+        for index in range(7):
+            self.orders.append(self.order(self.company, Decimal('10.00') + index, self.noon))
+        for index in range(3):
+            self.orders.append(self.order(self.other, Decimal('5.00'), self.noon - timedelta(days=1, hours=index)))
+        # De otro usuario: nunca aparece
+        Order.objects.create(user=self.other.user, company=self.company, total=Decimal('99.00'))
+        self.client.force_login(self.user)
+
+    def order(self, company, total, created_at):
+        order = Order.objects.create(user=self.user, company=company, total=total)
+        OrderItem.objects.create(order=order, product=self.product, quantity=1, price=total)
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        return order
+
+    def history(self, url='/api/orders/history/', **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def walk(self, **params):
+        ids = []
+        data = self.history(**params)
+        while True:
+            ids.extend(order['id'] for order in data['results'])
+            if not data['next']:
+                return ids
+            data = self.history(data['next'])
+
+    def expected_ids(self, orders):
+        return [order.pk for order in sorted(
+            Order.objects.filter(pk__in=[order.pk for order in orders]),
+            key=lambda order: (order.created_at, order.pk), reverse=True
+        )]
+
+    def test_pages_follow_a_stable_order_without_duplicates_or_gaps(self):
+        ids = self.walk(page_size=3)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids, self.expected_ids(self.orders))
+
+    def test_pages_are_stable_when_new_orders_arrive(self):
+        first = self.history(page_size=4)
+        self.order(self.company, Decimal('1.00'), timezone.now())
+        ids = [order['id'] for order in first['results']]
+        data = first
+        while data['next']:
+            data = self.history(data['next'])
+            ids.extend(order['id'] for order in data['results'])
+        self.assertEqual(ids, self.expected_ids(self.orders))
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.history(page_size=3)
+        second = self.history(first['next'])
+        self.assertEqual(self.history(second['previous'])['results'], first['results'])
+
+    def test_summary_covers_the_filtered_set_on_the_first_page_only(self):
+        data = self.history(page_size=3)
+        self.assertEqual(data['summary'], {'total_spent': 106.0, 'order_count': 10})
+        self.assertNotIn('summary', self.history(data['next']))
+
+        filtered = self.history(company=self.other.pk)
+        self.assertEqual(filtered['summary'], {'total_spent': 15.0, 'order_count': 3})
+        self.assertEqual(len(filtered['results']), 3)
+
+        day = self.history(date_from='2026-03-10', date_to='2026-03-10')
+        self.assertEqual(day['summary']['order_count'], 7)
+        self.assertEqual(self.history(date_to='2026-03-09')['summary']['order_count'], 3)
+        moments = self.history(date_from='2026-03-09T11:00:00Z', date_to='2026-03-09T23:00:00Z')
+        self.assertEqual(moments['summary']['order_count'], 2)
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({'date_from': 'ayer'}, {'company': 'abc'}):
+            response = self.client.get('/api/orders/history/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.json())
+        self.assertEqual(self.client.get('/api/orders/history/', {'cursor': 'basura'}).status_code, 404)
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from marketplace.models import Category, Product
+
+from .helpers import make_company, make_product, make_promotion
+
+
+class PromotionPricingSignalTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.burgers = Category.objects.create(name='Hamburguesas')
+        self.drinks = Category.objects.create(name='Bebidas')
+        self.burger = make_product(self.company, category=self.burgers, price=Decimal('10.00'))
+        self.drink = make_product(self.company, name='Refresco', category=self.drinks, price=Decimal('4.00'))
+
+    def effective_price(self, product):
+        return Product.objects.values_list('effective_price', flat=True).get(pk=product.pk)
+
+    def test_changing_scope_recomputes_previous_scope(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            promotion = make_promotion(self.company, category=self.burgers)
+        self.assertEqual(self.effective_price(self.burger), Decimal('5.00'))
+
+        promotion.category = self.drinks
+        with self.captureOnCommitCallbacks(execute=True):
+            promotion.save()
+
+        self.assertEqual(self.effective_price(self.burger), Decimal('10.00'))
+        self.assertEqual(self.effective_price(self.drink), Decimal('2.00'))
+
+    def test_deleting_promotion_restores_price(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            promotion = make_promotion(self.company, product=self.burger)
+        with self.captureOnCommitCallbacks(execute=True):
+            promotion.delete()
+
+        self.assertEqual(self.effective_price(self.burger), Decimal('10.00'))
@@ -0,0 +1,232 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from marketplace.bulk import set_promotions_active
+from marketplace.cache import local_cache
+from marketplace.models import Promotion
+from marketplace.promotions import PromotionScheduler, start_promotions
+
+from .helpers import make_company, make_promotion, make_user
+
+
+class StartPromotionsTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.now = timezone.now()
+
+    def started(self, promotion):
+        promotion.refresh_from_db()
+        return promotion.is_active
+
+    def test_promotion_created_with_future_start_is_activated(self):
+        promotion = make_promotion(self.company, start_date=self.now + timedelta(minutes=1), is_active=False)
+        self.assertTrue(promotion.scheduled)
+
+        start_promotions(self.now, self.now + timedelta(minutes=2))
+
+        self.assertTrue(self.started(promotion))
+        self.assertFalse(promotion.scheduled)
+
+    def test_manually_deactivated_promotion_stays_off(self):
+        promotion = make_promotion(self.company, start_date=self.now + timedelta(minutes=1))
+        promotion.is_active = False
+        promotion.save()
+        self.assertFalse(promotion.scheduled)
+
+        start_promotions(self.now, self.now + timedelta(minutes=2))
+
+        self.assertFalse(self.started(promotion))
+
+    def test_bulk_deactivation_clears_schedule(self):
+        promotion = make_promotion(self.company, start_date=self.now + timedelta(minutes=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            set_promotions_active(Promotion.objects.filter(pk=promotion.pk), False)
+
+        start_promotions(self.now, self.now + timedelta(minutes=2))
+
+        self.assertFalse(self.started(promotion))
+
+    def test_reconcile_skips_promotions_switched_off_after_start(self):
+        promotion = make_promotion(self.company, start_date=self.now + timedelta(seconds=1))
+        Promotion.objects.filter(pk=promotion.pk).update(start_date=self.now - timedelta(minutes=1))
+        promotion.refresh_from_db()
+        promotion.is_active = False
+        promotion.save()
+
+        PromotionScheduler().reconcile()
+
+        self.assertFalse(self.started(promotion))
+
+    def test_reconcile_activates_promotions_missed_during_downtime(self):
+        promotion = make_promotion(self.company, start_date=self.now + timedelta(seconds=1), is_active=False)
+        # El proceso estuvo caído dos horas
+        Promotion.objects.filter(pk=promotion.pk).update(start_date=self.now - timedelta(hours=2))
+
+        self.assertEqual(PromotionScheduler().reconcile(), (0, 1))
+
+        self.assertTrue(self.started(promotion))
+        self.assertFalse(promotion.scheduled)
+        self.assertEqual(PromotionScheduler().reconcile(), (0, 0))
+
+    def test_promotion_starting_between_reloads_is_activated(self):
+        scheduler = PromotionScheduler()
+        scheduler.load()
+        # Creada después de la recarga, con un inicio que ya pasó antes de la siguiente
+        promotion = make_promotion(self.company, start_date=self.now + timedelta(seconds=1), is_active=False)
+        Promotion.objects.filter(pk=promotion.pk).update(start_date=self.now - timedelta(seconds=30))
+
+        scheduler.run_pending()
+        self.assertFalse(self.started(promotion))
+
+        scheduler.load()
+        self.assertTrue(self.started(promotion))
+
+
+class PromotionBulkViewTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.client.force_login(self.company.user)
+
+    def test_extend_is_applied_before_activation(self):
+        now = timezone.now()
+        promotion = make_promotion(
+            self.company,
+            start_date=now - timedelta(days=10),
+            end_date=now - timedelta(days=1),
+            is_active=False
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                '/api/promotions/bulk/',
+                {'ids': [promotion.pk], 'is_active': True, 'extend_days': 7},
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'extended': 1, 'activated': 1})
+        promotion.refresh_from_db()
+        self.assertTrue(promotion.is_active)
+        self.assertGreater(promotion.end_date, now)
+
+
+class PromotionWriteAccessTests(TestCase):
+
+    def setUp(self):
+        self.company = make_company()
+        self.promotion = make_promotion(self.company)
+        self.other = make_user('other')
+        self.other_company = make_company(user=self.other, name='Otra')
+
+    def test_non_owner_cannot_change_or_delete(self):
+        self.client.force_login(self.other)
+        url = f'/api/promotions/{self.promotion.pk}/'
+
+        response = self.client.patch(url, {'title': 'Gratis'}, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+        self.promotion.refresh_from_db()
+        self.assertEqual(self.promotion.title, '2x1')
+        # La lectura sigue siendo pública
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_non_owner_cannot_move_or_create_promotions_for_other_companies(self):
+        self.client.force_login(self.other)
+        response = self.client.post('/api/promotions/', {
+            'company': self.company.pk,
+            'title': 'Falsa',
+            'description': 'Falsa',
+            'terms_conditions': 'Ninguna',
+            'discount_type': 'PERCENTAGE',
+            'discount_value': 90,
+            'start_date': timezone.now().isoformat(),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Promotion.objects.filter(title='Falsa').exists())
+
+        self.client.force_login(self.company.user)
+        response = self.client.patch(
+            f'/api/promotions/{self.promotion.pk}/',
+            {'company': self.other_company.pk},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_owner_and_staff_can_edit(self):
+        self.client.force_login(self.company.user)
+        url = f'/api/promotions/{self.promotion.pk}/'
+        response = self.client.patch(url, {'title': '3x2'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        staff = make_user('staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+    def test_anonymous_writes_are_rejected(self):
+        url = f'/api/promotions/{self.promotion.pk}/'
+        self.assertEqual(self.client.delete(url).status_code, 403)
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=False)
+class PromotionFeedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        self.company = make_company()
+        now = timezone.now()
+        self.promotions = [
+            make_promotion(self.company, title=f'Promo {value}', discount_value=value,
+                           end_date=now + timedelta(days=value))
+            for value in (10, 50, 30, 20, 40)
+        ]
+        # Fuera del feed: inactiva y vencida
+        make_promotion(self.company, title='Inactiva', is_active=False)
+        make_promotion(self.company, title='Vencida', end_date=now - timedelta(days=1))
+
+    def titles(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return [promotion['title'] for promotion in response.json()['results']]
+
+    def test_rankings(self):
+        self.assertEqual(
+            self.titles(self.client.get('/api/promotions/', {'ranking': 'discount'})),
+            ['Promo 50', 'Promo 40', 'Promo 30', 'Promo 20', 'Promo 10']
+        )
+        self.assertEqual(
+            self.titles(self.client.get('/api/promotions/', {'ranking': 'ending'})),
+            ['Promo 10', 'Promo 20', 'Promo 30', 'Promo 40', 'Promo 50']
+        )
+        self.assertEqual(
+            self.titles(self.client.get('/api/promotions/')),
+            ['Promo 40', 'Promo 20', 'Promo 30', 'Promo 50', 'Promo 10']
+        )
+
+    def test_cursor_pages_have_no_duplicates_or_gaps(self):
+        titles = []
+        response = self.client.get('/api/promotions/', {'ranking': 'discount', 'page_size': 2})
+        while True:
+            titles.extend(self.titles(response))
+            next_link = response.json()['next']
+            if not next_link:
+                break
+            response = self.client.get(next_link)
+        self.assertEqual(titles, ['Promo 50', 'Promo 40', 'Promo 30', 'Promo 20', 'Promo 10'])
+
+    def test_first_page_is_served_from_cache(self):
+        response = self.client.get('/api/promotions/', {'ranking': 'ending'})
+        self.assertEqual(len(self.titles(response)), 5)
+        self.assertIsNone(response.json()['next'])
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/promotions/', {'ranking': 'ending'})
+        self.assertEqual(self.titles(cached), self.titles(response))
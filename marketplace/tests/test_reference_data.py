@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from marketplace.cache import local_cache
+from marketplace.models import CompanyCategory
+from marketplace.reference_data import REFERENCE_DATA_CACHE_KEY
+
+
+class ReferenceDataViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(local_cache.clear)
+        CompanyCategory.objects.create(name='Hamburguesas')
+
+    def get(self, **params):
+        headers = params.pop('headers', {})
+        return self.client.get('/api/reference-data/', params, headers=headers)
+
+    def test_bundle_carries_its_version_as_etag(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(response['ETag'], f'"{data["version"]}"')
+        self.assertEqual([category['name'] for category in data['company_categories']], ['Hamburguesas'])
+        self.assertIn('stale-while-revalidate', response['Cache-Control'])
+
+    def test_matching_etag_answers_not_modified(self):
+        etag = self.get()['ETag']
+        response = self.get(headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get(headers={'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_versioned_url_is_immutable(self):
+        version = self.get().json()['version']
+        self.assertIn('immutable', self.get(v=version)['Cache-Control'])
+        self.assertNotIn('immutable', self.get(v='old')['Cache-Control'])
+
+    def test_changes_invalidate_the_bundle_after_commit(self):
+        before = self.get()['ETag']
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            CompanyCategory.objects.create(name='Pizzas')
+        # Hasta el commit se sigue sirviendo el paquete guardado
+        self.assertIsNotNone(cache.get(REFERENCE_DATA_CACHE_KEY))
+        self.assertEqual(self.get()['ETag'], before)
+
+        for callback in callbacks:
+            callback()
+        response = self.get(headers={'If-None-Match': before})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Pizzas', [category['name'] for category in response.json()['company_categories']])
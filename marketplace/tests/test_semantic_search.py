@@ -0,0 +1,161 @@
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from marketplace import semantic_search
+from marketplace.embeddings import HashingEmbedder, normalize_rows
+from marketplace.semantic_search import IndexMismatch, VectorIndex
+
+from .helpers import make_company, make_product
+
+
+class IndexRootMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.embedder = HashingEmbedder(dimensions=64)
+
+    def vectors(self, *texts):
+        return normalize_rows(self.embedder.embed(list(texts)))
+
+    def make_index(self, name='product', dimensions=64, embedder_name='hashing'):
+        return VectorIndex(self.root, name, dimensions, embedder_name)
+
+
+class VectorIndexTests(IndexRootMixin, SimpleTestCase):
+
+    def ids(self, hits):
+        return [object_id for object_id, _ in hits]
+
+    def test_empty_index_returns_no_hits(self):
+        index = self.make_index()
+        self.assertEqual(index.search(self.vectors('hamburguesa'), 5), [[]])
+        self.assertIsNone(index.built_at())
+
+    def test_upsert_and_search_returns_nearest_first(self):
+        index = self.make_index()
+        index.upsert([1, 2, 3], self.vectors('hamburguesa doble queso', 'pizza napolitana', 'ensalada verde'))
+        hits = index.search(self.vectors('hamburguesa con queso', 'pizza'), 2)
+        self.assertEqual(hits[0][0][0], 1)
+        self.assertEqual(hits[1][0][0], 2)
+        self.assertEqual(len(index), 3)
+
+    def test_upsert_replaces_the_vector_of_an_existing_id(self):
+        index = self.make_index()
+        index.upsert([1, 2], self.vectors('hamburguesa', 'pizza'))
+        index.upsert([1], self.vectors('sushi'))
+        self.assertEqual(len(index), 2)
+        object_id, score = index.search(self.vectors('sushi'), 1)[0][0]
+        self.assertEqual(object_id, 1)
+        self.assertAlmostEqual(score, 1.0, places=5)
+
+    def test_remove_hides_the_id_from_results(self):
+        index = self.make_index()
+        index.upsert([1, 2], self.vectors('hamburguesa', 'pizza'))
+        index.remove([1, 99])
+        self.assertEqual(len(index), 1)
+        self.assertEqual(self.ids(index.search(self.vectors('hamburguesa'), 5)[0]), [2])
+
+    def test_upsert_grows_past_the_initial_capacity(self):
+        index = self.make_index()
+        index.upsert(list(range(1, 1101)), self.vectors(*[f'producto {n}' for n in range(1, 1101)]))
+        self.assertEqual(len(index), 1100)
+        self.assertEqual(index.search(self.vectors('producto 1050'), 1)[0][0][0], 1050)
+
+    def test_rebuild_compacts_and_records_when_it_was_built(self):
+        index = self.make_index()
+        index.upsert([1, 2], self.vectors('hamburguesa', 'pizza'))
+        index.remove([1])
+        count = index.rebuild(iter([([3], self.vectors('ensalada'))]), 1)
+        self.assertEqual(count, 1)
+        self.assertEqual(self.ids(index.search(self.vectors('pizza'), 5)[0]), [3])
+        self.assertAlmostEqual(index.built_at(), time.time(), delta=5)
+
+    def test_incremental_updates_keep_the_build_time(self):
+        index = self.make_index()
+        index.rebuild(iter([([1], self.vectors('hamburguesa'))]), 1)
+        built_at = index.built_at()
+        index.upsert([2], self.vectors('pizza'))
+        index.remove([1])
+        self.assertEqual(index.built_at(), built_at)
+
+    def test_rebuild_with_max_age_skips_a_fresh_index(self):
+        index = self.make_index()
+        index.rebuild(iter([([1], self.vectors('hamburguesa'))]), 1)
+        self.assertIsNone(index.rebuild(iter([([2], self.vectors('pizza'))]), 1, max_age=60))
+        self.assertEqual(self.ids(index.search(self.vectors('pizza'), 5)[0]), [1])
+
+    def test_other_workers_see_writes(self):
+        writer, reader = self.make_index(), self.make_index()
+        self.assertEqual(len(reader), 0)
+        writer.upsert([7], self.vectors('hamburguesa'))
+        self.assertEqual(self.ids(reader.search(self.vectors('hamburguesa'), 1)[0]), [7])
+
+    def test_index_built_with_another_embedder_raises(self):
+        self.make_index().upsert([1], self.vectors('hamburguesa'))
+        with self.assertRaises(IndexMismatch):
+            self.make_index(embedder_name='openai').search(self.vectors('hamburguesa'), 1)
+
+
+class EnsureIndexesTests(IndexRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        settings = override_settings(
+            SEMANTIC_SEARCH_INDEX_ROOT=self.root, SEMANTIC_SEARCH_DIMENSIONS=64,
+            SEMANTIC_SEARCH_UPDATE_ON_SAVE=False, SEMANTIC_SEARCH_MAX_AGE=900,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # get_index guarda los índices por proceso; cada prueba usa su propio directorio
+        semantic_search._indexes.clear()
+        self.addCleanup(semantic_search._indexes.clear)
+        company = make_company(name='Burger Co')
+        make_product(company, name='Doble queso')
+
+    def test_missing_indexes_are_stale_and_get_built(self):
+        self.assertTrue(semantic_search.index_is_stale('product'))
+        self.assertEqual(semantic_search.ensure_indexes(), {'company': 1, 'product': 1})
+        self.assertFalse(semantic_search.index_is_stale('product'))
+        self.assertEqual(semantic_search.ensure_indexes(), {})
+
+    def test_old_indexes_are_rebuilt(self):
+        semantic_search.ensure_indexes()
+        later = time.time() + 901
+        with mock.patch('marketplace.semantic_search.time.time', return_value=later):
+            self.assertTrue(semantic_search.index_is_stale('company'))
+            self.assertEqual(semantic_search.ensure_indexes(), {'company': 1, 'product': 1})
+        self.assertEqual(semantic_search.get_index('product').built_at(), later)
+
+    def test_refresh_runs_only_when_an_index_is_stale(self):
+        with mock.patch('marketplace.semantic_search.threading.Thread') as thread:
+            thread.return_value.is_alive.return_value = True
+            semantic_search._refresh_thread = None
+            self.addCleanup(setattr, semantic_search, '_refresh_thread', None)
+            self.assertTrue(semantic_search.refresh_in_background())
+            # Ya hay uno en curso
+            self.assertFalse(semantic_search.refresh_in_background())
+            semantic_search.ensure_indexes()
+            semantic_search._refresh_thread = None
+            self.assertFalse(semantic_search.refresh_in_background())
+        self.assertEqual(thread.return_value.start.call_count, 1)
+
+
+@override_settings(SEMANTIC_SEARCH_UPDATE_ON_SAVE=True)
+class SemanticSignalTests(TestCase):
+
+    def test_deletes_reach_the_index_only_after_commit(self):
+        product = make_product(make_company())
+        pk = product.pk
+        with mock.patch('marketplace.semantic_search.remove_objects') as remove_objects:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                product.delete()
+            remove_objects.assert_not_called()
+            for callback in callbacks:
+                callback()
+        remove_objects.assert_called_once_with('product', [pk])
@@ -0,0 +1,72 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from marketplace.management.commands.profile_boot import parse_importtime
+
+SETTINGS_SCRIPT = '''
+import json, sys
+import django
+django.setup()
+from django.apps import apps
+from django.conf import settings
+print(json.dumps({
+    'lazy': settings.LAZY_STARTUP,
+    'admin': type(apps.get_app_config('admin')).__name__,
+    'django_heroku': 'django_heroku' in sys.modules,
+    'admin_modules': 'marketplace.admin' in sys.modules,
+}))
+'''
+
+
+class LazyStartupTests(SimpleTestCase):
+
+    def load_settings(self, lazy):
+        result = subprocess.run(
+            [sys.executable, '-c', SETTINGS_SCRIPT], cwd=settings.BASE_DIR,
+            env=dict(os.environ, LAZY_STARTUP=lazy), capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout.splitlines()[-1])
+
+    def test_lazy_settings_defer_the_admin_and_django_heroku(self):
+        self.assertEqual(self.load_settings('true'), {
+            'lazy': True, 'admin': 'SimpleAdminConfig', 'django_heroku': False, 'admin_modules': False,
+        })
+
+    def test_current_settings_load(self):
+        loaded = self.load_settings('false')
+        self.assertFalse(loaded['lazy'])
+        self.assertEqual(loaded['admin'], 'AdminConfig')
+        self.assertTrue(loaded['admin_modules'])
+
+
+class ProfileBootTests(SimpleTestCase):
+
+    def test_boots_both_modes(self):
+        out = io.StringIO()
+        # Sin q el asistente responde 400 sin tocar la base de datos
+        call_command('profile_boot', '--path', '/api/assistant/', '--runs', '1', '--top', '3', stdout=out)
+        output = out.getvalue()
+        self.assertIn('current (LAZY_STARTUP=false)', output)
+        self.assertIn('lazy (LAZY_STARTUP=true)', output)
+        self.assertEqual(output.count('(HTTP 400)'), 2)
+        self.assertIn('Hasta la primera respuesta:', output)
+
+    def test_parse_importtime(self):
+        stderr = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        300 | marketplace',
+            'import time:       180 |        180 |   marketplace.cache',
+            'Traceback: otra línea',
+        ])
+        self.assertEqual(parse_importtime(stderr), [
+            ('marketplace', 0.00012, 0.0003, 0),
+            ('marketplace.cache', 0.00018, 0.00018, 1),
+        ])
@@ -0,0 +1,29 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from marketplace.throttling import CheapEndpointThrottle, LocalBucketStore
+
+
+class ThrottleIdentityTests(SimpleTestCase):
+
+    def request(self, forwarded_for):
+        request = APIRequestFactory().get('/api/companies/', HTTP_X_FORWARDED_FOR=forwarded_for)
+        request.user = AnonymousUser()
+        return request
+
+    def test_client_cannot_choose_its_ident_with_forwarded_for(self):
+        throttle = CheapEndpointThrottle()
+        # El router añade la IP real al final; lo anterior lo escribe el cliente
+        self.assertEqual(throttle.get_ident(self.request('1.1.1.1, 203.0.113.7')), '203.0.113.7')
+        self.assertEqual(throttle.get_ident(self.request('2.2.2.2, 203.0.113.7')), '203.0.113.7')
+
+
+class BucketStoreTests(SimpleTestCase):
+
+    def test_clock_behind_the_last_update_does_not_drain_tokens(self):
+        store = LocalBucketStore()
+        store.consume('key', 5, 1.0, now=1000.0)
+        tokens, allowed = store.consume('key', 5, 1.0, now=990.0)
+        self.assertTrue(allowed)
+        self.assertEqual(tokens, 3)
@@ -0,0 +1,125 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from marketplace.models import Company, ImageUploadTask
+from marketplace.uploads import (
+    LocalFileSystemUploadBackend, claim_task, defer_image_upload, process_pending_uploads, process_task,
+    upload_image
+)
+
+from .helpers import make_company, png_upload
+
+
+class LocalStorageTestCase(TestCase):
+    """Subidas contra LocalFileSystemUploadBackend en un MEDIA_ROOT temporal en lugar de Cloudinary."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_UPLOAD_BACKEND='marketplace.uploads.LocalFileSystemUploadBackend',
+            IMAGE_VARIANT_WIDTHS=(16,),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.company = make_company()
+
+    def assertStored(self, image):
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, f'{image.public_id}.{image.format}')))
+
+
+class DeferredUploadTests(LocalStorageTestCase):
+
+    def test_bytes_are_staged_in_the_database(self):
+        task = defer_image_upload(self.company, 'cover_photo', png_upload())
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'PENDING')
+        self.assertEqual(task.file_name, 'photo.png')
+        self.assertTrue(bytes(task.content).startswith(b'\x89PNG'))
+        self.assertEqual(task.local_path, '')
+
+    def test_worker_uploads_to_local_storage_and_derives_variants(self):
+        task = defer_image_upload(self.company, 'cover_photo', png_upload())
+
+        self.assertEqual(process_pending_uploads(), (1, 0))
+
+        task.refresh_from_db()
+        self.company.refresh_from_db()
+        self.assertEqual(task.status, 'DONE')
+        self.assertIsNone(task.content)
+        self.assertTrue(self.company.cover_photo.public_id.startswith('company_covers/'))
+        self.assertStored(self.company.cover_photo)
+        self.assertEqual(self.company.cover_photo_variants['width'], 64)
+        self.assertIn('16', self.company.cover_photo_variants['widths'])
+        self.assertTrue(self.company.cover_photo_variants['lqip'].startswith('data:image/jpeg;base64,'))
+
+    def test_new_upload_supersedes_unfinished_tasks(self):
+        old = defer_image_upload(self.company, 'cover_photo', png_upload('old.png'))
+        new = defer_image_upload(self.company, 'cover_photo', png_upload('new.png'))
+        other_field = defer_image_upload(self.company, 'profile_picture', png_upload('profile.png'))
+
+        old.refresh_from_db()
+        self.assertEqual(old.status, 'SUPERSEDED')
+        self.assertIsNone(old.content)
+        self.assertEqual(ImageUploadTask.objects.get(pk=new.pk).status, 'PENDING')
+        self.assertEqual(ImageUploadTask.objects.get(pk=other_field.pk).status, 'PENDING')
+
+    def test_stale_task_does_not_overwrite_newer_image(self):
+        old = defer_image_upload(self.company, 'cover_photo', png_upload('old.png'))
+        self.assertTrue(claim_task(old))
+        old.refresh_from_db()
+        # Llega una imagen nueva mientras el worker todavía sube la anterior
+        new = defer_image_upload(self.company, 'cover_photo', png_upload('new.png'))
+
+        self.assertIsNone(process_task(old))
+        self.company.refresh_from_db()
+        self.assertEqual(str(self.company.cover_photo), 'company_covers/cover')
+        self.assertEqual(ImageUploadTask.objects.get(pk=old.pk).status, 'SUPERSEDED')
+
+        self.assertEqual(process_pending_uploads(), (1, 0))
+        self.company.refresh_from_db()
+        self.assertNotEqual(str(self.company.cover_photo), 'company_covers/cover')
+        self.assertEqual(ImageUploadTask.objects.get(pk=new.pk).status, 'DONE')
+
+    def test_missing_object_fails_the_task(self):
+        task = defer_image_upload(self.company, 'cover_photo', png_upload())
+        Company.objects.filter(pk=self.company.pk).delete()
+
+        self.assertEqual(process_pending_uploads(), (0, 1))
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'FAILED')
+        self.assertIsNone(task.content)
+
+
+class SynchronousUploadTests(LocalStorageTestCase):
+
+    def test_upload_image_derives_variants_and_supersedes_queued_tasks(self):
+        queued = defer_image_upload(self.company, 'cover_photo', png_upload('queued.png'))
+
+        upload_image(self.company, 'cover_photo', png_upload())
+
+        self.company.refresh_from_db()
+        self.assertStored(self.company.cover_photo)
+        self.assertIn('16', self.company.cover_photo_variants['widths'])
+        self.assertTrue(self.company.cover_photo_variants['lqip'])
+        self.assertEqual(ImageUploadTask.objects.get(pk=queued.pk).status, 'SUPERSEDED')
+
+    def test_backfill_generates_missing_variants(self):
+        backend = LocalFileSystemUploadBackend()
+        with tempfile.NamedTemporaryFile(suffix='.png') as source:
+            source.write(png_upload().read())
+            source.flush()
+            value = backend.upload(source.name, Company._meta.get_field('cover_photo'))
+        Company.objects.filter(pk=self.company.pk).update(cover_photo=value)
+
+        call_command('backfill_image_variants', stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.cover_photo_variants['width'], 64)
+        self.assertIn('16', self.company.cover_photo_variants['widths'])
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from marketplace import warmup
+from marketplace.warmup import COLD, WARM, WARM_CACHES, WarmupState
+
+
+class WarmupStateMixin:
+    """Cada prueba usa un estado nuevo en lugar del del proceso."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(warmup, 'state', WarmupState())
+        self.state = patcher.start()
+        self.addCleanup(patcher.stop)
+        views_patcher = mock.patch('marketplace.views.warmup_state', self.state)
+        views_patcher.start()
+        self.addCleanup(views_patcher.stop)
+
+
+class WarmUpTests(WarmupStateMixin, SimpleTestCase):
+
+    def test_failed_database_task_leaves_the_process_cold(self):
+        def fail():
+            raise OSError('could not connect to server: db.internal:5432')
+
+        with self.assertLogs('marketplace.warmup', 'ERROR'):
+            status = warmup.warm_up(tasks={'database': fail, 'cloudinary': lambda: None})
+        self.assertEqual(status, COLD)
+        self.assertEqual(self.state.snapshot()['tasks']['cloudinary']['status'], 'ok')
+
+    @override_settings(WARMUP_RETRY_INTERVAL=30)
+    def test_background_warm_up_is_requested_once_per_interval(self):
+        with mock.patch('marketplace.warmup.threading.Thread') as thread, \
+                mock.patch('marketplace.warmup.time.monotonic', side_effect=[100, 110, 131]):
+            self.assertTrue(warmup.start_warm_up())
+            self.assertFalse(warmup.start_warm_up())
+            self.assertTrue(warmup.start_warm_up())
+        self.assertEqual(thread.return_value.start.call_count, 2)
+
+    def test_closing_connections_before_fork_is_reported(self):
+        warmup.warm_up(tasks={'database': lambda: None})
+        self.assertEqual(self.state.status, WARM)
+        self.state.connections_closed()
+        snapshot = self.state.snapshot()
+        self.assertEqual(snapshot['status'], WARM_CACHES)
+        self.assertEqual(snapshot['tasks']['database']['status'], 'closed_before_fork')
+
+
+class ReadinessViewTests(WarmupStateMixin, TestCase):
+
+    def test_public_response_only_has_the_status(self):
+        self.state.begin(['database'])
+        self.state.task_done('database', 'error', 0.1, 'could not connect to server: db.internal:5432')
+        self.state.finish()
+        with mock.patch('marketplace.views.start_warm_up'):
+            response = self.client.get('/api/ready/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'status': COLD})
+
+    def test_inherited_caches_count_as_ready(self):
+        warmup.warm_up(tasks={'database': lambda: None})
+        self.state.connections_closed()
+        response = self.client.get('/api/ready/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': WARM_CACHES})
+
+    def test_details_are_for_staff_only(self):
+        warmup.warm_up(tasks={'database': lambda: None})
+        self.assertEqual(self.client.get('/api/warmup-stats/').status_code, 403)
+
+        User.objects.create_user('admin', password='secret', is_staff=True)
+        self.client.login(username='admin', password='secret')
+        response = self.client.get('/api/warmup-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tasks']['database']['status'], 'ok')
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class LocalBucketStore:
+    """Estado de los buckets en memoria del proceso, con tope de claves (LRU)."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens, allowed = _refill_and_take(tokens, updated, capacity, refill_rate, now)
+            self.buckets[key] = (tokens, now)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return tokens, allowed
+
+
+class CacheBucketStore:
+    """
+    Estado compartido entre workers en un backend de caché. La lectura y escritura no son
+    atómicas: en carreras puede concederse algún token de más, a cambio de no bloquear.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, refill_rate, now):
+        tokens, updated = self.cache.get(key, (capacity, now))
+        tokens, allowed = _refill_and_take(tokens, updated, capacity, refill_rate, now)
+        # Caduca cuando el bucket se habría rellenado por completo
+        self.cache.set(key, (tokens, now), int(capacity / refill_rate) + 1)
+        return tokens, allowed
+
+
+def _refill_and_take(tokens, updated, capacity, refill_rate, now):
+    # Entre dynos los relojes pueden diferir un poco: un instante anterior no resta tokens
+    tokens = min(capacity, tokens + max(0.0, now - updated) * refill_rate)
+    if tokens >= 1:
+        return tokens - 1, True
+    return tokens, False
+
+
+_local_store = LocalBucketStore()
+
+
+def get_store():
+    alias = getattr(settings, 'THROTTLE_CACHE_ALIAS', None)
+    return CacheBucketStore(alias) if alias else _local_store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket por usuario autenticado o, si es anónimo, por IP. La tasa sale de
+    DEFAULT_THROTTLE_RATES con la clave '<scope>_user' o '<scope>_anon' ('100/min' = bucket
+    de 100 tokens que se rellena a 100 por minuto). Al rechazar, DRF añade Retry-After.
+    """
+    scope = None
+    # Reloj de pared: con THROTTLE_CACHE_ALIAS los buckets los comparten procesos y dynos, y
+    # time.monotonic() no tiene un origen común entre ellos
+    timer = time.time
+
+    def allow_request(self, request, view):
+        kind = 'user' if request.user and request.user.is_authenticated else 'anon'
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f'{self.scope}_{kind}')
+        if rate is None:
+            return True
+
+        capacity, duration = self.parse_rate(rate)
+        self.refill_rate = capacity / duration
+        ident = request.user.pk if kind == 'user' else self.get_ident(request)
+        key = f'throttle:{self.scope}:{kind}:{ident}'
+
+        self.tokens, allowed = get_store().consume(key, capacity, self.refill_rate, self.timer())
+        return allowed
+
+    def parse_rate(self, rate):
+        num, period = rate.split('/')
+        duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+        return int(num), duration
+
+    def wait(self):
+        # Tiempo hasta que el bucket recupere un token completo
+        return max(0.0, (1 - self.tokens) / self.refill_rate)
+
+
+class CheapEndpointThrottle(TokenBucketThrottle):
+    scope = 'cheap'
+
+
+class ExpensiveEndpointThrottle(TokenBucketThrottle):
+    """Presupuesto separado para listados sin paginar y búsquedas."""
+    scope = 'expensive'
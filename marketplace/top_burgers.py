@@ -0,0 +1,46 @@
+from django.conf import settings
+
+from .cache import bump_version, get_or_set, versioned_key
+from .models import TopBurgerItem
+
+TOP_BURGERS_NAMESPACE = 'top_burgers'
+
+
+def get_timeout():
+    return getattr(settings, 'TOP_BURGERS_TIMEOUT', 300)
+
+
+def get_base_url():
+    """URL canónica del API para las URLs absolutas de las secciones, no el Host de la petición."""
+    return settings.PUBLIC_API_URL
+
+
+def get_sections(build):
+    """
+    Secciones de top burgers cacheadas. build() recibe la URL base canónica y no debe usar
+    la petición: el valor se comparte entre clientes y se recalcula en segundo plano.
+    """
+    base_url = get_base_url()
+    key = versioned_key(TOP_BURGERS_NAMESPACE, base_url)
+    return get_or_set(key, lambda: build(base_url), get_timeout())
+
+
+def click_target(item_id):
+    """Destino de un clic: la URL del banner o el perfil de la empresa en el frontend."""
+    item = TopBurgerItem.objects.filter(pk=item_id).values('item_type', 'custom_url', 'company_id').first()
+    if item is None:
+        return ''
+    if item['item_type'] == 'BANNER':
+        return item['custom_url'] or ''
+    if item['company_id']:
+        return f"{settings.FRONTEND_BASE_URL.rstrip('/')}/company/{item['company_id']}"
+    return ''
+
+
+def get_click_target(item_id):
+    # '' también se cachea: los ids inexistentes no vuelven a consultar la base de datos
+    return get_or_set(versioned_key(TOP_BURGERS_NAMESPACE, 'click', item_id), lambda: click_target(item_id), get_timeout())
+
+
+def invalidate_top_burgers():
+    bump_version(TOP_BURGERS_NAMESPACE)
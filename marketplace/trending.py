@@ -0,0 +1,120 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .checkpoints import advance, pending_orders
+from .models import OrderItem, RecommendationCheckpoint, TopBurgerItem, TrendingScore
+from .top_burgers import invalidate_top_burgers
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'trending'
+
+
+def get_half_life():
+    """Vida media de la puntuación en segundos."""
+    return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 72) * 3600
+
+
+def decay_factor(seconds):
+    return 0.5 ** (max(seconds, 0) / get_half_life())
+
+
+def update_trending_scores(now=None):
+    """
+    Actualización incremental: decae todas las puntuaciones con un único UPDATE según el
+    tiempo transcurrido desde la última ejecución y suma las líneas de los pedidos nuevos,
+    cada una decaída desde la fecha de su pedido. Nunca vuelve a leer el historial completo.
+    """
+    now = now or timezone.now()
+    window = get_half_life() * getattr(settings, 'TRENDING_INITIAL_WINDOW_HALF_LIVES', 4)
+
+    with transaction.atomic():
+        checkpoint, created = RecommendationCheckpoint.objects.select_for_update().get_or_create(
+            name=CHECKPOINT_NAME
+        )
+        if not created:
+            elapsed = (now - checkpoint.updated_at).total_seconds()
+            TrendingScore.objects.update(score=F('score') * decay_factor(elapsed))
+            TrendingScore.objects.filter(score__lt=getattr(settings, 'TRENDING_MIN_SCORE', 0.01)).delete()
+
+        # También los pedidos confirmados tarde por debajo del checkpoint (ver checkpoints)
+        lines = OrderItem.objects.filter(pending_orders(checkpoint, 'order_id'))
+        if created:
+            # Primera ejecución: solo los pedidos que aún aportarían algo tras el decaimiento
+            lines = lines.filter(order__created_at__gte=now - timedelta(seconds=window))
+        increments = defaultdict(float)
+        order_ids = set()
+        for order_id, company_id, category_id, created_at, quantity in lines.values_list(
+            'order_id', 'order__company_id', 'product__category_id', 'order__created_at', 'quantity'
+        ).iterator(chunk_size=2000):
+            weight = quantity * decay_factor((now - created_at).total_seconds())
+            if category_id is not None:
+                increments[(company_id, category_id)] += weight
+            increments[(company_id, None)] += weight
+            order_ids.add(order_id)
+
+        _apply_increments(increments)
+        # En la primera ejecución los pedidos anteriores a la ventana faltan a propósito
+        advance(checkpoint, order_ids, record_gaps=not created)
+        # update() en lugar de save(): auto_now pisaría el instante de referencia del decaimiento
+        RecommendationCheckpoint.objects.filter(pk=checkpoint.pk).update(
+            last_order_id=checkpoint.last_order_id,
+            open_gaps=checkpoint.open_gaps,
+            updated_at=now
+        )
+
+    invalidate_top_burgers()
+    logger.info(f"Trending scores updated with {len(increments)} increments")
+    return len(increments)
+
+
+def _apply_increments(increments):
+    if not increments:
+        return
+    # Las filas con category vacía no entran en la restricción única, así que se hace a mano
+    existing = {
+        (row.company_id, row.category_id): row
+        for row in TrendingScore.objects.filter(company_id__in={company for company, _ in increments})
+    }
+    changed, created = [], []
+    for (company_id, category_id), weight in increments.items():
+        row = existing.get((company_id, category_id))
+        if row is None:
+            created.append(TrendingScore(company_id=company_id, category_id=category_id, score=weight))
+        else:
+            row.score += weight
+            changed.append(row)
+    TrendingScore.objects.bulk_update(changed, ['score'], batch_size=1000)
+    TrendingScore.objects.bulk_create(created, batch_size=1000)
+
+
+def trending_items(section):
+    """
+    Elementos de una sección en modo automático: TopBurgerItem sin guardar, construidos con
+    las empresas de mayor puntuación, para reutilizar los serializers de la sección manual.
+    """
+    scores = TrendingScore.objects.filter(
+        category_id=section.auto_category_id
+    ).select_related('company').order_by('-score', 'company_id')
+    if section.auto_country_id:
+        scores = scores.filter(company__country_id=section.auto_country_id)
+
+    items = []
+    for position, row in enumerate(scores[:section.auto_limit], start=1):
+        company = row.company
+        use_cover = bool(company.cover_photo)
+        items.append(TopBurgerItem(
+            section=section,
+            company=company,
+            item_type='COMPANY',
+            order=position,
+            featured_image=company.cover_photo if use_cover else company.profile_picture,
+            featured_image_variants=company.cover_photo_variants if use_cover else {},
+        ))
+    return items
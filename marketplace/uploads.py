@@ -0,0 +1,261 @@
+import logging
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .images import generate_variants, has_variants, variants_field_name
+from .models import ImageUploadTask
+
+logger = logging.getLogger(__name__)
+
+
+class CloudinaryUploadBackend:
+    """Sube la imagen a Cloudinary y devuelve el valor a guardar en el CloudinaryField."""
+
+    def upload(self, path, field):
+        from cloudinary import uploader
+
+        options = {'type': field.type, 'resource_type': field.resource_type}
+        options.update(field.options)
+        resource = uploader.upload_resource(path, **options)
+        return resource.get_prep_value()
+
+    def open(self, value):
+        """Descarga la imagen ya subida (para el backfill de variantes)."""
+        return urlopen(value.build_url(secure=True), timeout=30)
+
+
+class LocalFileSystemUploadBackend:
+    """
+    Sustituto de Cloudinary para desarrollo y pruebas: copia la imagen bajo MEDIA_ROOT
+    respetando la carpeta del campo y devuelve la ruta relativa como public_id.
+    """
+
+    def upload(self, path, field):
+        folder = field.options.get('folder', '').strip('/')
+        storage = FileSystemStorage(location=settings.MEDIA_ROOT)
+        with open(path, 'rb') as source:
+            name = storage.save(os.path.join(folder, os.path.basename(path)), source)
+        return name.replace(os.sep, '/')
+
+    def open(self, value):
+        name = f'{value.public_id}.{value.format}' if value.format else value.public_id
+        return open(os.path.join(settings.MEDIA_ROOT, name), 'rb')
+
+
+def get_upload_backend():
+    backend = getattr(settings, 'IMAGE_UPLOAD_BACKEND', 'marketplace.uploads.CloudinaryUploadBackend')
+    return import_string(backend)()
+
+
+def get_pending_storage():
+    """Solo para tareas antiguas, que guardaban el archivo en el disco del dyno web."""
+    return FileSystemStorage(location=settings.PENDING_UPLOADS_ROOT)
+
+
+def deferred_uploads_enabled():
+    return getattr(settings, 'DEFERRED_IMAGE_UPLOADS', True)
+
+
+def pop_pending_images(instance, field_names):
+    """
+    Retira de la instancia los archivos recién subidos para que el guardado no los envíe
+    a Cloudinary. Se conserva la imagen anterior (o vacío si no había) hasta que el worker
+    o upload_image terminen. Devuelve {campo: archivo}.
+    """
+    pending = {}
+    for field_name in field_names:
+        value = getattr(instance, field_name, None)
+        if not isinstance(value, UploadedFile):
+            continue
+        pending[field_name] = value
+        previous = ''
+        if instance.pk:
+            previous = type(instance).objects.filter(pk=instance.pk).values_list(field_name, flat=True).first() or ''
+        setattr(instance, field_name, instance._meta.get_field(field_name).to_python(previous))
+    return pending
+
+
+UNFINISHED_STATUSES = ('PENDING', 'PROCESSING', 'FAILED')
+
+
+def supersede_unfinished_tasks(instance, field_name):
+    """
+    Reemplaza las tareas sin terminar del campo; si un worker tiene una bloqueada, se espera a
+    que la suelte. Devuelve el ContentType de la instancia.
+    """
+    content_type = ContentType.objects.get_for_model(instance)
+    ImageUploadTask.objects.filter(
+        content_type=content_type,
+        object_id=instance.pk,
+        field_name=field_name,
+        status__in=UNFINISHED_STATUSES
+    ).update(status='SUPERSEDED', content=None, updated_at=timezone.now())
+    return content_type
+
+
+@transaction.atomic
+def defer_image_upload(instance, field_name, uploaded_file):
+    """Guarda los bytes del archivo en la tarea y la encola, reemplazando las anteriores del campo."""
+    if hasattr(uploaded_file, 'seekable') and uploaded_file.seekable():
+        uploaded_file.seek(0)
+    content_type = supersede_unfinished_tasks(instance, field_name)
+    return ImageUploadTask.objects.create(
+        content_type=content_type,
+        object_id=instance.pk,
+        field_name=field_name,
+        file_name=os.path.basename(uploaded_file.name or ''),
+        content=uploaded_file.read(),
+    )
+
+
+@contextmanager
+def temporary_copy(file_name, chunks):
+    """Ruta de un archivo temporal con nombre único y la extensión de file_name."""
+    extension = os.path.splitext(file_name or '')[1].lower()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, f'{uuid.uuid4().hex}{extension}')
+        with open(path, 'wb') as destination:
+            for chunk in chunks:
+                destination.write(chunk)
+        yield path
+
+
+@contextmanager
+def task_file(task):
+    """Ruta de un archivo temporal con el contenido de la tarea (o el archivo antiguo en disco)."""
+    if task.content is None:
+        yield get_pending_storage().path(task.local_path)
+        return
+    with temporary_copy(task.file_name, [task.content]) as path:
+        yield path
+
+
+def apply_image(instance, field_name, path, backend):
+    """Sube el archivo y asigna el campo y, si el modelo las tiene, sus variantes. Devuelve los campos a guardar."""
+    field = instance._meta.get_field(field_name)
+    setattr(instance, field_name, field.to_python(backend.upload(path, field)))
+    update_fields = [field_name]
+    if has_variants(type(instance), field_name):
+        setattr(instance, variants_field_name(field_name), generate_variants(path, field, backend))
+        update_fields.append(variants_field_name(field_name))
+    return update_fields
+
+
+def upload_image(instance, field_name, uploaded_file, backend=None):
+    """
+    Camino síncrono (DEFERRED_IMAGE_UPLOADS desactivado): sube la imagen dentro de la petición
+    con el mismo backend que el worker, para que también tenga variantes y LQIP.
+    """
+    backend = backend or get_upload_backend()
+    if hasattr(uploaded_file, 'seekable') and uploaded_file.seekable():
+        uploaded_file.seek(0)
+    with temporary_copy(uploaded_file.name, uploaded_file.chunks()) as path:
+        update_fields = apply_image(instance, field_name, path, backend)
+    with transaction.atomic():
+        supersede_unfinished_tasks(instance, field_name)
+        instance.save(update_fields=update_fields)
+
+
+def backfill_variants(instance, field_name, backend=None):
+    """Genera las variantes y el LQIP de una imagen ya subida que no los tiene."""
+    backend = backend or get_upload_backend()
+    image = getattr(instance, field_name)
+    field = instance._meta.get_field(field_name)
+    with backend.open(image) as source:
+        chunks = iter(lambda: source.read(64 * 1024), b'')
+        with temporary_copy(f'image.{image.format or "jpg"}', chunks) as path:
+            setattr(instance, variants_field_name(field_name), generate_variants(path, field, backend))
+    # save() en lugar de update() para que las señales invaliden las cachés
+    instance.save(update_fields=[variants_field_name(field_name)])
+
+
+def claim_task(task):
+    """Reclama la tarea con un UPDATE condicional para que dos workers no la procesen a la vez."""
+    return ImageUploadTask.objects.filter(pk=task.pk, status='PENDING').update(
+        status='PROCESSING',
+        updated_at=timezone.now()
+    ) == 1
+
+
+def requeue_stale_tasks(timeout=timedelta(minutes=10)):
+    """Devuelve a la cola las tareas que quedaron en PROCESSING por la caída de un worker."""
+    return ImageUploadTask.objects.filter(
+        status='PROCESSING',
+        updated_at__lt=timezone.now() - timeout
+    ).update(status='PENDING', updated_at=timezone.now())
+
+
+def process_task(task, backend=None):
+    """
+    Sube la imagen y actualiza el objeto. Devuelve True si terminó, False si falló y None si
+    otra tarea más reciente la reemplazó mientras tanto (su imagen no se aplica).
+    """
+    backend = backend or get_upload_backend()
+    storage = get_pending_storage()
+    model = task.content_type.model_class()
+    try:
+        instance = model.objects.get(pk=task.object_id)
+        with task_file(task) as path:
+            update_fields = apply_image(instance, task.field_name, path, backend)
+        with transaction.atomic():
+            # El bloqueo ordena esta escritura frente a defer_image_upload: si ya hay una
+            # tarea más nueva, la imagen de esta no debe pisar la suya
+            if not ImageUploadTask.objects.select_for_update().filter(pk=task.pk, status='PROCESSING').exists():
+                return None
+            # save() en lugar de update() para que las señales invaliden las cachés
+            instance.save(update_fields=update_fields)
+            task.status = 'DONE'
+            task.last_error = ''
+            task.content = None
+            task.save(update_fields=['status', 'last_error', 'content', 'updated_at'])
+    except model.DoesNotExist:
+        task.status = 'FAILED'
+        task.last_error = 'Object no longer exists'
+        task.content = None
+        task.save(update_fields=['status', 'last_error', 'content', 'updated_at'])
+    except Exception as e:
+        logger.error(f"Error uploading image for task {task.pk}: {str(e)}")
+        max_attempts = getattr(settings, 'IMAGE_UPLOAD_MAX_ATTEMPTS', 5)
+        attempts = task.attempts + 1
+        # Solo si sigue siendo nuestra: una tarea reemplazada no vuelve a la cola
+        ImageUploadTask.objects.filter(pk=task.pk, status='PROCESSING').update(
+            status='FAILED' if attempts >= max_attempts else 'PENDING',
+            attempts=attempts,
+            last_error=str(e),
+            updated_at=timezone.now()
+        )
+        return False
+
+    if task.local_path and storage.exists(task.local_path):
+        storage.delete(task.local_path)
+    return task.status == 'DONE'
+
+
+def process_pending_uploads(batch_size=20):
+    """Procesa hasta batch_size subidas pendientes; devuelve (procesadas, fallidas)."""
+    backend = get_upload_backend()
+    processed = failed = 0
+    tasks = ImageUploadTask.objects.filter(status='PENDING').select_related('content_type')[:batch_size]
+    for task in tasks:
+        if not claim_task(task):
+            continue
+        task.status = 'PROCESSING'
+        result = process_task(task, backend)
+        if result:
+            processed += 1
+        elif result is False:
+            failed += 1
+    return processed, failed
+
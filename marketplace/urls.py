@@ -1,8 +1,9 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from . import views
 from .views import SearchView, LoginView, RegisterView, OrderViewSet, CompanyCategoryViewSet, CountryViewSet
-from .views import TopBurgerSectionView
+from .views import TopBurgerSectionView, ReferenceDataView, HomeFeedView, CacheStatsView, CounterEventsView, \
+    TopBurgerItemClickView, CountryCompaniesView, CountryProductsView, ReadinessView, WarmupStatsView
 
 
 
@@ -13,6 +14,7 @@ router.register(r'products', views.ProductViewSet)
 router.register(r'orders', OrderViewSet)
 router.register(r'company-categories', CompanyCategoryViewSet)
 router.register(r'countries', CountryViewSet)
+router.register(r'promotions', views.PromotionViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -20,4 +22,14 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('register/', RegisterView.as_view(), name='register'),
     path('top-burgers/', TopBurgerSectionView.as_view(), name='top-burgers'),
+    path('top-burgers/items/<int:pk>/click/', TopBurgerItemClickView.as_view(), name='top-burger-item-click'),
+    path('events/', CounterEventsView.as_view(), name='events'),
+    path('assistant/', views.assistant_stream, name='assistant'),
+    path('reference-data/', ReferenceDataView.as_view(), name='reference-data'),
+    path('home/', HomeFeedView.as_view(), name='home'),
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('ready/', ReadinessView.as_view(), name='ready'),
+    path('warmup-stats/', WarmupStatsView.as_view(), name='warmup-stats'),
+    re_path(r'^(?P<country_code>[A-Za-z]{2})/companies/$', CountryCompaniesView.as_view(), name='country-companies'),
+    re_path(r'^(?P<country_code>[A-Za-z]{2})/products/$', CountryProductsView.as_view(), name='country-products'),
 ]
\ No newline at end of file
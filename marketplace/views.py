@@ -3,22 +3,54 @@ from rest_framework.authtoken.models import Token  # Añade esta línea
 from rest_framework import serializers, viewsets, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny, IsAdminUser
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.throttling import BaseThrottle
 from django.contrib.auth import authenticate
 from .models import Promotion
 from .serializers import PromotionSerializer
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, HttpResponseNotModified, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.urls import reverse
 from .models import Company, Category, Product, Order, OrderItem, BusinessHours, CompanyCategory, Country, TopBurgerSection, TopBurgerItem
+from .models import RelatedProduct
 from .serializers import OrderSerializer, OrderItemSerializer, CompanyCategorySerializer, CountrySerializer, \
-    CompanySerializer, CategorySerializer, ProductSerializer, TopBurgerSectionSerializer, TopBurgerItemSerializer
+    CompanySerializer, CategorySerializer, ProductSerializer, TopBurgerSectionSerializer, TopBurgerItemSerializer, \
+    PromotionBulkUpdateSerializer, ProductBulkUpdateSerializer, OrderHistorySerializer, RelatedProductSerializer, \
+    CounterEventBatchSerializer, company_promotions_prefetch, product_promotions_prefetch
     
+from .reference_data import get_reference_data
+from .home_feed import get_home_feed
+from .images import lqip, variant_urls
+from .catalog import filter_products, get_facets
+from .promotion_feed import PromotionFeedPagination, feed_queryset, get_first_page, get_ranking, resolve_country
+from rest_framework.utils.urls import replace_query_param
+from .bulk import change_product_prices, extend_promotions, set_promotions_active
+from .throttling import ExpensiveEndpointThrottle
+from . import api_schema as api_schema_artifacts, company_cache
+from .country_catalog import get_catalog as get_country_catalog, resolve_country_code
+from .cache import stats as cache_stats
+from .counters import record_once as record_events_once
+from .inventory import InsufficientStock, UnknownProducts, merge_lines, reserve_stock
+from .trending import trending_items
+from .assistant import answer_stream
+from .order_history import OrderHistoryPagination, filter_orders, order_summary
+from .warmup import READY as WARMUP_READY, start_warm_up, state as warmup_state
+from .top_burgers import get_click_target, get_sections as get_top_burger_sections
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
 
 
 
 import logging
+import math
+from urllib.parse import urljoin
 
 logger = logging.getLogger(__name__)
 
@@ -28,30 +60,62 @@ class CompanyCategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
 class PromotionViewSet(viewsets.ModelViewSet):
+    """
+    Feed global de promociones vigentes con paginación por cursor.
+    ranking: newest (por defecto), ending (terminan antes) o discount (mayor descuento).
+    Filtros: country (id o código), category y company.
+    Solo el staff y los dueños de la empresa pueden crear, modificar o borrar promociones.
+    """
     queryset = Promotion.objects.all()
     serializer_class = PromotionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = PromotionFeedPagination
 
     def get_queryset(self):
-        queryset = Promotion.objects.filter(is_active=True)
-        company_id = self.request.query_params.get('company', None)
-        category_id = self.request.query_params.get('category', None)
-        
-        if company_id:
-            queryset = queryset.filter(company_id=company_id)
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-            
-        # Filtrar promociones vigentes
-        now = timezone.now()
-        queryset = queryset.filter(
-            Q(start_date__lte=now) &
-            (Q(end_date__gte=now) | Q(end_date__isnull=True))
+        if self.action != 'list':
+            queryset = Promotion.objects.select_related('company', 'product', 'category')
+            # Las escrituras solo ven las promociones propias: las ajenas responden 404
+            if self.action != 'retrieve' and not self.request.user.is_staff:
+                queryset = queryset.filter(company__user=self.request.user)
+            return queryset
+
+        params = self.request.query_params
+        return feed_queryset(
+            get_ranking(params),
+            country_id=resolve_country(params.get('country')),
+            category_id=params.get('category') or None,
+            company_id=params.get('company') or None,
         )
-        
-        return queryset.select_related('company', 'product', 'category')
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        cacheable = not any(params.get(name) for name in ('cursor', 'category', 'company', 'page_size'))
+        if not cacheable:
+            return super().list(request, *args, **kwargs)
+
+        country = params.get('country')
+        country_id = resolve_country(country)
+        if country and country_id is None:
+            return Response({'error': 'Country not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Primera página de cada ranking y país: precalculada y servida desde caché
+        page = get_first_page(get_ranking(params), country_id)
+        next_link = None
+        if page['next_cursor']:
+            next_link = replace_query_param(request.build_absolute_uri(), 'cursor', page['next_cursor'])
+        return Response({'next': next_link, 'previous': None, 'results': page['results']})
+
+    def check_company_owner(self, serializer):
+        company = serializer.validated_data.get('company')
+        if company is not None and not self.request.user.is_staff and company.user_id != self.request.user.pk:
+            raise PermissionDenied('You can only manage promotions of your own companies')
 
     def perform_create(self, serializer):
+        self.check_company_owner(serializer)
+        serializer.save()
+
+    def perform_update(self, serializer):
+        self.check_company_owner(serializer)
         serializer.save()
 
     def get_serializer_context(self):
@@ -59,6 +123,42 @@ class PromotionViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
+    @action(detail=False, methods=['patch'], permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        """
+        Activa/desactiva (is_active) o extiende (extend_days) en bloque las promociones
+        seleccionadas por ids y/o company. Los usuarios que no son staff solo afectan
+        las promociones de sus empresas.
+        """
+        serializer = PromotionBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            queryset = Promotion.objects.all()
+            if not request.user.is_staff:
+                queryset = queryset.filter(company__user=request.user)
+            if 'ids' in data:
+                queryset = queryset.filter(pk__in=data['ids'])
+            if 'company' in data:
+                queryset = queryset.filter(company_id=data['company'])
+
+            result = {}
+            with transaction.atomic():
+                # Primero se extiende: así se pueden activar las que vuelven a estar vigentes
+                if 'extend_days' in data:
+                    result['extended'] = extend_promotions(queryset, data['extend_days'])
+                if 'is_active' in data:
+                    result['activated' if data['is_active'] else 'deactivated'] = set_promotions_active(
+                        queryset, data['is_active']
+                    )
+            return Response(result)
+        except Exception as e:
+            logger.error(f"Error in promotions bulk update: {str(e)}")
+            return Response(
+                {'error': 'An error occurred while updating promotions'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
 class CountryViewSet(viewsets.ModelViewSet):
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
@@ -67,15 +167,7 @@ class CountryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def available_countries(self, request):
         try:
-            countries = [
-                {
-                    'code': code,
-                    'name': name.split(maxsplit=1)[1],
-                    'flag_emoji': name.split()[0]
-                }
-                for code, name in Country.COUNTRY_CHOICES
-            ]
-            return Response(countries)
+            return Response(Country.get_available_countries())
         except Exception as e:
             logger.error(f"Error in available_countries: {str(e)}")
             return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -94,12 +186,18 @@ class CompanyViewSet(viewsets.ModelViewSet):
     serializer_class = CompanySerializer
     permission_classes = [AllowAny]
 
+    def get_throttles(self):
+        # El listado sin paginar es costoso; el resto usa el presupuesto general
+        if self.action == 'list':
+            return [ExpensiveEndpointThrottle()]
+        return super().get_throttles()
+
     def get_queryset(self):
         queryset = Company.objects.prefetch_related(
             'business_hours',
             'category',
             'country',
-            'promotions'
+            company_promotions_prefetch()
         ).select_related(
             'category',
             'country'
@@ -115,6 +213,13 @@ class CompanyViewSet(viewsets.ModelViewSet):
            
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        data = company_cache.get_or_build(
+            company_cache.list_key(request.query_params),
+            lambda: super(CompanyViewSet, self).list(request, *args, **kwargs).data
+        )
+        return Response(data)
+
     @action(detail=True, methods=['get'])
     def active_promotions(self, request, pk=None):
         """
@@ -188,9 +293,11 @@ class CompanyViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         try:
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+            data = company_cache.get_or_build(
+                company_cache.detail_key(kwargs['pk']),
+                lambda: self.get_serializer(self.get_object()).data
+            )
+            return Response(data)
         except Company.DoesNotExist:
             return Response(
                 {'error': 'Company not found'}, 
@@ -255,10 +362,84 @@ class CategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
 class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all().prefetch_related('promotions')
+    queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
+    def get_throttles(self):
+        if self.action == 'list':
+            return [ExpensiveEndpointThrottle()]
+        return super().get_throttles()
+
+    def get_queryset(self):
+        # La vigencia depende de la hora: el prefetch se construye en cada petición
+        queryset = super().get_queryset().prefetch_related(product_promotions_prefetch())
+        if self.action == 'list':
+            queryset = filter_products(queryset, self.request.query_params)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Filtros: company, category, min_price, max_price, min_effective_price, max_effective_price,
+        has_promotion=true y ordering (también por effective_price).
+        Con facets=true la respuesta incluye los conteos por categoría, precio y empresa.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer(queryset, many=True)
+        if request.query_params.get('facets', '').lower() not in ('1', 'true'):
+            return Response(serializer.data)
+        return Response({
+            'count': len(serializer.data),
+            'results': serializer.data,
+            'facets': get_facets(queryset, request.query_params),
+        })
+
+    @action(detail=False, methods=['patch'], permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        """
+        Cambio porcentual de precio (price_change_percent) en un único UPDATE para los
+        productos seleccionados por ids, company y/o category. Los usuarios que no son
+        staff solo afectan los productos de sus empresas.
+        """
+        serializer = ProductBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            queryset = Product.objects.all()
+            if not request.user.is_staff:
+                queryset = queryset.filter(company__user=request.user)
+            if 'ids' in data:
+                queryset = queryset.filter(pk__in=data['ids'])
+            if 'company' in data:
+                queryset = queryset.filter(company_id=data['company'])
+            if 'category' in data:
+                queryset = queryset.filter(category_id=data['category'])
+
+            updated = change_product_prices(queryset, data['price_change_percent'])
+            return Response({'updated': updated})
+        except Exception as e:
+            logger.error(f"Error in products bulk update: {str(e)}")
+            return Response(
+                {'error': 'An error occurred while updating products'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """
+        Productos comprados junto con este (top-K precalculado por update_recommendations).
+        Una sola consulta por índice, sin cargar el producto.
+        """
+        try:
+            neighbours = RelatedProduct.objects.filter(product_id=pk).select_related('related').order_by('rank')
+            return Response(RelatedProductSerializer(neighbours, many=True).data)
+        except Exception as e:
+            logger.error(f"Error retrieving related products: {str(e)}")
+            return Response(
+                {'error': 'An error occurred while retrieving related products'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
@@ -283,34 +464,85 @@ class OrderViewSet(viewsets.ModelViewSet):
 
             if not company_id or not items:
                 return Response({"error": "Incomplete order data"}, status=status.HTTP_400_BAD_REQUEST)
+            if any(not isinstance(item.get('quantity'), int) or item['quantity'] < 1 for item in items):
+                return Response({"error": "Quantities must be positive integers"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                quantities = merge_lines(items)
+            except (KeyError, TypeError, ValueError):
+                return Response({"error": "Product ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
 
             total = sum(item['price'] * item['quantity'] for item in items)
-            order = Order.objects.create(user=user, company_id=company_id, total=total)
-
-            for item in items:
-                OrderItem.objects.create(
-                    order=order,
-                    product_id=item['product'],
-                    quantity=item['quantity'],
-                    price=item['price']
-                )
+            with transaction.atomic():
+                # Reserva todas las líneas en un solo UPDATE condicional antes de crear el pedido
+                reserve_stock(quantities)
+                order = Order.objects.create(user=user, company_id=company_id, total=total)
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product_id=int(item['product']),
+                        quantity=item['quantity'],
+                        price=item['price']
+                    )
+                    for item in items
+                ])
 
             serializer = self.get_serializer(order)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
+        except UnknownProducts as e:
+            return Response(
+                {'error': 'Unknown products', 'products': e.product_ids},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except InsufficientStock as e:
+            return Response(
+                {'error': 'Insufficient stock', 'products': e.product_ids},
+                status=status.HTTP_409_CONFLICT
+            )
         except Exception as e:
             logger.error(f"Error creating order: {str(e)}")
             return Response({'error': 'An error occurred while creating the order'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def get_queryset(self):
         user = self.request.user
-        return Order.objects.filter(user=user)
+        return Order.objects.filter(user=user).select_related('company').prefetch_related('items__product')
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Historial de pedidos paginado por cursor (más recientes primero) con filtros
+        date_from, date_to y company. La primera página incluye el resumen del conjunto filtrado.
+        """
+        # Los filtros y cursores inválidos responden 400/404 a través de DRF
+        queryset = filter_orders(self.get_queryset(), request.query_params)
+        paginator = OrderHistoryPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        try:
+            data = {
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'results': OrderHistorySerializer(page, many=True).data,
+            }
+            # El resumen no depende de la página: solo se calcula al empezar el recorrido
+            if not request.query_params.get(paginator.cursor_query_param):
+                data['summary'] = order_summary(queryset)
+            return Response(data)
+        except Exception as e:
+            logger.error(f"Error retrieving order history: {str(e)}")
+            return Response({'error': 'An error occurred while retrieving order history'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class SearchView(APIView):
+    throttle_classes = [ExpensiveEndpointThrottle]
+
+    SEMANTIC_MAX_LIMIT = 50
+
     def get(self, request):
         try:
             query = request.query_params.get('q', '')
-            companies = Company.objects.filter(name__icontains=query)
-            products = Product.objects.filter(name__icontains=query)
+            if request.query_params.get('mode') == 'semantic':
+                return Response(self.semantic(request, query))
+
+            companies = Company.objects.filter(name__icontains=query).prefetch_related(company_promotions_prefetch())
+            products = Product.objects.filter(name__icontains=query).prefetch_related(product_promotions_prefetch())
             categories = Category.objects.filter(name__icontains=query)
 
             company_serializer = CompanySerializer(companies, many=True, context={'request': request})
@@ -328,6 +560,40 @@ class SearchView(APIView):
             logger.error(f"Error in search: {str(e)}")
             return Response({'error': 'An error occurred during search'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def semantic(self, request, query):
+        """
+        Búsqueda por similitud sobre nombre y descripción de empresas y productos
+        (?mode=semantic&limit=20). Cada resultado incluye type y score.
+        """
+        if not query.strip():
+            return []
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.SEMANTIC_MAX_LIMIT)
+        except ValueError:
+            limit = 20
+        # Importado aquí: el índice arrastra NumPy y solo lo necesita este modo
+        from .semantic_search import SOURCES as SEMANTIC_SOURCES, search as semantic_search
+
+        hits = semantic_search([query], k=limit)[0]
+
+        serializers_by_type = {'company': CompanySerializer, 'product': ProductSerializer}
+        prefetches = {'company': company_promotions_prefetch, 'product': product_promotions_prefetch}
+        objects = {
+            name: model.objects.prefetch_related(prefetches[name]()).in_bulk(
+                [object_id for hit_name, object_id, _ in hits if hit_name == name]
+            )
+            for name, (model, _) in SEMANTIC_SOURCES.items()
+        }
+        results = []
+        for name, object_id, score in hits:
+            obj = objects[name].get(object_id)
+            if obj is None:
+                continue
+            data = dict(serializers_by_type[name](obj, context={'request': request}).data)
+            data.update({'type': name, 'score': round(score, 4)})
+            results.append(data)
+        return results
+
 class LoginView(APIView):
     permission_classes = [AllowAny]
 
@@ -438,24 +704,196 @@ class TopBurgerSectionView(APIView):
     
     def get(self, request):
         try:
-            sections = TopBurgerSection.objects.all().order_by('position')
-            serializer = TopBurgerSectionSerializer(
-                sections, 
-                many=True,
-                context={'request': request}
-            )
-            return Response(serializer.data)
+            def build(base_url):
+                sections = TopBurgerSection.objects.prefetch_related('items__company').order_by('position')
+                serializer = TopBurgerSectionSerializer(
+                    sections, 
+                    many=True,
+                    context={'base_url': base_url}
+                )
+                return serializer.data
+
+            return Response(get_top_burger_sections(build))
         except Exception as e:
             logger.error(f"Error in TopBurgerSectionView: {str(e)}")
             return Response({
                 "error": "An error occurred while fetching top burger sections"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def counter_client(request):
+    """Identidad del cliente para deduplicar eventos: el usuario o, si es anónimo, su IP."""
+    if request.user and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{BaseThrottle().get_ident(request)}'
+
+
+class CounterEventsView(APIView):
+    """
+    Ingesta de impresiones y clics en lote: {"events": [{"type": "view", "target": "company", "id": 1}]}.
+    Solo suma en memoria; los contadores se vuelcan a la base de datos cada pocos segundos. Cada
+    cliente cuenta una vez por objeto y tipo de evento dentro de COUNTER_DEDUPE_WINDOW.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = CounterEventBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        accepted = record_events_once(counter_client(request), [
+            (event['target'], event['type'], event['id']) for event in serializer.validated_data['events']
+        ])
+        return Response({'accepted': accepted}, status=status.HTTP_202_ACCEPTED)
+
+class TopBurgerItemClickView(APIView):
+    """Cuenta el clic en un elemento de top burgers y redirige a su destino."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        try:
+            target = get_click_target(pk)
+            if not target:
+                return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+            record_events_once(counter_client(request), [('top_burger_item', 'click', pk)])
+            return HttpResponseRedirect(target)
+        except Exception as e:
+            logger.error(f"Error in TopBurgerItemClickView: {str(e)}")
+            return Response({
+                "error": "An error occurred while following the item link"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ReadinessView(APIView):
+    """
+    Disponibilidad del worker que responde: 200 si ya está precalentado, 503 mientras está frío
+    o precalentándose. Si nadie lo precalentó (p. ej. sin gunicorn), la consulta lo inicia (como
+    mucho una vez cada WARMUP_RETRY_INTERVAL s). Es pública: solo devuelve el estado.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    throttle_classes = []
+
+    def get(self, request):
+        start_warm_up()
+        current = warmup_state.snapshot()['status']
+        ready = current in WARMUP_READY
+        return Response(
+            {'status': current}, status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+class WarmupStatsView(APIView):
+    """Detalle del precalentado de este proceso: tareas, duraciones y errores."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(warmup_state.snapshot())
+
+class CacheStatsView(APIView):
+    """Contadores de aciertos y fallos de la caché de dos niveles en este proceso."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats.snapshot())
+
+class ReferenceDataView(APIView):
+    """
+    Paquete único con países, países disponibles y categorías para el arranque del cliente.
+    Se sirve desde caché y se regenera solo cuando cambian esas tablas.
+    """
+    permission_classes = [AllowAny]
+
+    # Una URL con ?v=<versión> nunca cambia de contenido
+    VERSIONED_MAX_AGE = 60 * 60 * 24 * 365
+    DEFAULT_MAX_AGE = 60 * 60
+
+    def get(self, request):
+        try:
+            data = get_reference_data()
+            etag = f'"{data["version"]}"'
+
+            if request.headers.get('If-None-Match') == etag:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(data)
+
+            response['ETag'] = etag
+            if request.query_params.get('v') == data['version']:
+                response['Cache-Control'] = f'public, max-age={self.VERSIONED_MAX_AGE}, immutable'
+            else:
+                response['Cache-Control'] = f'public, max-age={self.DEFAULT_MAX_AGE}, stale-while-revalidate=86400'
+            return response
+        except Exception as e:
+            logger.error(f"Error in ReferenceDataView: {str(e)}")
+            return Response({
+                "error": "An error occurred while fetching reference data"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class HomeFeedView(APIView):
+    """
+    Feed precalculado de la pantalla de inicio: top burgers, promociones vigentes,
+    categorías de empresa y empresas destacadas, por país (?country=CR).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            snapshot = get_home_feed(request.query_params.get('country'))
+            if snapshot is None:
+                return Response({'error': 'Country not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(snapshot)
+        except Exception as e:
+            logger.error(f"Error in HomeFeedView: {str(e)}")
+            return Response({
+                "error": "An error occurred while fetching the home feed"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class CountryCatalogView(APIView):
+    """
+    Listado de un país servido desde su catálogo precalculado (/api/{country_code}/...).
+    Los filtros de catalog_filters se resuelven con el índice del catálogo, sin consultar la base.
+    """
+    permission_classes = [AllowAny]
+    kind = None
+
+    def get(self, request, country_code):
+        try:
+            country_id = resolve_country_code(country_code)
+            if country_id is None:
+                return Response({'error': 'Country not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(get_country_catalog(country_id, self.kind, request.query_params))
+        except Exception as e:
+            logger.error(f"Error in {self.__class__.__name__}: {str(e)}")
+            return Response({
+                "error": f"An error occurred while fetching {self.kind}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def country_catalog_schema(operation_id, serializer, filters):
+    # operation_id explícito: el generado (companies_retrieve, products_retrieve) choca con el
+    # detalle de /api/companies/{id}/ y /api/products/{id}/
+    return extend_schema_view(get=extend_schema(
+        operation_id=operation_id,
+        responses=serializer(many=True),
+        parameters=[OpenApiParameter(name, int, description=f'Filtra por {name}.') for name in filters],
+    ))
+
+
+@country_catalog_schema('country_companies_list', CompanySerializer, ('category',))
+class CountryCompaniesView(CountryCatalogView):
+    """Empresas del país; filtro opcional ?category=."""
+    kind = 'companies'
+
+
+@country_catalog_schema('country_products_list', ProductSerializer, ('company', 'category'))
+class CountryProductsView(CountryCatalogView):
+    """Productos de las empresas del país; filtros opcionales ?company= y ?category=."""
+    kind = 'products'
+
 class TopBurgerItemSerializer(serializers.ModelSerializer):
     company_name = serializers.SerializerMethodField()
     company_logo = serializers.SerializerMethodField()
     company_profile_url = serializers.SerializerMethodField()
     featured_image = serializers.SerializerMethodField()
+    featured_image_variants = serializers.SerializerMethodField()
+    featured_image_lqip = serializers.SerializerMethodField()
+    tracking_url = serializers.SerializerMethodField()
 
     class Meta:
         model = TopBurgerItem
@@ -464,9 +902,12 @@ class TopBurgerItemSerializer(serializers.ModelSerializer):
             'company_logo',
             'company_profile_url',
             'featured_image',
+            'featured_image_variants',
+            'featured_image_lqip',
             'order',
             'item_type',
-            'custom_url'
+            'custom_url',
+            'tracking_url'
         ]
 
     def get_company_name(self, obj):
@@ -474,7 +915,7 @@ class TopBurgerItemSerializer(serializers.ModelSerializer):
 
     def get_company_logo(self, obj):
         if obj.company and obj.company.profile_picture:
-            return self.context['request'].build_absolute_uri(obj.company.profile_picture.url)
+            return self._absolute_url(obj.company.profile_picture.url)
         return ""
 
     def get_company_profile_url(self, obj):
@@ -484,19 +925,90 @@ class TopBurgerItemSerializer(serializers.ModelSerializer):
 
     def get_featured_image(self, obj):
         if obj.featured_image:
-            return self.context['request'].build_absolute_uri(obj.featured_image.url)
+            return self._absolute_url(obj.featured_image.url)
         return ""
+
+    def get_featured_image_variants(self, obj):
+        return {width: self._absolute_url(url) for width, url in variant_urls(obj, 'featured_image').items()}
+
+    def get_featured_image_lqip(self, obj):
+        return lqip(obj, 'featured_image')
+
+    def _absolute_url(self, url):
+        # Las secciones se cachean para todos los clientes: URL base canónica, no el Host
+        return urljoin(self.context['base_url'], url)
+
+    def get_tracking_url(self, obj):
+        if obj.pk is None:
+            return ""
+        return self._absolute_url(reverse('top-burger-item-click', args=[obj.pk]))
     
 class TopBurgerSectionSerializer(serializers.ModelSerializer):
-    items = TopBurgerItemSerializer(many=True, read_only=True)
+    items = serializers.SerializerMethodField()
 
     class Meta:
         model = TopBurgerSection
         fields = ['title', 'location', 'items']
 
+    def get_items(self, obj):
+        # En modo automático los elementos salen de las puntuaciones de tendencia
+        items = trending_items(obj) if obj.mode == 'AUTO' else obj.items.all()
+        return TopBurgerItemSerializer(items, many=True, context=self.context).data
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         if not representation.get('items'):
             representation['items'] = []
         return representation
     
+
+
+async def assistant_stream(request):
+    """
+    Asistente del catálogo en streaming (Server-Sent Events): GET /api/assistant/?q=...
+    Es una vista async: el streaming real lo sirve el proceso ASGI "assistant" del Procfile, al
+    que se enruta /api/assistant/. El proceso web es WSGI (la API es síncrona) y, si recibe
+    esta ruta, Django consume el stream entero y lo entrega de una vez.
+    """
+    prompt = (request.GET.get('q') or '').strip()
+    if not prompt:
+        return JsonResponse({'error': 'Missing q parameter'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(prompt) > settings.ASSISTANT_MAX_PROMPT_LENGTH:
+        return JsonResponse({'error': 'Question is too long'}, status=status.HTTP_400_BAD_REQUEST)
+
+    throttle = ExpensiveEndpointThrottle()
+    if not await sync_to_async(throttle.allow_request)(request, None):
+        response = JsonResponse({'error': 'Too many requests'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(math.ceil(throttle.wait()))
+        return response
+
+    response = StreamingHttpResponse(answer_stream(prompt), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def api_schema(request):
+    """
+    Esquema OpenAPI precalculado (YAML por defecto, ?format=json): se genera una vez por versión
+    del código y se sirve comprimido, con ETag y Cache-Control, sin pasar por drf-spectacular.
+    """
+    fmt = api_schema_artifacts.negotiate_format(request)
+    content, compressed = api_schema_artifacts.get_artifact(fmt)
+    use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    etag = f'"{api_schema_artifacts.code_version()}-{fmt}{"-gz" if use_gzip else ""}"'
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            compressed if use_gzip else content,
+            content_type=api_schema_artifacts.FORMATS[fmt][1]
+        )
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Disposition'] = f'inline; filename="openapi.{fmt}"'
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.API_SCHEMA_MAX_AGE}'
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
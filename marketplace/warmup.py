@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Precalentado tras un despliegue: conexiones a la base de datos, SDK de Cloudinary y las
+# respuestas más pedidas, en hilos y con un presupuesto de tiempo. Con gunicorn y preload_app el
+# maestro lo ejecuta antes de crear los workers, que heredan las cachés en memoria pero no las
+# conexiones: se cierran antes del fork (ver gunicorn.conf.py) y el estado pasa a WARM_CACHES.
+# /api/ready/ informa si el worker que atiende está caliente; /api/warmup-stats/ da el detalle.
+
+COLD = 'cold'
+WARMING = 'warming'
+WARM = 'warm'
+# Cachés heredadas del maestro; cada worker abre sus conexiones con su primera consulta
+WARM_CACHES = 'warm_caches'
+READY = (WARM, WARM_CACHES)
+
+
+def get_time_budget():
+    return getattr(settings, 'WARMUP_TIME_BUDGET', 10)
+
+
+def get_threads():
+    return getattr(settings, 'WARMUP_THREADS', 4)
+
+
+def get_paths():
+    return getattr(settings, 'WARMUP_PATHS', ())
+
+
+def get_retry_interval():
+    return getattr(settings, 'WARMUP_RETRY_INTERVAL', 30)
+
+
+class WarmupState:
+    """Estado del precalentado en este proceso, con el resultado y la duración de cada tarea."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.status = COLD
+        self.tasks = {}
+        self.started_at = None
+        self.finished_at = None
+        self.requested_at = None
+
+    def request(self, interval):
+        """
+        Reserva un precalentado en segundo plano: solo si el proceso está frío y el último
+        intento pedido fue hace más de interval segundos (un fallo no se reintenta en cada consulta).
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.status != COLD or (self.requested_at is not None and now - self.requested_at < interval):
+                return False
+            self.requested_at = now
+            return True
+
+    def begin(self, names):
+        with self.lock:
+            if self.status == WARMING:
+                return False
+            self.status = WARMING
+            self.tasks = {name: {'status': 'pending'} for name in names}
+            self.started_at = time.time()
+            self.finished_at = None
+            return True
+
+    def task_done(self, name, status, seconds=None, error=None):
+        with self.lock:
+            result = {'status': status}
+            if seconds is not None:
+                result['seconds'] = round(seconds, 3)
+            if error is not None:
+                result['error'] = error
+            self.tasks[name] = result
+
+    def finish(self):
+        with self.lock:
+            # Caliente aunque alguna respuesta no se haya podido precalcular: solo la base de
+            # datos es imprescindible para atender tráfico
+            database = self.tasks.get('database', {}).get('status')
+            self.status = WARM if database in (None, 'ok') else COLD
+            self.finished_at = time.time()
+            return self.status
+
+    def connections_closed(self):
+        """
+        Tras cerrar las conexiones antes del fork: las cachés siguen calientes, la base de datos
+        no. Con conexiones persistentes cada worker paga su conexión en la primera consulta.
+        """
+        with self.lock:
+            if self.status == WARM:
+                self.status = WARM_CACHES
+            if 'database' in self.tasks:
+                self.tasks['database'] = {**self.tasks['database'], 'status': 'closed_before_fork'}
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'status': self.status,
+                'pid': os.getpid(),
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'tasks': {name: dict(result) for name, result in self.tasks.items()},
+            }
+
+
+state = WarmupState()
+
+
+def open_connections():
+    """
+    Abre y valida la conexión de cada base de datos configurada: resuelve el host y completa el
+    handshake (TLS y autenticación) antes de que llegue la primera petición.
+    """
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def prime_cloudinary():
+    """Carga la configuración del SDK y construye una URL para dejar listo el generador de URLs."""
+    import cloudinary
+
+    cloudinary.config()
+    cloudinary.CloudinaryImage('warmup').build_url(secure=True)
+
+
+def render(path):
+    """
+    Atiende internamente un GET con toda la pila de middleware, como una petición real del
+    host público, para que las vistas guarden sus respuestas en caché.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+
+    host = getattr(settings, 'WARMUP_HOST', 'localhost')
+    secure = getattr(settings, 'WARMUP_SECURE', False)
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'HTTP_HOST': host,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '443' if secure else '80',
+        'wsgi.url_scheme': 'https' if secure else 'http',
+        'REMOTE_ADDR': '127.0.0.1',
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+    response = WSGIHandler()(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    if not statuses or not statuses[0].startswith('200'):
+        raise RuntimeError(f"{path} answered {statuses[0] if statuses else 'nothing'}")
+
+
+def build_tasks():
+    tasks = {'database': open_connections, 'cloudinary': prime_cloudinary}
+    for path in get_paths():
+        tasks[f'GET {path}'] = lambda path=path: render(path)
+    return tasks
+
+
+def _run(name, task):
+    started = time.monotonic()
+    try:
+        task()
+        state.task_done(name, 'ok', time.monotonic() - started)
+    except Exception as e:
+        logger.error(f"Warm-up task {name} failed: {str(e)}")
+        state.task_done(name, 'error', time.monotonic() - started, str(e))
+    finally:
+        # Las conexiones son por hilo y estos hilos no atienden peticiones
+        connections.close_all()
+
+
+def warm_up(budget=None, join=True, tasks=None):
+    """
+    Ejecuta las tareas en paralelo. Pasado el presupuesto, las que no empezaron se cancelan;
+    con join=True se espera a las que siguen en curso (obligatorio antes de un fork), si no se
+    dejan terminar en segundo plano. Devuelve el estado final (warm o cold).
+    """
+    tasks = tasks if tasks is not None else build_tasks()
+    budget = get_time_budget() if budget is None else budget
+    if not state.begin(tasks):
+        return state.status
+
+    executor = ThreadPoolExecutor(max_workers=get_threads(), thread_name_prefix='warmup')
+    futures = {executor.submit(_run, name, task): name for name, task in tasks.items()}
+    _, pending = wait(futures, timeout=budget)
+    for future in pending:
+        name = futures[future]
+        state.task_done(name, 'cancelled' if future.cancel() else 'over_budget')
+    executor.shutdown(wait=join, cancel_futures=True)
+
+    status = state.finish()
+    logger.info(f"Warm-up finished in process {os.getpid()}: {status}")
+    return status
+
+
+def start_warm_up(**kwargs):
+    """Precalentado en segundo plano si el proceso sigue frío y no se pidió otro hace poco."""
+    if not state.request(get_retry_interval()):
+        return False
+    threading.Thread(target=warm_up, kwargs={'join': False, **kwargs}, name='warmup', daemon=True).start()
+    return True